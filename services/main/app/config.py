@@ -21,3 +21,42 @@ SCRAPER_SERVICE_URL = os.getenv("SCRAPER_SERVICE_URL", "http://scraper-service:8
 
 JWT_SECRET = os.getenv("JWT_SECRET", "supersecret")
 JWT_ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
+
+# Upstream connection pooling (one long-lived httpx client per service)
+UPSTREAM_MAX_CONNECTIONS = int(os.getenv("UPSTREAM_MAX_CONNECTIONS", "50"))
+UPSTREAM_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("UPSTREAM_MAX_KEEPALIVE_CONNECTIONS", "20"))
+UPSTREAM_KEEPALIVE_EXPIRY = float(os.getenv("UPSTREAM_KEEPALIVE_EXPIRY", "30"))
+UPSTREAM_HTTP2 = os.getenv("UPSTREAM_HTTP2", "false").lower() in ("1", "true", "yes")
+UPSTREAM_PREWARM_CONNECTIONS = int(os.getenv("UPSTREAM_PREWARM_CONNECTIONS", "2"))
+# Long-lived relays (SSE) get their own pool per service, capped at this many open streams,
+# so they can never take the connections request/response traffic needs
+UPSTREAM_MAX_STREAMS = int(os.getenv("UPSTREAM_MAX_STREAMS", "50"))
+
+# Per-upstream circuit breaker
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))  # consecutive failures before opening
+CIRCUIT_RESET_TIMEOUT = float(os.getenv("CIRCUIT_RESET_TIMEOUT", "30"))  # seconds open before a half-open probe
+CIRCUIT_HALF_OPEN_MAX_CALLS = int(os.getenv("CIRCUIT_HALF_OPEN_MAX_CALLS", "1"))
+
+# Per-upstream adaptive (AIMD) concurrency limit
+UPSTREAM_LIMIT_INITIAL = int(os.getenv("UPSTREAM_LIMIT_INITIAL", "20"))
+UPSTREAM_LIMIT_MIN = int(os.getenv("UPSTREAM_LIMIT_MIN", "1"))
+UPSTREAM_LIMIT_MAX = int(os.getenv("UPSTREAM_LIMIT_MAX", "200"))
+UPSTREAM_LIMIT_BACKOFF_RATIO = float(os.getenv("UPSTREAM_LIMIT_BACKOFF_RATIO", "0.9"))
+
+# Single-flight coalescing of identical in-flight GETs
+SINGLEFLIGHT_MAX_KEYS = int(os.getenv("SINGLEFLIGHT_MAX_KEYS", "1024"))
+
+# Gateway response cache (LRU + TTL, stale-while-revalidate)
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "512"))
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+RESPONSE_CACHE_STALE_TTL = float(os.getenv("RESPONSE_CACHE_STALE_TTL", "3600"))  # served stale this long past TTL
+PROFILE_POSTS_CACHE_TTL = float(os.getenv("PROFILE_POSTS_CACHE_TTL", "300"))
+HASHTAG_POSTS_CACHE_TTL = float(os.getenv("HASHTAG_POSTS_CACHE_TTL", "600"))
+
+# Cache of verified JWT claims (keyed by token hash, expires at the token's `exp`)
+JWT_CACHE_MAX_ENTRIES = int(os.getenv("JWT_CACHE_MAX_ENTRIES", "10000"))
+JWT_CACHE_MAX_TTL = float(os.getenv("JWT_CACHE_MAX_TTL", "300"))  # cap for tokens without `exp`
+
+# Shared secret for the /internal/* operational endpoints, sent as the X-Internal-Token
+# header; while unset those endpoints refuse every request
+INTERNAL_TOKEN = os.getenv("INTERNAL_TOKEN")
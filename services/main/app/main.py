@@ -1,6 +1,8 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.routes import auth, postgen, metrics, scraper
+from app.routes import auth, postgen, metrics, scraper, internal
+from app.utils.clients import upstream_clients, stream_clients
+from app.utils.cache import response_cache
 import logging
 
 
@@ -32,10 +34,25 @@ app.add_middleware(
 )
 
 
+# 🔹 Open pooled upstream clients (and pre-warm connections) when the gateway starts
+@app.on_event("startup")
+async def startup_upstream_clients():
+    await upstream_clients.startup()
+
+
+# 🔹 Stop background cache refreshes and close pooled upstream clients when the gateway shuts down
+@app.on_event("shutdown")
+async def shutdown_upstream_clients():
+    await response_cache.close()
+    await upstream_clients.close()
+    await stream_clients.close()
+
+
 app.include_router(auth.router, prefix="/api/v1/auth", tags=["Auth"])
 app.include_router(postgen.router, prefix="/api/v1/postgen", tags=["Post Generation"])
 app.include_router(metrics.router, prefix="/api/v1/metrics", tags=["Engagement Metrics"])
 app.include_router(scraper.router, prefix="/api/v1/scraper", tags=["Scraper"])
+app.include_router(internal.router, prefix="/internal", tags=["Internal"])
 
 @app.get("/health")
 def healthcheck():
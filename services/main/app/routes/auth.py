@@ -1,28 +1,23 @@
 from fastapi import APIRouter, Request, HTTPException
 from app.config import AUTH_SERVICE_URL
-from app.utils.proxy import call_service
+from app.utils.proxy import stream_service
 
 router = APIRouter()
 
+# Auth responses are relayed untouched, so these routes use the streaming passthrough
 @router.post("/login")
 async def login(request: Request):
-    data = await request.json()
-    result = await call_service("post", f"{AUTH_SERVICE_URL}/login", json=data , service_name="auth")
-    return result
+    return await stream_service("post", f"{AUTH_SERVICE_URL}/login", request=request, service_name="auth")
 
 @router.post("/signup")
 async def signup(request: Request):
-    data = await request.json()
-    result = await call_service("post", f"{AUTH_SERVICE_URL}/signup", json=data , service_name="auth")
-    return result
+    return await stream_service("post", f"{AUTH_SERVICE_URL}/signup", request=request, service_name="auth")
 
 @router.get("/me")
 async def me(request: Request):
-    headers = dict(request.headers)
-    result = await call_service(
+    return await stream_service(
         "get",
         f"{AUTH_SERVICE_URL}/me",
-        headers=headers,
+        request=request,
         service_name="auth"
     )
-    return result
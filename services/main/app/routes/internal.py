@@ -0,0 +1,44 @@
+import hmac
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+from app.config import INTERNAL_TOKEN
+from app.utils.resilience import upstream_guards, stream_slots
+from app.utils.singleflight import request_coalescer
+from app.utils.cache import response_cache
+from app.utils.jwt import claims_cache
+
+
+def require_internal_token(x_internal_token: Optional[str] = Header(None)):
+    """Only callers holding INTERNAL_TOKEN may see upstream topology, breaker state and cache stats"""
+    if not INTERNAL_TOKEN:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Internal endpoints are disabled.")
+    if not x_internal_token or not hmac.compare_digest(x_internal_token, INTERNAL_TOKEN):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid internal token.")
+
+
+router = APIRouter(dependencies=[Depends(require_internal_token)])
+
+# Operational endpoints for the gateway itself - not proxied anywhere
+
+@router.get("/upstreams")
+async def upstream_health():
+    """Circuit breaker state, adaptive concurrency limit and open streams for every upstream seen so far"""
+    return {"upstreams": upstream_guards.snapshot(), "streams": stream_slots.snapshot()}
+
+
+@router.get("/coalescing")
+async def coalescing_stats():
+    """Single-flight counters for coalesced upstream GETs"""
+    return request_coalescer.stats()
+
+
+@router.get("/cache")
+async def cache_stats():
+    """Hit/miss counters and size of the gateway response cache"""
+    return response_cache.stats()
+
+
+@router.get("/jwt-cache")
+async def jwt_cache_stats():
+    """Size and hit/miss counters of the verified-claims cache used by get_jwt_user"""
+    return claims_cache.stats()
@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Request, Depends, Query
 from app.config import SCRAPER_SERVICE_URL
-from app.utils.proxy import call_service
+from app.utils.proxy import stream_service
 from app.utils.jwt import get_jwt_user
 
 router = APIRouter()
@@ -14,6 +14,4 @@ async def user_engagement(
 ):
     # Get the user's top posts from Scraper service
     params = {"profile_url": profile_url, "n_posts": n_posts}
-    posts_data = await call_service("get", f"{SCRAPER_SERVICE_URL}/api/v1/scraper/profile/posts", params=params , service_name="scraper")
-    # Do further analytics/aggregation here, or just return
-    return posts_data
\ No newline at end of file
+    return await stream_service("get", f"{SCRAPER_SERVICE_URL}/api/v1/scraper/profile/posts", params=params , service_name="scraper")
@@ -1,7 +1,8 @@
 import logging
 from fastapi import APIRouter, Request, Depends
+from fastapi.responses import JSONResponse
 from app.config import POSTGEN_SERVICE_URL
-from app.utils.proxy import call_service
+from app.utils.proxy import call_service, stream_service
 from app.utils.jwt import get_jwt_user
 
 logger = logging.getLogger(__name__)
@@ -9,14 +10,15 @@ router = APIRouter()
 
 @router.post("/generate-post")
 async def generate_post(request: Request, user=Depends(get_jwt_user)):
-    logger.info(f"JWT Payload received: {user}")
-    logger.info(f"Available keys: {list(user.keys())}")
+    # Claims and the request body only at DEBUG - they carry personal data and user content
+    logger.debug(f"JWT Payload received: {user}")
+    logger.debug(f"Available keys: {list(user.keys())}")
     
     data = await request.json()
     data["username"] = user["linkedin_username"]
     
     logger.info(f"Sending username to postgen: {data['username']}")
-    logger.info(f"Full data to postgen: {data}")
+    logger.debug(f"Full data to postgen: {data}")
     
     # FIX: Correct path + timeout
     result = await call_service(
@@ -26,4 +28,61 @@ async def generate_post(request: Request, user=Depends(get_jwt_user)):
         service_name="postgen",
         timeout=300  # ADDED TIMEOUT (5 minutes)
     )
-    return result
\ No newline at end of file
+    return result
+
+
+@router.post("/generate-post/stream")
+async def generate_post_stream(request: Request, user=Depends(get_jwt_user)):
+    """Relay postgen's token stream (SSE) to the client as it is produced"""
+    data = await request.json()
+    data["username"] = user["linkedin_username"]
+
+    return await stream_service(
+        "post",
+        f"{POSTGEN_SERVICE_URL}/postgen/generate/stream",
+        json=data,
+        service_name="postgen",
+        timeout=300,  # read timeout: retrieval happens before the first byte
+        long_lived=True
+    )
+
+
+# === Job-based generation: 202 + job id instead of holding the connection for minutes ===
+@router.post("/generate-post/jobs")
+async def submit_generate_post_job(request: Request, user=Depends(get_jwt_user)):
+    data = await request.json()
+    data["username"] = user["linkedin_username"]
+
+    result = await call_service(
+        "post",
+        f"{POSTGEN_SERVICE_URL}/postgen/jobs",
+        json=data,
+        service_name="postgen"
+    )
+    job_url = f"/api/v1/postgen/generate-post/jobs/{result['job_id']}"
+    result["status_url"] = job_url
+    result["events_url"] = f"{job_url}/events"
+    return JSONResponse(status_code=202, content=result)
+
+
+@router.get("/generate-post/jobs/{job_id}")
+async def get_generate_post_job(job_id: str, user=Depends(get_jwt_user)):
+    return await stream_service(
+        "get",
+        f"{POSTGEN_SERVICE_URL}/postgen/jobs/{job_id}",
+        params={"username": user["linkedin_username"]},
+        service_name="postgen"
+    )
+
+
+@router.get("/generate-post/jobs/{job_id}/events")
+async def stream_generate_post_job(job_id: str, user=Depends(get_jwt_user)):
+    # SSE relay - read timeout must outlast postgen's 15 s keep-alive comments
+    return await stream_service(
+        "get",
+        f"{POSTGEN_SERVICE_URL}/postgen/jobs/{job_id}/events",
+        params={"username": user["linkedin_username"]},
+        service_name="postgen",
+        timeout=60,
+        long_lived=True
+    )
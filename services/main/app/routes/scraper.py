@@ -1,15 +1,65 @@
+import json
 import logging
 from fastapi import APIRouter, Request, Depends, Query, HTTPException
-from app.config import SCRAPER_SERVICE_URL
-from app.utils.proxy import call_service
+from app.config import SCRAPER_SERVICE_URL, PROFILE_POSTS_CACHE_TTL, HASHTAG_POSTS_CACHE_TTL
+from app.utils.proxy import fetch_service
 from app.utils.jwt import get_jwt_user
+from app.utils.singleflight import request_coalescer, request_key
+from app.utils.cache import response_cache
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/scraper", tags=["Scraper"])
 
+
+def _is_successful_scrape(upstream):
+    # The scraper reports failures as 200 {"success": false, ...} - never cache those.
+    # Decode rather than match bytes so serializer formatting can't let an error through.
+    if upstream.status_code != 200:
+        return False
+    try:
+        payload = json.loads(upstream.body)
+    except ValueError:
+        return False
+    return isinstance(payload, dict) and payload.get("success") is True
+
+
+async def _cached_scraper_get(request: Request, path: str, params: dict, ttl: float):
+    """
+    GET a scraper endpoint through the gateway response cache.
+
+    Misses share one upstream call between identical concurrent requests so the same
+    profile/hashtag never starts two Chromium sessions at once; the raw response bytes
+    are replayed to every waiter. The X-Cache header reports HIT/STALE/MISS/BYPASS.
+    """
+    key = request_key(path, params)
+
+    def fetch():
+        return request_coalescer.do(
+            key,
+            lambda: fetch_service(
+                "get",
+                f"{SCRAPER_SERVICE_URL}{path}",
+                params=params,
+                service_name="scraper",
+                timeout=120  # Increase to 2 minutes for scraping operations
+            )
+        )
+
+    upstream, cache_status = await response_cache.get_or_fetch(
+        key,
+        fetch,
+        ttl,
+        cache_control=request.headers.get("cache-control"),
+        cacheable=_is_successful_scrape
+    )
+    response = upstream.to_response()
+    response.headers["X-Cache"] = cache_status
+    return response
+
 # === Profile posts ===
 @router.get("/profile/posts")
 async def proxy_profile_posts(
+    request: Request,
     profile_url: str = Query(...),
     n_posts: int = Query(10),
     user=Depends(get_jwt_user)
@@ -17,15 +67,15 @@ async def proxy_profile_posts(
     logger.info(f"Profile posts request - User: {user.get('email', 'unknown')}, URL: {profile_url}, Posts: {n_posts}")
     
     try:
-        return await call_service(
-            "get",
-            f"{SCRAPER_SERVICE_URL}/scraper/profile/posts",
-            params={"profile_url": profile_url, "n_posts": n_posts},
-            service_name="scraper",
-            timeout=120  # Increase to 2 minutes for scraping operations
+        # The post list is relayed as raw bytes, never decoded here
+        return await _cached_scraper_get(
+            request,
+            "/scraper/profile/posts",
+            {"profile_url": profile_url.strip().rstrip("/"), "n_posts": n_posts},
+            ttl=PROFILE_POSTS_CACHE_TTL
         )
     except HTTPException:
-        # Re-raise HTTPExceptions from call_service (they already have proper error formatting)
+        # Re-raise HTTPExceptions from fetch_service (they already have proper error formatting)
         raise
     except Exception as e:
         logger.error(f"Unexpected error in proxy_profile_posts: {str(e)}")
@@ -45,6 +95,7 @@ async def proxy_profile_posts(
 # === Hashtag posts ===
 @router.get("/hashtag/posts")
 async def proxy_hashtag_posts(
+    request: Request,
     hashtag: str = Query(...),
     n_posts: int = Query(5),
     user=Depends(get_jwt_user)
@@ -52,12 +103,11 @@ async def proxy_hashtag_posts(
     logger.info(f"Hashtag posts request - User: {user.get('email', 'unknown')}, Hashtag: {hashtag}, Posts: {n_posts}")
     
     try:
-        return await call_service(
-            "get",
-            f"{SCRAPER_SERVICE_URL}/scraper/hashtag/posts",
-            params={"hashtag": hashtag, "n_posts": n_posts},
-            service_name="scraper", 
-            timeout=120 # Increase to 2 minutes for scraping operations
+        return await _cached_scraper_get(
+            request,
+            "/scraper/hashtag/posts",
+            {"hashtag": hashtag.strip().lstrip("#"), "n_posts": n_posts},
+            ttl=HASHTAG_POSTS_CACHE_TTL
         )
     except HTTPException as e:
         raise e
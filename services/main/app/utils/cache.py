@@ -0,0 +1,146 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Optional, Set, Tuple
+
+from app.config import RESPONSE_CACHE_MAX_ENTRIES, RESPONSE_CACHE_MAX_BYTES, RESPONSE_CACHE_STALE_TTL
+from app.utils.proxy import BufferedResponse
+
+logger = logging.getLogger(__name__)
+
+# Values for the X-Cache response header
+HIT = "HIT"
+STALE = "STALE"
+MISS = "MISS"
+BYPASS = "BYPASS"
+
+
+class _Entry:
+    __slots__ = ("response", "fresh_until", "stale_until", "size")
+
+    def __init__(self, response: BufferedResponse, ttl: float, stale_ttl: float):
+        now = time.monotonic()
+        self.response = response
+        self.fresh_until = now + ttl
+        self.stale_until = self.fresh_until + stale_ttl
+        self.size = len(response.body)
+
+
+class ResponseCache:
+    """
+    In-memory LRU cache of buffered upstream responses with per-call TTLs.
+
+    Entries are bounded by count and total body bytes. Past its TTL an entry is still
+    served (marked STALE) for `stale_ttl` seconds while one background task
+    refreshes it. `Cache-Control: no-cache` from the client skips the lookup and
+    refreshes the entry; `no-store` additionally keeps the response out of the cache.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = RESPONSE_CACHE_MAX_ENTRIES,
+        max_bytes: int = RESPONSE_CACHE_MAX_BYTES,
+        stale_ttl: float = RESPONSE_CACHE_STALE_TTL,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.stale_ttl = stale_ttl
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._bytes = 0
+        self._refreshing: Set[str] = set()
+        self._tasks: Set[asyncio.Task] = set()
+        self.counters = {"hits": 0, "stale_hits": 0, "misses": 0, "bypasses": 0, "refreshes": 0, "evictions": 0}
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry.size
+
+    def _store(self, key: str, response: BufferedResponse, ttl: float):
+        entry = _Entry(response, ttl, self.stale_ttl)
+        if entry.size > self.max_bytes:
+            return
+        self._remove(key)
+        self._entries[key] = entry
+        self._bytes += entry.size
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted.size
+            self.counters["evictions"] += 1
+
+    async def _fetch_and_store(self, key, fetch, ttl, cacheable, store=True) -> BufferedResponse:
+        response = await fetch()
+        if store and cacheable(response):
+            self._store(key, response, ttl)
+        return response
+
+    def _refresh_in_background(self, key, fetch, ttl, cacheable):
+        if key in self._refreshing:
+            return
+        self._refreshing.add(key)
+        self.counters["refreshes"] += 1
+
+        async def refresh():
+            try:
+                await self._fetch_and_store(key, fetch, ttl, cacheable)
+            except Exception as e:
+                logger.warning(f"Background refresh failed for {key}: {e!r}")
+            finally:
+                self._refreshing.discard(key)
+
+        task = asyncio.create_task(refresh())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def get_or_fetch(
+        self,
+        key: str,
+        fetch: Callable[[], Awaitable[BufferedResponse]],
+        ttl: float,
+        cache_control: Optional[str] = None,
+        cacheable: Callable[[BufferedResponse], bool] = lambda r: r.status_code == 200,
+    ) -> Tuple[BufferedResponse, str]:
+        """Return (response, cache status) for `key`, calling `fetch` on a miss"""
+        directives = {d.strip().lower() for d in (cache_control or "").split(",")}
+        if "no-cache" in directives or "no-store" in directives:
+            self.counters["bypasses"] += 1
+            store = "no-store" not in directives
+            return await self._fetch_and_store(key, fetch, ttl, cacheable, store=store), BYPASS
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            now = time.monotonic()
+            if now < entry.fresh_until:
+                self._entries.move_to_end(key)
+                self.counters["hits"] += 1
+                return entry.response, HIT
+            if now < entry.stale_until:
+                self._entries.move_to_end(key)
+                self.counters["stale_hits"] += 1
+                self._refresh_in_background(key, fetch, ttl, cacheable)
+                return entry.response, STALE
+            self._remove(key)
+
+        self.counters["misses"] += 1
+        return await self._fetch_and_store(key, fetch, ttl, cacheable), MISS
+
+    async def close(self):
+        """Cancel any background refreshes still running"""
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.counters["hits"] + self.counters["stale_hits"] + self.counters["misses"]
+        return {
+            **self.counters,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "hit_ratio": round((self.counters["hits"] + self.counters["stale_hits"]) / lookups, 4) if lookups else 0.0,
+        }
+
+
+# Shared cache for slow-changing upstream GETs (see routes/scraper.py)
+response_cache = ResponseCache()
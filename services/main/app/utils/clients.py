@@ -0,0 +1,109 @@
+import asyncio
+import logging
+from typing import Dict, Optional
+
+import httpx
+
+from app.config import (
+    AUTH_SERVICE_URL,
+    POSTGEN_SERVICE_URL,
+    SCRAPER_SERVICE_URL,
+    UPSTREAM_MAX_CONNECTIONS,
+    UPSTREAM_MAX_KEEPALIVE_CONNECTIONS,
+    UPSTREAM_KEEPALIVE_EXPIRY,
+    UPSTREAM_HTTP2,
+    UPSTREAM_PREWARM_CONNECTIONS,
+    UPSTREAM_MAX_STREAMS,
+)
+
+logger = logging.getLogger(__name__)
+
+# Upstreams known at startup; anything else gets a client lazily on first use
+SERVICE_URLS = {
+    "auth": AUTH_SERVICE_URL,
+    "postgen": POSTGEN_SERVICE_URL,
+    "scraper": SCRAPER_SERVICE_URL,
+}
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+class UpstreamClients:
+    """Registry of long-lived, pooled httpx clients - one per upstream service"""
+
+    def __init__(
+        self,
+        max_connections: int = UPSTREAM_MAX_CONNECTIONS,
+        max_keepalive_connections: int = UPSTREAM_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry: float = UPSTREAM_KEEPALIVE_EXPIRY,
+        http2: bool = UPSTREAM_HTTP2,
+    ):
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        if http2 and not _http2_available():
+            logger.warning("UPSTREAM_HTTP2 is set but the 'h2' package is not installed - falling back to HTTP/1.1")
+            http2 = False
+        self.http2 = http2
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+
+    def _create_client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(limits=self.limits, http2=self.http2)
+
+    def get(self, service_name: str) -> httpx.AsyncClient:
+        """Return the pooled client for a service, creating it on first use"""
+        client = self._clients.get(service_name)
+        if client is None or client.is_closed:
+            client = self._create_client()
+            self._clients[service_name] = client
+        return client
+
+    async def _prewarm(self, service_name: str, base_url: str, connections: int):
+        client = self.get(service_name)
+        # Concurrent requests force the pool to open `connections` sockets,
+        # which then stay in keep-alive for the first real calls
+        results = await asyncio.gather(
+            *(client.get(f"{base_url}/", timeout=2) for _ in range(connections)),
+            return_exceptions=True,
+        )
+        failures = [r for r in results if isinstance(r, Exception)]
+        if failures:
+            logger.warning(f"[{service_name.upper()}] Pre-warm failed for {len(failures)}/{connections} connections: {failures[0]!r}")
+        else:
+            logger.info(f"[{service_name.upper()}] Pre-warmed {connections} connections")
+
+    async def startup(self, service_urls: Optional[Dict[str, str]] = None, prewarm: int = UPSTREAM_PREWARM_CONNECTIONS):
+        """Create clients for all known upstreams and optionally open connections ahead of traffic"""
+        service_urls = service_urls if service_urls is not None else SERVICE_URLS
+        for service_name in service_urls:
+            self.get(service_name)
+        if prewarm > 0:
+            await asyncio.gather(
+                *(self._prewarm(name, url.rstrip("/"), prewarm) for name, url in service_urls.items())
+            )
+
+    async def close(self):
+        """Close every pooled client; safe to call more than once"""
+        clients, self._clients = self._clients, {}
+        await asyncio.gather(*(client.aclose() for client in clients.values()), return_exceptions=True)
+        logger.info(f"Closed {len(clients)} upstream clients")
+
+
+# Global registry, started and closed by the app lifecycle hooks in main.py
+upstream_clients = UpstreamClients()
+
+# Separate pools for long-lived streams (SSE relays): a stream pins its connection for
+# minutes, so sharing the pool above would let a few of them starve every other call.
+# One connection per allowed stream - proxy.stream_service caps them at UPSTREAM_MAX_STREAMS.
+stream_clients = UpstreamClients(
+    max_connections=UPSTREAM_MAX_STREAMS,
+    max_keepalive_connections=min(UPSTREAM_MAX_KEEPALIVE_CONNECTIONS, UPSTREAM_MAX_STREAMS),
+)
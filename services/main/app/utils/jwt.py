@@ -1,26 +1,89 @@
+import hashlib
 import logging
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
 from jose import JWTError, jwt
-from app.config import JWT_SECRET, JWT_ALGORITHM
+from app.config import JWT_SECRET, JWT_ALGORITHM, JWT_CACHE_MAX_ENTRIES, JWT_CACHE_MAX_TTL
 from fastapi import HTTPException, status, Request
 
 logger = logging.getLogger(__name__)
 
+
+class VerifiedClaimsCache:
+    """
+    Bounded LRU of already-verified JWT payloads, keyed by a SHA-256 of the token.
+
+    An entry lives until the token's own `exp` (capped at `max_ttl` seconds, which
+    also applies to tokens without `exp`) and is dropped on the first lookup at or
+    after that moment, so claims are never served for an expired token.
+    """
+
+    def __init__(self, max_entries: int = JWT_CACHE_MAX_ENTRIES, max_ttl: float = JWT_CACHE_MAX_TTL):
+        self.max_entries = max_entries
+        self.max_ttl = max_ttl
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        key = self._key(token)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        payload, expires_at = entry
+        if time.time() >= expires_at:
+            del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return payload
+
+    def put(self, token: str, payload: Dict[str, Any]):
+        expires_at = time.time() + self.max_ttl
+        exp = payload.get("exp")
+        if isinstance(exp, (int, float)):
+            expires_at = min(expires_at, float(exp))
+        key = self._key(token)
+        self._entries[key] = (payload, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+claims_cache = VerifiedClaimsCache()
+
+
 def decode_jwt_token(token: str):
+    cached = claims_cache.get(token)
+    if cached is not None:
+        return dict(cached)  # copy so callers can't mutate the cached claims
     try:
-        logger.info("Attempting to decode JWT token")
         payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
-        logger.info(f"JWT decoded successfully for user: {payload.get('email', 'unknown')}")
-        return payload
+        logger.debug(f"JWT decoded successfully for user: {payload.get('email', 'unknown')}")
     except JWTError as e:
         logger.error(f"JWT decode error: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, 
             detail="Invalid or expired token."
         )
+    claims_cache.put(token, dict(payload))
+    return payload
 
 def get_jwt_user(request: Request):
     auth_header = request.headers.get("Authorization")
-    logger.info(f"Authorization header: {auth_header}")
     
     if not auth_header or not auth_header.startswith("Bearer "):
         logger.error("Missing or malformed Authorization header")
@@ -30,7 +93,6 @@ def get_jwt_user(request: Request):
         )
     
     token = auth_header.split(" ")[1]
-    logger.info(f"Extracted token: {token[:20]}...")  # Log first 20 chars for debugging
     
     payload = decode_jwt_token(token)
-    return payload  # can return user_id/email, etc
\ No newline at end of file
+    return payload  # can return user_id/email, etc
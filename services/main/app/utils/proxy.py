@@ -1,110 +1,320 @@
 import httpx
+import json as json_module
 import logging
-from fastapi import HTTPException
+from dataclasses import dataclass
+from typing import Dict
+from fastapi import HTTPException, Request
+from fastapi.responses import Response, StreamingResponse
+from starlette.background import BackgroundTask
+from app.utils.clients import upstream_clients, stream_clients
+from app.utils.resilience import upstream_guards, stream_slots, UpstreamRejected
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
+# Connection-scoped headers that must not be forwarded by a proxy (RFC 9110 §7.6.1)
+HOP_BY_HOP_HEADERS = {
+    "connection",
+    "keep-alive",
+    "proxy-authenticate",
+    "proxy-authorization",
+    "te",
+    "trailer",
+    "trailers",
+    "transfer-encoding",
+    "upgrade",
+}
+
+
+def _error_exception(status_code, code, message, service_name, url, headers=None):
+    """Build an HTTPException carrying the gateway's standard error envelope"""
+    return HTTPException(
+        status_code=status_code,
+        headers=headers,
+        detail={
+            "error": {
+                "code": code,
+                "message": message,
+                "status": status_code,
+                "service": service_name,
+                "url": url
+            }
+        }
+    )
+
+
+def _upstream_error(resp, service_name, url):
+    """Map an upstream error response onto the gateway error envelope"""
+    logger.error(f"[{service_name.upper()}] Error response body: {resp.text}")
+
+    # Try to parse error body, fallback to plain text
+    try:
+        detail = resp.json()
+    except Exception:
+        detail = {"message": resp.text}
+    if not isinstance(detail, dict):
+        detail = {"message": str(detail)}
+
+    # Keep the upstream's backpressure hint (e.g. postgen's 503 on a full job queue)
+    retry_after = resp.headers.get("retry-after")
+    return _error_exception(
+        resp.status_code,
+        detail.get("code", "UNKNOWN_ERROR"),
+        detail.get("message") or detail.get("detail") or "Unexpected error",
+        service_name,
+        url,
+        headers={"Retry-After": retry_after} if retry_after else None
+    )
+
+
+def _transport_error(exc, service_name, url):
+    """Map an httpx / unexpected exception onto the gateway error envelope"""
+    if isinstance(exc, httpx.PoolTimeout):
+        # Every pooled connection is busy - the gateway is saturated, the upstream may be fine
+        logger.error(f"[{service_name.upper()}] No free pooled connection for {url}")
+        return _error_exception(
+            503, "GATEWAY_SATURATED", f"No free connection to {service_name} service, try again shortly",
+            service_name, url, headers={"Retry-After": "1"}
+        )
+    if isinstance(exc, httpx.TimeoutException):
+        logger.error(f"[{service_name.upper()}] Timeout error for {url}")
+        return _error_exception(504, "TIMEOUT_ERROR", f"Request to {service_name} service timed out", service_name, url)
+    if isinstance(exc, httpx.ConnectError):
+        logger.error(f"[{service_name.upper()}] Connection error for {url}")
+        return _error_exception(503, "CONNECTION_ERROR", f"Could not connect to {service_name} service", service_name, url)
+    logger.error(f"[{service_name.upper()}] Unexpected error: {str(exc)}")
+    return _error_exception(
+        500, "PROXY_ERROR", f"Proxy error while calling {service_name} service: {str(exc)}", service_name, url
+    )
+
+
+def _upstream_health(resp):
+    """
+    What an upstream response says about the upstream's health: False for faults (5xx),
+    None for deliberate backpressure (429, or 503 with Retry-After - e.g. postgen's full
+    job queue), True otherwise. Backpressure must not trip the breaker or shrink the limit.
+    """
+    if resp.status_code == 429 or (resp.status_code == 503 and "retry-after" in resp.headers):
+        return None
+    return resp.status_code < 500
+
+
+def _transport_health(exc):
+    """False for transport faults; None for pool exhaustion, which is local to the gateway"""
+    return None if isinstance(exc, httpx.PoolTimeout) else False
+
+
+def _acquire_guard(service_name, url):
+    """Take a slot from the service's breaker/limiter (returns guard + admission) or fail fast with a 503 envelope"""
+    guard = upstream_guards.get(service_name)
+    try:
+        admission = guard.acquire()
+    except UpstreamRejected as e:
+        logger.warning(f"[{service_name.upper()}] Shedding request to {url}: {e.message}")
+        raise _error_exception(503, e.code, e.message, service_name, url)
+    return guard, admission
+
+
+def _forwardable_headers(headers):
+    """Drop hop-by-hop headers and Host before relaying headers to the other side"""
+    return {
+        key: value for key, value in headers.items()
+        if key.lower() not in HOP_BY_HOP_HEADERS and key.lower() != "host"
+    }
+
+
 async def call_service(method, url, headers=None, params=None, json=None, timeout=10, service_name="unknown"):
-    # Log the outgoing request
+    # Log the outgoing request (headers and bodies only at DEBUG - they carry tokens and user content)
     logger.info(f"[{service_name.upper()}] Making {method.upper()} request to: {url}")
-    logger.info(f"[{service_name.upper()}] Headers: {headers}")
-    logger.info(f"[{service_name.upper()}] Params: {params}")
+    logger.debug(f"[{service_name.upper()}] Headers: {headers}")
+    logger.debug(f"[{service_name.upper()}] Params: {params}")
     if json:
-        logger.info(f"[{service_name.upper()}] JSON Body: {json}")
-    
+        logger.debug(f"[{service_name.upper()}] JSON Body: {json}")
+
+    guard, admission = _acquire_guard(service_name, url)
+    upstream_ok = None  # stays None if the caller is cancelled mid-flight
     try:
-        async with httpx.AsyncClient(timeout=timeout) as client:
-            req = getattr(client, method.lower())
-            
-            # Prepare request arguments based on method
-            req_kwargs = {
-                "url": url,
-                "headers": headers,
-                "params": params
-            }
-            
-            # Only add json body for methods that support it
-            if method.upper() in ["POST", "PUT", "PATCH", "DELETE"] and json is not None:
-                req_kwargs["json"] = json
-            elif json is not None and method.upper() == "GET":
-                logger.warning(f"[{service_name.upper()}] Ignoring JSON body for GET request")
-            
-            logger.info(f"[{service_name.upper()}] Request kwargs: {req_kwargs}")
-            
-            # Make the request
-            resp = await req(**req_kwargs)
-            
-            # Log response details
-            logger.info(f"[{service_name.upper()}] Response status: {resp.status_code}")
-            logger.info(f"[{service_name.upper()}] Response headers: {dict(resp.headers)}")
-            
-            if resp.is_error:
-                logger.error(f"[{service_name.upper()}] Error response body: {resp.text}")
-                
-                # Try to parse error body, fallback to plain text
-                try:
-                    detail = resp.json()
-                except Exception:
-                    detail = {"message": resp.text}
-                
-                raise HTTPException(
-                    status_code=resp.status_code,
-                    detail={
-                        "error": {
-                            "code": detail.get("code", "UNKNOWN_ERROR"),
-                            "message": detail.get("message") or detail.get("detail") or "Unexpected error",
-                            "status": resp.status_code,
-                            "service": service_name,
-                            "url": url
-                        }
-                    }
-                )
-            
-            # Log successful response
-            response_data = resp.json()
-            logger.info(f"[{service_name.upper()}] Success response: {response_data}")
-            return response_data
-            
-    except httpx.TimeoutException:
-        logger.error(f"[{service_name.upper()}] Timeout error for {url}")
-        raise HTTPException(
-            status_code=504,
-            detail={
-                "error": {
-                    "code": "TIMEOUT_ERROR",
-                    "message": f"Request to {service_name} service timed out",
-                    "status": 504,
-                    "service": service_name,
-                    "url": url
-                }
-            }
+        # Reuse the pooled, keep-alive client for this upstream (see utils/clients.py)
+        client = upstream_clients.get(service_name)
+        req = getattr(client, method.lower())
+
+        # Prepare request arguments based on method
+        req_kwargs = {
+            "url": url,
+            "headers": headers,
+            "params": params,
+            "timeout": timeout
+        }
+
+        # Only add json body for methods that support it
+        if method.upper() in ["POST", "PUT", "PATCH", "DELETE"] and json is not None:
+            req_kwargs["json"] = json
+        elif json is not None and method.upper() == "GET":
+            logger.warning(f"[{service_name.upper()}] Ignoring JSON body for GET request")
+
+        # Make the request
+        resp = await req(**req_kwargs)
+        # Only transport failures and 5xx faults count against the upstream's health
+        upstream_ok = _upstream_health(resp)
+
+        # Log response details
+        logger.info(f"[{service_name.upper()}] Response status: {resp.status_code}")
+        logger.debug(f"[{service_name.upper()}] Response headers: {dict(resp.headers)}")
+
+        if resp.is_error:
+            raise _upstream_error(resp, service_name, url)
+
+        # Log successful response
+        response_data = resp.json()
+        logger.debug(f"[{service_name.upper()}] Success response: {response_data}")
+        return response_data
+
+    except HTTPException:
+        # Upstream error already mapped to the gateway error envelope above
+        raise
+    except Exception as e:
+        if upstream_ok is None:
+            upstream_ok = _transport_health(e)
+        raise _transport_error(e, service_name, url)
+    finally:
+        guard.release(admission, upstream_ok)
+
+
+async def _open_upstream_stream(method, url, headers, params, content, timeout, service_name, long_lived=False):
+    """Send a request through the guard and return the streaming upstream response (2xx/3xx only)"""
+    # The slot is held until upstream response headers arrive, which for these
+    # services is where nearly all of the latency is spent
+    guard, admission = _acquire_guard(service_name, url)
+    try:
+        client = (stream_clients if long_lived else upstream_clients).get(service_name)
+        upstream_request = client.build_request(
+            method.upper(), url, headers=headers, params=params, content=content, timeout=timeout
         )
-    except httpx.ConnectError:
-        logger.error(f"[{service_name.upper()}] Connection error for {url}")
-        raise HTTPException(
-            status_code=503,
-            detail={
-                "error": {
-                    "code": "CONNECTION_ERROR",
-                    "message": f"Could not connect to {service_name} service",
-                    "status": 503,
-                    "service": service_name,
-                    "url": url
-                }
-            }
+        resp = await client.send(upstream_request, stream=True)
+    except Exception as e:
+        guard.release(admission, _transport_health(e))
+        raise _transport_error(e, service_name, url)
+    except BaseException:
+        guard.release(admission, None)
+        raise
+    guard.release(admission, _upstream_health(resp))
+
+    logger.info(f"[{service_name.upper()}] Response status: {resp.status_code}")
+
+    if resp.is_error:
+        try:
+            await resp.aread()
+        except Exception as e:
+            raise _transport_error(e, service_name, url)
+        finally:
+            await resp.aclose()
+        raise _upstream_error(resp, service_name, url)
+    return resp
+
+
+async def _relay(resp, close):
+    """Yield the raw upstream bytes; `close` runs however the relay ends (incl. client disconnect)"""
+    try:
+        async for chunk in resp.aiter_raw():
+            yield chunk
+    finally:
+        await close()
+
+
+async def stream_service(method, url, request: Request = None, headers=None, params=None, json=None, timeout=10, service_name="unknown", long_lived=False):
+    """
+    Passthrough proxy: stream the raw client body upstream and the raw upstream bytes back.
+
+    Nothing is JSON-decoded or re-encoded; status code and end-to-end headers are preserved.
+    Upstream errors (>= 400) are buffered and mapped to the usual {"error": {...}} envelope.
+    If `request` is given its body is streamed upstream and, unless `headers` is passed,
+    its headers are forwarded too. Routes that must rewrite the body pass `json` instead;
+    the response is still streamed back unbuffered (e.g. SSE).
+
+    `long_lived` responses (SSE relays) run on the service's separate stream pool and
+    count against UPSTREAM_MAX_STREAMS until they end; past the cap they get a 503.
+    """
+    logger.info(f"[{service_name.upper()}] Streaming {method.upper()} request to: {url}")
+
+    if long_lived and not stream_slots.try_acquire(service_name):
+        logger.warning(f"[{service_name.upper()}] Shedding stream to {url}: too many open streams")
+        raise _error_exception(
+            503, "TOO_MANY_STREAMS", f"Too many open streams to {service_name} service",
+            service_name, url, headers={"Retry-After": "5"}
         )
+
+    if headers is None and request is not None:
+        headers = _forwardable_headers(request.headers)
+    content = None
+    if json is not None:
+        content = json_module.dumps(json).encode()
+        headers = {
+            **{k: v for k, v in (headers or {}).items() if k.lower() not in ("content-length", "content-type")},
+            "content-type": "application/json"
+        }
+    elif request is not None and method.upper() in ["POST", "PUT", "PATCH", "DELETE"]:
+        content = request.stream()
+
+    try:
+        resp = await _open_upstream_stream(method, url, headers, params, content, timeout, service_name, long_lived)
+    except BaseException:
+        if long_lived:
+            stream_slots.release(service_name)
+        raise
+
+    closed = False
+
+    async def close():
+        nonlocal closed
+        if closed:
+            return
+        closed = True
+        try:
+            await resp.aclose()
+        finally:
+            if long_lived:
+                stream_slots.release(service_name)
+
+    # aiter_raw() yields the bytes exactly as received, so Content-Encoding /
+    # Content-Length from upstream stay valid and are passed through untouched
+    return StreamingResponse(
+        _relay(resp, close),
+        status_code=resp.status_code,
+        headers=_forwardable_headers(resp.headers),
+        background=BackgroundTask(close)
+    )
+
+
+@dataclass
+class BufferedResponse:
+    """Raw upstream response held in memory so it can be replayed to several clients"""
+    status_code: int
+    headers: Dict[str, str]
+    body: bytes
+
+    def to_response(self) -> Response:
+        return Response(content=self.body, status_code=self.status_code, headers=self.headers)
+
+
+async def fetch_service(method, url, headers=None, params=None, timeout=10, service_name="unknown") -> BufferedResponse:
+    """
+    Like stream_service, but reads the whole body into memory (bytes, never JSON-decoded).
+
+    Used where one upstream response is shared between callers, e.g. coalesced lookups.
+    """
+    logger.info(f"[{service_name.upper()}] Fetching {method.upper()} request to: {url}")
+
+    resp = await _open_upstream_stream(method, url, headers, params, None, timeout, service_name)
+    try:
+        body = await resp.aread()
     except Exception as e:
-        logger.error(f"[{service_name.upper()}] Unexpected error: {str(e)}")
-        raise HTTPException(
-            status_code=500,
-            detail={
-                "error": {
-                    "code": "PROXY_ERROR",
-                    "message": f"Proxy error while calling {service_name} service: {str(e)}",
-                    "status": 500,
-                    "service": service_name,
-                    "url": url
-                }
-            }
-        )
\ No newline at end of file
+        raise _transport_error(e, service_name, url)
+    finally:
+        await resp.aclose()
+
+    # aread() undoes any Content-Encoding, so let Response recompute the length
+    headers = {
+        key: value for key, value in _forwardable_headers(resp.headers).items()
+        if key.lower() not in ("content-encoding", "content-length")
+    }
+    return BufferedResponse(resp.status_code, headers, body)
@@ -0,0 +1,255 @@
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+from app.config import (
+    CIRCUIT_FAILURE_THRESHOLD,
+    CIRCUIT_RESET_TIMEOUT,
+    CIRCUIT_HALF_OPEN_MAX_CALLS,
+    UPSTREAM_LIMIT_INITIAL,
+    UPSTREAM_LIMIT_MIN,
+    UPSTREAM_LIMIT_MAX,
+    UPSTREAM_LIMIT_BACKOFF_RATIO,
+    UPSTREAM_MAX_STREAMS,
+)
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class UpstreamRejected(Exception):
+    """Raised when a call is shed before reaching the upstream (breaker open or limit reached)"""
+
+    def __init__(self, code: str, message: str):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+
+@dataclass(frozen=True)
+class Admission:
+    """
+    A call let through by CircuitBreaker.allow(), handed back to record() with its result.
+    `probe` marks the half-open trial calls, admitted during half-open round `half_open_round`.
+    """
+    probe: bool = False
+    half_open_round: int = 0
+
+
+class CircuitBreaker:
+    """
+    Classic three-state breaker.
+
+    closed    -> calls flow; `failure_threshold` consecutive failures open the circuit
+    open      -> calls are rejected until `reset_timeout` seconds have passed
+    half_open -> up to `half_open_max_calls` probes; a success closes, a failure re-opens
+
+    Only probes decide the half-open state: a call admitted while closed that finishes
+    after the circuit has moved on can't close (or re-open) it.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+        reset_timeout: float = CIRCUIT_RESET_TIMEOUT,
+        half_open_max_calls: int = CIRCUIT_HALF_OPEN_MAX_CALLS,
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.half_open_in_flight = 0
+        self.half_open_round = 0
+
+    def allow(self) -> Optional[Admission]:
+        """Admit one call, or return None to reject it"""
+        if self.state == OPEN:
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                return None
+            self.state = HALF_OPEN
+            self.half_open_in_flight = 0
+            self.half_open_round += 1
+        if self.state == HALF_OPEN:
+            if self.half_open_in_flight >= self.half_open_max_calls:
+                return None
+            self.half_open_in_flight += 1
+            return Admission(probe=True, half_open_round=self.half_open_round)
+        return Admission()
+
+    def _open(self):
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+
+    def record(self, admission: Admission, success: Optional[bool]):
+        """`success` is None when the call says nothing about upstream health (abandoned, backpressure)"""
+        if admission.probe:
+            if self.state != HALF_OPEN or admission.half_open_round != self.half_open_round:
+                return  # probe of an earlier half-open round - that round is already decided
+            self.half_open_in_flight = max(0, self.half_open_in_flight - 1)
+            if success is None:
+                return
+            if success:
+                self.consecutive_failures = 0
+                self.state = CLOSED
+            else:
+                self.consecutive_failures += 1
+                self._open()
+            return
+
+        # Ordinary call admitted while closed
+        if success is None:
+            return
+        if success:
+            if self.state == CLOSED:
+                self.consecutive_failures = 0
+            return
+        self.consecutive_failures += 1
+        if self.state == CLOSED and self.consecutive_failures >= self.failure_threshold:
+            self._open()
+
+    def snapshot(self) -> Dict[str, Any]:
+        data = {"state": self.state, "consecutive_failures": self.consecutive_failures}
+        if self.state == OPEN:
+            data["retry_in_seconds"] = round(max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at)), 2)
+        return data
+
+
+class AIMDLimiter:
+    """
+    Additive-increase / multiplicative-decrease concurrency limit.
+
+    Successful calls grow the limit by one, but only while the limit is actually
+    being used (in-flight >= half the limit); failures multiply it by `backoff_ratio`.
+    Calls over the limit are rejected immediately instead of queueing.
+    """
+
+    def __init__(
+        self,
+        initial_limit: int = UPSTREAM_LIMIT_INITIAL,
+        min_limit: int = UPSTREAM_LIMIT_MIN,
+        max_limit: int = UPSTREAM_LIMIT_MAX,
+        backoff_ratio: float = UPSTREAM_LIMIT_BACKOFF_RATIO,
+    ):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff_ratio = backoff_ratio
+        self.limit = float(min(max(initial_limit, min_limit), max_limit))
+        self.in_flight = 0
+
+    def try_acquire(self) -> bool:
+        if self.in_flight >= int(self.limit):
+            return False
+        self.in_flight += 1
+        return True
+
+    def release(self, success: Optional[bool]):
+        in_flight = self.in_flight
+        self.in_flight = max(0, self.in_flight - 1)
+        if success is None:
+            return
+        if not success:
+            self.limit = max(self.min_limit, self.limit * self.backoff_ratio)
+        elif in_flight * 2 >= self.limit:
+            self.limit = min(self.max_limit, self.limit + 1)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"limit": int(self.limit), "in_flight": self.in_flight}
+
+
+class UpstreamGuard:
+    """Circuit breaker + adaptive limiter for a single upstream service"""
+
+    def __init__(self, service_name: str):
+        self.service_name = service_name
+        self.breaker = CircuitBreaker()
+        self.limiter = AIMDLimiter()
+        self.rejected = 0
+
+    def acquire(self) -> Admission:
+        """Reserve a slot for one call or raise UpstreamRejected without waiting; pass the result to release()"""
+        admission = self.breaker.allow()
+        if admission is None:
+            self.rejected += 1
+            raise UpstreamRejected("CIRCUIT_OPEN", f"{self.service_name} service is unavailable (circuit open)")
+        if not self.limiter.try_acquire():
+            # Give back a probe slot we are not going to use
+            self.breaker.record(admission, None)
+            self.rejected += 1
+            raise UpstreamRejected("UPSTREAM_OVERLOADED", f"{self.service_name} service is at its concurrency limit")
+        return admission
+
+    def release(self, admission: Admission, success: Optional[bool]):
+        """
+        Return the slot taken by acquire(). `success` is False for transport errors and 5xx responses,
+        None when the call was abandoned before the upstream answered or the upstream
+        pushed back (429 / 503 with Retry-After).
+        """
+        previous_state = self.breaker.state
+        self.limiter.release(success)
+        self.breaker.record(admission, success)
+        if self.breaker.state != previous_state:
+            logger.warning(f"[{self.service_name.upper()}] Circuit {previous_state} -> {self.breaker.state}")
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "circuit": self.breaker.snapshot(),
+            "concurrency": self.limiter.snapshot(),
+            "rejected": self.rejected,
+        }
+
+
+class UpstreamGuards:
+    """Registry of per-service guards, created lazily on first call"""
+
+    def __init__(self):
+        self._guards: Dict[str, UpstreamGuard] = {}
+
+    def get(self, service_name: str) -> UpstreamGuard:
+        guard = self._guards.get(service_name)
+        if guard is None:
+            guard = self._guards[service_name] = UpstreamGuard(service_name)
+        return guard
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        return {name: guard.snapshot() for name, guard in self._guards.items()}
+
+
+upstream_guards = UpstreamGuards()
+
+
+class StreamSlots:
+    """
+    Per-service cap on concurrently relayed long-lived streams (SSE). Each open stream
+    holds a connection of the service's stream pool until it ends, so past the cap new
+    streams are rejected immediately rather than left waiting for a connection.
+    """
+
+    def __init__(self, max_streams: int = UPSTREAM_MAX_STREAMS):
+        self.max_streams = max_streams
+        self._open: Dict[str, int] = {}
+        self._rejected: Dict[str, int] = {}
+
+    def try_acquire(self, service_name: str) -> bool:
+        if self._open.get(service_name, 0) >= self.max_streams:
+            self._rejected[service_name] = self._rejected.get(service_name, 0) + 1
+            return False
+        self._open[service_name] = self._open.get(service_name, 0) + 1
+        return True
+
+    def release(self, service_name: str):
+        self._open[service_name] = max(0, self._open.get(service_name, 0) - 1)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            name: {"open": count, "max": self.max_streams, "rejected": self._rejected.get(name, 0)}
+            for name, count in self._open.items()
+        }
+
+
+stream_slots = StreamSlots()
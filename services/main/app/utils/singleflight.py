@@ -0,0 +1,82 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Mapping
+from urllib.parse import urlencode
+
+from app.config import SINGLEFLIGHT_MAX_KEYS
+
+logger = logging.getLogger(__name__)
+
+
+def request_key(path: str, params: Mapping[str, Any]) -> str:
+    """Coalescing key: path plus query params sorted by name, with None values dropped"""
+    normalized = sorted((str(k), str(v).strip()) for k, v in params.items() if v is not None)
+    return f"{path}?{urlencode(normalized)}"
+
+
+class _Call:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Coalesce identical concurrent calls: the first caller for a key starts the
+    work, later callers for the same key wait on the same task and get its result
+    (or exception).
+
+    Each waiter awaits the shared task through asyncio.shield, so a waiter that
+    disconnects only cancels itself; the upstream call is cancelled once the last
+    waiter is gone. At most `max_keys` calls are tracked - beyond that callers
+    simply run uncoalesced, so memory stays bounded under a flood of distinct keys.
+    """
+
+    def __init__(self, max_keys: int = SINGLEFLIGHT_MAX_KEYS):
+        self.max_keys = max_keys
+        self._calls: Dict[str, _Call] = {}
+        self.leaders = 0
+        self.coalesced = 0
+        self.bypassed = 0
+
+    def _forget(self, key: str, call: _Call):
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        call = self._calls.get(key)
+        if call is None:
+            if len(self._calls) >= self.max_keys:
+                self.bypassed += 1
+                return await fn()
+            call = _Call(asyncio.ensure_future(fn()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda _task: self._forget(key, call))
+            self.leaders += 1
+        else:
+            self.coalesced += 1
+            logger.debug(f"Coalesced request onto in-flight call: {key}")
+
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                # Nobody is left to receive the result - stop the upstream work
+                call.task.cancel()
+                self._forget(key, call)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "in_flight": len(self._calls),
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+            "bypassed": self.bypassed,
+        }
+
+
+# Shared by the gateway's idempotent GET proxies (see routes/scraper.py)
+request_coalescer = SingleFlight()
@@ -0,0 +1,127 @@
+"""
+Benchmark: per-call httpx clients vs the pooled upstream clients used by call_service.
+
+Starts a tiny keep-alive HTTP server on localhost and fires N concurrent requests
+through both strategies, reporting throughput, latency percentiles and how many
+TCP connections the server had to accept.
+
+Bigger is not always better for --pool-size: httpcore scans every pooled
+connection when scheduling a request, so on small CPUs a pool of ~20 keep-alive
+connections outperforms one sized to the full concurrency.
+
+Run from services/main:
+    python -m benchmarks.bench_upstream_pool --requests 1000 --concurrency 100
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+from app.config import UPSTREAM_MAX_KEEPALIVE_CONNECTIONS
+from app.utils.clients import UpstreamClients
+
+BODY = b'{"msg": "ok"}'
+RESPONSE = (
+    b"HTTP/1.1 200 OK\r\n"
+    b"Content-Type: application/json\r\n"
+    b"Content-Length: " + str(len(BODY)).encode() + b"\r\n"
+    b"Connection: keep-alive\r\n\r\n" + BODY
+)
+
+
+class KeepAliveServer:
+    def __init__(self):
+        self.accepted = 0
+        self.server = None
+
+    async def handle(self, reader, writer):
+        self.accepted += 1
+        try:
+            while True:
+                # Requests from the benchmark never carry a body - read up to the blank line
+                head = await reader.readuntil(b"\r\n\r\n")
+                if not head:
+                    break
+                writer.write(RESPONSE)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionResetError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self) -> str:
+        self.server = await asyncio.start_server(self.handle, "127.0.0.1", 0, backlog=4096)
+        port = self.server.sockets[0].getsockname()[1]
+        return f"http://127.0.0.1:{port}/"
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+
+async def per_call(url: str):
+    # What call_service used to do: a brand new client (and connection) per request
+    async with httpx.AsyncClient(timeout=10) as client:
+        resp = await client.get(url)
+        return resp.json()
+
+
+async def run(label: str, send, url: str, total: int, concurrency: int, server: KeepAliveServer):
+    sem = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = 0
+    server.accepted = 0
+
+    async def one():
+        nonlocal errors
+        async with sem:
+            start = time.perf_counter()
+            try:
+                await send(url)
+            except Exception:
+                errors += 1
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    p50 = statistics.median(latencies)
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    print(
+        f"{label:<10} {total / elapsed:>9.0f} req/s   p50 {p50:>7.2f} ms   p99 {p99:>7.2f} ms   "
+        f"connections {server.accepted:>5}   errors {errors}"
+    )
+
+
+async def main(total: int, concurrency: int, pool_size: int):
+    server = KeepAliveServer()
+    url = await server.start()
+
+    print(f"{total} requests, concurrency {concurrency}, pool size {pool_size}")
+    await run("per-call", per_call, url, total, concurrency, server)
+
+    clients = UpstreamClients(max_connections=pool_size, max_keepalive_connections=pool_size)
+    # Pre-warm like the gateway does at startup so the pooled run measures steady state
+    await clients.startup({"bench": url}, prewarm=pool_size)
+    client = clients.get("bench")
+
+    async def pooled(target):
+        resp = await client.get(target, timeout=10)
+        return resp.json()
+
+    await run("pooled", pooled, url, total, concurrency, server)
+    await clients.close()
+    await server.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--pool-size", type=int, default=UPSTREAM_MAX_KEEPALIVE_CONNECTIONS)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.concurrency, args.pool_size))
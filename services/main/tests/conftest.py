@@ -0,0 +1,27 @@
+import httpx
+import pytest
+
+from app.utils import proxy
+from app.utils.clients import UpstreamClients
+from app.utils.resilience import UpstreamGuards
+
+
+@pytest.fixture
+def guards(monkeypatch):
+    """A fresh breaker/limiter registry so tests don't share upstream health"""
+    registry = UpstreamGuards()
+    monkeypatch.setattr(proxy, "upstream_guards", registry)
+    return registry
+
+
+@pytest.fixture
+def mock_upstream(monkeypatch):
+    """Route an upstream service to an in-process handler: mock_upstream("postgen", handler)"""
+    clients = UpstreamClients()
+    monkeypatch.setattr(proxy, "upstream_clients", clients)
+
+    def install(service_name, handler):
+        clients._clients[service_name] = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        return clients
+
+    return install
@@ -0,0 +1,60 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi import HTTPException
+
+from app.utils.proxy import call_service, fetch_service
+from app.utils.resilience import CLOSED
+
+POSTGEN_JOBS = "http://postgen/generate/jobs"
+
+
+def test_queue_full_503_with_retry_after_keeps_circuit_closed(guards, mock_upstream):
+    mock_upstream("postgen", lambda request: httpx.Response(
+        503, json={"detail": "Generation queue is full"}, headers={"Retry-After": "5"}
+    ))
+    guard = guards.get("postgen")
+    initial_limit = guard.limiter.limit
+
+    async def submit():
+        with pytest.raises(HTTPException) as exc_info:
+            await call_service("post", POSTGEN_JOBS, json={"prompt": "hi"}, service_name="postgen")
+        return exc_info.value
+
+    for _ in range(guard.breaker.failure_threshold * 3):
+        error = asyncio.run(submit())
+        assert error.status_code == 503
+        assert error.headers == {"Retry-After": "5"}
+        assert error.detail["error"]["code"] != "CIRCUIT_OPEN"
+
+    assert guard.breaker.state == CLOSED
+    assert guard.breaker.consecutive_failures == 0
+    assert guard.limiter.limit == initial_limit
+    assert guard.limiter.in_flight == 0
+
+
+def test_429_is_backpressure_on_buffered_calls(guards, mock_upstream):
+    mock_upstream("postgen", lambda request: httpx.Response(429, json={"detail": "slow down"}))
+    guard = guards.get("postgen")
+
+    for _ in range(guard.breaker.failure_threshold * 2):
+        with pytest.raises(HTTPException) as exc_info:
+            asyncio.run(fetch_service("get", POSTGEN_JOBS + "/1", service_name="postgen"))
+        assert exc_info.value.status_code == 429
+
+    assert guard.breaker.state == CLOSED
+    assert guard.limiter.in_flight == 0
+
+
+def test_5xx_without_retry_after_still_opens_circuit(guards, mock_upstream):
+    mock_upstream("postgen", lambda request: httpx.Response(503, json={"detail": "down"}))
+    guard = guards.get("postgen")
+
+    for _ in range(guard.breaker.failure_threshold):
+        with pytest.raises(HTTPException):
+            asyncio.run(call_service("get", POSTGEN_JOBS + "/1", service_name="postgen"))
+
+    with pytest.raises(HTTPException) as exc_info:
+        asyncio.run(call_service("get", POSTGEN_JOBS + "/1", service_name="postgen"))
+    assert exc_info.value.detail["error"]["code"] == "CIRCUIT_OPEN"
@@ -0,0 +1,88 @@
+import time
+
+import pytest
+
+from app.utils.resilience import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, UpstreamGuard, UpstreamRejected
+
+
+def _open_breaker(breaker: CircuitBreaker):
+    for _ in range(breaker.failure_threshold):
+        breaker.record(breaker.allow(), False)
+    assert breaker.state == OPEN
+
+
+def _half_open(breaker: CircuitBreaker):
+    breaker.opened_at = time.monotonic() - breaker.reset_timeout
+
+
+def test_late_success_from_closed_call_does_not_close_half_open_circuit():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30, half_open_max_calls=1)
+    straggler = breaker.allow()  # admitted while closed, finishes much later
+    assert not straggler.probe
+    _open_breaker(breaker)
+
+    _half_open(breaker)
+    probe = breaker.allow()
+    assert probe.probe and breaker.state == HALF_OPEN
+
+    breaker.record(straggler, True)
+    assert breaker.state == HALF_OPEN
+    assert breaker.half_open_in_flight == 1
+    assert breaker.allow() is None  # the probe slot is still taken
+
+    breaker.record(probe, True)
+    assert breaker.state == CLOSED
+
+
+def test_late_failure_from_closed_call_does_not_reopen_half_open_circuit():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30, half_open_max_calls=1)
+    straggler = breaker.allow()
+    _open_breaker(breaker)
+    _half_open(breaker)
+    probe = breaker.allow()
+
+    breaker.record(straggler, False)
+    assert breaker.state == HALF_OPEN
+
+    breaker.record(probe, False)
+    assert breaker.state == OPEN
+
+
+def test_probe_from_earlier_round_is_ignored():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30, half_open_max_calls=2)
+    _open_breaker(breaker)
+    _half_open(breaker)
+    slow_probe = breaker.allow()
+    breaker.record(breaker.allow(), False)  # the other probe fails and re-opens the circuit
+    assert breaker.state == OPEN
+
+    _half_open(breaker)
+    probe = breaker.allow()
+    breaker.record(slow_probe, True)
+    assert breaker.state == HALF_OPEN
+    assert breaker.half_open_in_flight == 1
+
+    breaker.record(probe, True)
+    assert breaker.state == CLOSED
+
+
+def test_abandoned_probe_frees_its_slot():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30, half_open_max_calls=1)
+    _open_breaker(breaker)
+    _half_open(breaker)
+    breaker.record(breaker.allow(), None)
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow() is not None
+
+
+def test_limiter_rejection_returns_the_probe_slot():
+    guard = UpstreamGuard("postgen")
+    guard.breaker.failure_threshold = 1
+    _open_breaker(guard.breaker)
+    _half_open(guard.breaker)
+    guard.limiter.in_flight = int(guard.limiter.limit)
+
+    with pytest.raises(UpstreamRejected) as exc_info:
+        guard.acquire()
+    assert exc_info.value.code == "UPSTREAM_OVERLOADED"
+    assert guard.breaker.half_open_in_flight == 0
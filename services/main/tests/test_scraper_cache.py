@@ -0,0 +1,33 @@
+import pytest
+
+from app.routes.scraper import _is_successful_scrape
+from app.utils.proxy import BufferedResponse
+
+
+def _response(body: bytes, status_code: int = 200) -> BufferedResponse:
+    return BufferedResponse(status_code, {"content-type": "application/json"}, body)
+
+
+@pytest.mark.parametrize("body", [
+    b'{"success":false,"message":"Login wall","total_posts":0,"posts":[]}',
+    b'{"success": false, "message": "Login wall", "total_posts": 0, "posts": []}',
+    b'{\n  "success": false,\n  "message": "Login wall"\n}',
+    b'{"message":"Login wall","posts":[],"success":false}',
+    b'{"message":"no success flag at all"}',
+    b'[]',
+    b'not json',
+])
+def test_error_payloads_are_not_cached(body):
+    assert not _is_successful_scrape(_response(body))
+
+
+@pytest.mark.parametrize("body", [
+    b'{"success":true,"message":"Successfully scraped posts","total_posts":1,"posts":[{"text":"hi"}]}',
+    b'{"total_posts": 0, "posts": [], "success": true}',
+])
+def test_successful_payloads_are_cached(body):
+    assert _is_successful_scrape(_response(body))
+
+
+def test_non_200_is_not_cached():
+    assert not _is_successful_scrape(_response(b'{"success":true}', status_code=502))
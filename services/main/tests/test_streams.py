@@ -0,0 +1,119 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi import HTTPException
+
+from app.utils import proxy
+from app.utils.clients import UpstreamClients
+from app.utils.proxy import call_service, stream_service
+from app.utils.resilience import CLOSED, StreamSlots
+
+JSON_RESPONSE = (
+    b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+    b"Content-Length: 15\r\nConnection: keep-alive\r\n\r\n{\"status\":\"ok\"}"
+)
+SSE_HEAD = b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\nTransfer-Encoding: chunked\r\n\r\n"
+
+
+class FakePostgen:
+    """Keep-alive HTTP server: /events opens an SSE stream that stays open, anything else is a JSON 200"""
+
+    def __init__(self):
+        self.server = None
+        self.hang_up = asyncio.Event()
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                if b"/events" in head.split(b"\r\n", 1)[0]:
+                    writer.write(SSE_HEAD + b"e\r\ndata: started\n\n\r\n")
+                    await writer.drain()
+                    await self.hang_up.wait()
+                    return
+                writer.write(JSON_RESPONSE)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionResetError):
+            pass
+        finally:
+            writer.close()
+
+    async def __aenter__(self):
+        self.server = await asyncio.start_server(self.handle, "127.0.0.1", 0)
+        return f"http://127.0.0.1:{self.server.sockets[0].getsockname()[1]}"
+
+    async def __aexit__(self, *exc):
+        self.hang_up.set()
+        self.server.close()
+
+
+@pytest.fixture
+def small_pools(monkeypatch, guards):
+    """Two connections for request/response calls, two separate ones for streams"""
+    pools = {
+        "calls": UpstreamClients(max_connections=2, max_keepalive_connections=2),
+        "streams": UpstreamClients(max_connections=2, max_keepalive_connections=2),
+    }
+    monkeypatch.setattr(proxy, "upstream_clients", pools["calls"])
+    monkeypatch.setattr(proxy, "stream_clients", pools["streams"])
+    monkeypatch.setattr(proxy, "stream_slots", StreamSlots(max_streams=2))
+    return pools
+
+
+def test_open_streams_do_not_starve_request_traffic(small_pools, guards):
+    async def scenario():
+        async with FakePostgen() as base_url:
+            streams = [
+                await stream_service("get", f"{base_url}/jobs/{i}/events", service_name="postgen", long_lived=True)
+                for i in range(2)
+            ]
+
+            # Both streams are open and holding connections; ordinary calls still get through
+            for i in range(4):
+                result = await call_service("get", f"{base_url}/jobs/{i}", service_name="postgen", timeout=1)
+                assert result == {"status": "ok"}
+
+            # A third stream is shed up front instead of queueing for a connection
+            with pytest.raises(HTTPException) as exc_info:
+                await stream_service("get", f"{base_url}/jobs/9/events", service_name="postgen", long_lived=True)
+            assert exc_info.value.status_code == 503
+            assert exc_info.value.detail["error"]["code"] == "TOO_MANY_STREAMS"
+
+            # Ending a stream frees its slot
+            await streams[0].background()
+            streams[0] = await stream_service("get", f"{base_url}/jobs/9/events", service_name="postgen", long_lived=True)
+
+            for stream in streams:
+                await stream.background()
+            await small_pools["calls"].close()
+            await small_pools["streams"].close()
+
+    asyncio.run(scenario())
+    assert proxy.stream_slots.snapshot()["postgen"]["open"] == 0
+    assert guards.get("postgen").breaker.state == CLOSED
+
+
+def test_pool_timeout_is_not_an_upstream_failure(monkeypatch, guards):
+    clients = UpstreamClients(max_connections=1, max_keepalive_connections=1)
+    monkeypatch.setattr(proxy, "upstream_clients", clients)
+    guard = guards.get("postgen")
+    initial_limit = guard.limiter.limit
+
+    async def scenario():
+        async with FakePostgen() as base_url:
+            # A short-lived passthrough stream left open pins the only pooled connection
+            held = await stream_service("get", f"{base_url}/jobs/1/events", service_name="postgen")
+            for _ in range(guard.breaker.failure_threshold + 1):
+                with pytest.raises(HTTPException) as exc_info:
+                    await call_service("get", f"{base_url}/jobs/1", service_name="postgen", timeout=0.05)
+                assert exc_info.value.status_code == 503
+                assert exc_info.value.detail["error"]["code"] == "GATEWAY_SATURATED"
+            await held.background()
+            await clients.close()
+
+    asyncio.run(scenario())
+    assert guard.breaker.state == CLOSED
+    assert guard.breaker.consecutive_failures == 0
+    assert guard.limiter.limit == initial_limit
+    assert guard.limiter.in_flight == 0
@@ -11,9 +11,98 @@ if env_path.exists():
 PINECONE_API_KEY = os.getenv("PINECONE_API_KEY")
 PINECONE_ENVIRONMENT = os.getenv("PINECONE_ENVIRONMENT", "us-east-1-aws")  # Default environment
 PINECONE_INDEX_NAME = os.getenv("PINECONE_INDEX_NAME", "user-posts")
+PINECONE_NAMESPACE_PREFIX = os.getenv("PINECONE_NAMESPACE_PREFIX", "user-")  # one namespace per user
+
+# Vector store backend: "pinecone" (hosted) or "local" (NumPy matrices on memory-mapped files)
+VECTOR_STORE_BACKEND = os.getenv("VECTOR_STORE_BACKEND", "pinecone").lower()
+EMBEDDING_DIMENSION = int(os.getenv("EMBEDDING_DIMENSION", "1536"))
+LOCAL_VECTOR_STORE_PATH = os.getenv("LOCAL_VECTOR_STORE_PATH", str(Path(__file__).resolve().parent.parent / "data" / "vectors"))
+LOCAL_VECTOR_STORE_IVF = os.getenv("LOCAL_VECTOR_STORE_IVF", "false").lower() in ("1", "true", "yes")
+LOCAL_VECTOR_IVF_MIN_VECTORS = int(os.getenv("LOCAL_VECTOR_IVF_MIN_VECTORS", "5000"))  # below this, brute force is faster
+LOCAL_VECTOR_IVF_NPROBE = int(os.getenv("LOCAL_VECTOR_IVF_NPROBE", "8"))  # clusters scanned per query
 
 # MongoDB Collections
-GENERATED_POSTS_COLLECTION_NAME = "generated_posts"
+GENERATED_POSTS_COLLECTION_NAME = "generated_posts"  # legacy: one document per user with a posts array
+GENERATED_POST_ITEMS_COLLECTION_NAME = os.getenv("GENERATED_POST_ITEMS_COLLECTION", "generated_post_items")  # one per post
 
 
 SCRAPER_SERVICE_URL = os.getenv("SCRAPER_SERVICE_URL", "http://scraper-service:8000")
+
+# Background generation jobs (POST /postgen/jobs)
+GENERATION_WORKERS = int(os.getenv("GENERATION_WORKERS", "4"))
+GENERATION_QUEUE_MAX_DEPTH = int(os.getenv("GENERATION_QUEUE_MAX_DEPTH", "100"))
+GENERATION_JOB_TTL = float(os.getenv("GENERATION_JOB_TTL", "3600"))  # seconds a finished job stays pollable
+
+# Chat model used for generation (also picks the tokenizer for prompt budgeting)
+LLM_MODEL = os.getenv("LLM_MODEL", "gpt-3.5-turbo")
+
+# Model backends: "openai", or offline stand-ins for benchmarks - "fake" LLM / "hash" embeddings
+LLM_BACKEND = os.getenv("LLM_BACKEND", "openai").lower()
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "openai").lower()
+FAKE_LLM_LATENCY = float(os.getenv("FAKE_LLM_LATENCY", "0.5"))  # seconds to first token
+FAKE_LLM_TOKEN_LATENCY = float(os.getenv("FAKE_LLM_TOKEN_LATENCY", "0.01"))  # seconds per further token
+FAKE_LLM_TOKENS = int(os.getenv("FAKE_LLM_TOKENS", "120"))  # words per fake post
+FAKE_EMBEDDING_LATENCY = float(os.getenv("FAKE_EMBEDDING_LATENCY", "0.05"))  # seconds per embeddings call
+
+# Max LLM calls in flight per process (shared by all requests and variations)
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+
+# Provider rate limits the model schedulers keep under (per minute, per process), and
+# retries of 429 responses (exponential backoff from MODEL_RETRY_BASE_DELAY seconds)
+LLM_REQUESTS_PER_MINUTE = int(os.getenv("LLM_REQUESTS_PER_MINUTE", "3500"))
+LLM_TOKENS_PER_MINUTE = int(os.getenv("LLM_TOKENS_PER_MINUTE", "90000"))
+LLM_EXPECTED_OUTPUT_TOKENS = int(os.getenv("LLM_EXPECTED_OUTPUT_TOKENS", "400"))  # reserved per completion
+EMBEDDING_REQUESTS_PER_MINUTE = int(os.getenv("EMBEDDING_REQUESTS_PER_MINUTE", "3000"))
+EMBEDDING_TOKENS_PER_MINUTE = int(os.getenv("EMBEDDING_TOKENS_PER_MINUTE", "1000000"))
+EMBEDDING_MAX_INFLIGHT = int(os.getenv("EMBEDDING_MAX_INFLIGHT", "16"))
+MODEL_MAX_RETRIES = int(os.getenv("MODEL_MAX_RETRIES", "4"))
+MODEL_RETRY_BASE_DELAY = float(os.getenv("MODEL_RETRY_BASE_DELAY", "1.0"))
+
+# Dedicated thread pool for blocking client calls (Pinecone SDK etc.), kept off the event loop
+BLOCKING_IO_WORKERS = int(os.getenv("BLOCKING_IO_WORKERS", "16"))
+
+# Embeddings + content-addressed embedding cache
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "text-embedding-ada-002")
+EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "10000"))  # in-process LRU tier
+EMBEDDING_CACHE_PERSIST = os.getenv("EMBEDDING_CACHE_PERSIST", "true").lower() in ("1", "true", "yes")  # Mongo tier
+EMBEDDING_CACHE_COLLECTION_NAME = os.getenv("EMBEDDING_CACHE_COLLECTION", "embedding_cache")
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "100"))  # texts per embeddings API call / index upsert
+EMBEDDING_MAX_CONCURRENCY = int(os.getenv("EMBEDDING_MAX_CONCURRENCY", "4"))  # batches in flight per ingestion
+
+# Registry of users whose posts are in the vector index (Mongo + in-process TTL cache)
+VECTOR_REGISTRY_COLLECTION_NAME = os.getenv("VECTOR_REGISTRY_COLLECTION", "vector_index_registry")
+VECTOR_REGISTRY_CACHE_TTL = int(os.getenv("VECTOR_REGISTRY_CACHE_TTL", "300"))  # seconds
+
+# Incremental sync of scraped posts into the vector store
+VECTOR_SYNC_MAX_POSTS = int(os.getenv("VECTOR_SYNC_MAX_POSTS", "10"))  # most recent posts kept per user
+VECTOR_SYNC_MIN_INTERVAL = int(os.getenv("VECTOR_SYNC_MIN_INTERVAL", "60"))  # seconds between syncs per user
+
+# Background vector indexing (fed by the scraper after it stores new posts)
+INDEXING_WORKERS = int(os.getenv("INDEXING_WORKERS", "2"))
+INDEXING_QUEUE_MAX_DEPTH = int(os.getenv("INDEXING_QUEUE_MAX_DEPTH", "500"))
+INDEXING_MAX_RETRIES = int(os.getenv("INDEXING_MAX_RETRIES", "3"))
+INDEXING_RETRY_BASE_DELAY = float(os.getenv("INDEXING_RETRY_BASE_DELAY", "2"))  # seconds, doubled per attempt
+INDEXING_CHANGE_STREAM = os.getenv("INDEXING_CHANGE_STREAM", "false").lower() in ("1", "true", "yes")  # needs a replica set
+
+# Generation result cache (exact prompt match + semantic match on the user's prompt)
+GENERATION_CACHE_MAX_ENTRIES = int(os.getenv("GENERATION_CACHE_MAX_ENTRIES", "1000"))
+GENERATION_CACHE_TTL = int(os.getenv("GENERATION_CACHE_TTL", "3600"))  # seconds
+GENERATION_CACHE_SEMANTIC = os.getenv("GENERATION_CACHE_SEMANTIC", "true").lower() in ("1", "true", "yes")
+GENERATION_CACHE_SIMILARITY_THRESHOLD = float(os.getenv("GENERATION_CACHE_SIMILARITY_THRESHOLD", "0.95"))
+
+# Trending samples per hashtag, cached locally and refreshed in the background
+TRENDING_SAMPLE_TTL = int(os.getenv("TRENDING_SAMPLE_TTL", "1800"))  # seconds before a sample is refreshed
+TRENDING_NEGATIVE_TTL = int(os.getenv("TRENDING_NEGATIVE_TTL", "120"))  # seconds to remember "no sample"
+TRENDING_SAMPLE_DEADLINE = float(os.getenv("TRENDING_SAMPLE_DEADLINE", "1.0"))  # max wait on a cold hashtag
+TRENDING_FETCH_TIMEOUT = float(os.getenv("TRENDING_FETCH_TIMEOUT", "180"))  # background scraper call (may scrape)
+TRENDING_REFRESH_INTERVAL = int(os.getenv("TRENDING_REFRESH_INTERVAL", "60"))  # background refresh loop tick
+TRENDING_CACHE_MAX_HASHTAGS = int(os.getenv("TRENDING_CACHE_MAX_HASHTAGS", "500"))
+TRENDING_IDLE_EXPIRY = int(os.getenv("TRENDING_IDLE_EXPIRY", "86400"))  # stop refreshing hashtags nobody asked for
+
+# Deadline (seconds) for the concurrent style + trending retrieval before prompt building
+RETRIEVAL_DEADLINE = float(os.getenv("RETRIEVAL_DEADLINE", "5.0"))
+
+# Prompt assembly: total prompt token budget; style/trending samples are trimmed to fit,
+# and a sample left with fewer than PROMPT_SAMPLE_MIN_TOKENS is dropped entirely
+PROMPT_MAX_TOKENS = int(os.getenv("PROMPT_MAX_TOKENS", "600"))
+PROMPT_SAMPLE_MIN_TOKENS = int(os.getenv("PROMPT_SAMPLE_MIN_TOKENS", "20"))
@@ -1,20 +1,68 @@
-from langchain.chat_models import ChatOpenAI
-from langchain.chains import LLMChain
-from langchain.prompts import PromptTemplate
-
-llm = ChatOpenAI(model="gpt-3.5-turbo", temperature=0.7)
-
-prompt_template = PromptTemplate(
-    input_variables=["prompt"],
-    template="{prompt}"
-)
-
-chain = LLMChain(llm=llm, prompt=prompt_template)
-
-def generate_post_langchain(prompt: str, num_variations: int = 1):
-    results = []
-    for i in range(num_variations):
-        print(f"Generating variation {i+1}...")
-        res = chain.run(prompt=prompt)
-        results.append(res.strip())
-    return results
\ No newline at end of file
+import asyncio
+from typing import AsyncIterator, Optional, Tuple
+from app.config import LLM_EXPECTED_OUTPUT_TOKENS
+from app.utils.llm_backend import create_llm_backend
+from app.utils.model_scheduler import llm_scheduler
+from app.utils.prompt import count_tokens
+from app.utils.readiness import LazyResource
+
+# Chat model selected by LLM_BACKEND (OpenAI, or the offline fake for benchmarks), built on first use
+llm_backend = LazyResource("llm", create_llm_backend)
+
+def _request_tokens(prompt: str) -> int:
+    """Tokens one completion is charged against the per-minute budget: prompt + expected output"""
+    return count_tokens(prompt) + LLM_EXPECTED_OUTPUT_TOKENS
+
+async def _generate_variation(prompt: str, variation: int) -> str:
+    # Every model call waits its turn in llm_scheduler (rate limits, priority, per-user fairness)
+    print(f"Generating variation {variation}...")
+    backend = await llm_backend.aget()
+    res = await llm_scheduler.run(lambda: backend.agenerate(prompt, variation), _request_tokens(prompt))
+    return res.strip()
+
+async def generate_post_langchain(prompt: str, num_variations: int = 1):
+    """
+    Generate `num_variations` posts concurrently with the async client, so three
+    variations take about as long as one and the event loop stays free meanwhile.
+    """
+    return list(await asyncio.gather(
+        *(_generate_variation(prompt, i + 1) for i in range(num_variations))
+    ))
+
+_VARIATION_DONE = object()
+
+async def stream_post_langchain(prompt: str, num_variations: int = 1) -> AsyncIterator[Tuple[int, Optional[str]]]:
+    """
+    Stream tokens for every variation as the model produces them.
+
+    Variations are requested concurrently and their tokens interleave; each item is
+    (variation_number, token), and (variation_number, None) marks that variation as finished.
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+    tokens = _request_tokens(prompt)
+
+    async def produce(variation: int):
+        try:
+            backend = await llm_backend.aget()
+            async for chunk in llm_scheduler.stream(lambda: backend.astream(prompt, variation), tokens):
+                await queue.put((variation, chunk))
+            await queue.put((variation, _VARIATION_DONE))
+        except Exception as e:
+            await queue.put((variation, e))
+
+    tasks = [asyncio.create_task(produce(i + 1)) for i in range(num_variations)]
+    try:
+        remaining = num_variations
+        while remaining:
+            variation, item = await queue.get()
+            if item is _VARIATION_DONE:
+                remaining -= 1
+                yield variation, None
+            elif isinstance(item, Exception):
+                raise item
+            else:
+                yield variation, item
+    finally:
+        # Client went away or a variation failed - stop the remaining model calls
+        for task in tasks:
+            task.cancel()
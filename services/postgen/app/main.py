@@ -1,10 +1,22 @@
+import asyncio
 from fastapi import FastAPI
-from app.routes.generate import router as generate_router
-from shared.db.mongo_db import connect_to_mongo, close_mongo_connection
+from fastapi.responses import JSONResponse
+from app.routes.generate import router as generate_router, ensure_generation_indexes
+from app.routes.jobs import router as jobs_router, run_generation_job
+from app.routes.indexing import router as indexing_router, index_user_posts
+from app.utils.jobs import generation_jobs
+from app.utils.indexing import indexing_queue, watch_posts_collection
+from app.utils.trending import trending_cache
+from app.config import INDEXING_CHANGE_STREAM
+from app.utils.executor import shutdown_executor
+from app.utils.readiness import warm_up, readiness
+from shared.db.mongo_db import connect_to_mongo, close_mongo_connection, get_database, POSTS_COLLECTION_NAME
 from app.models.user_post import UserPost
 
 app = FastAPI()
 app.include_router(generate_router, prefix="/postgen", tags=["Post Generation"])
+app.include_router(jobs_router, prefix="/postgen", tags=["Post Generation Jobs"])
+app.include_router(indexing_router, prefix="/postgen", tags=["Vector Indexing"])
 
 
 
@@ -13,13 +25,59 @@ def healthcheck():
     return {"msg": "PostGen service running"}
 
 
+@app.get("/ready")
+async def readiness_check():
+    """503 until MongoDB answers and every lazily-built backend (vector store, LLM, embeddings) is up"""
+    status = readiness()
+    try:
+        await asyncio.wait_for(get_database().command("ping"), timeout=2)
+        status["backends"]["mongodb"] = {"state": "ready", "error": None}
+    except Exception as e:
+        status["backends"]["mongodb"] = {"state": "failed", "error": str(e) or type(e).__name__}
+        status["ready"] = False
+    return JSONResponse(status_code=200 if status["ready"] else 503, content=status)
+
+
 # 🔹 Initialize DB connection when app starts
 @app.on_event("startup")
 async def startup_db():
     await connect_to_mongo()
+    await ensure_generation_indexes(get_database())
+
+
+# 🔹 Connect the vector store and build the model clients in the background (requests
+# arriving first build them on demand); /ready reports when they are up
+@app.on_event("startup")
+async def startup_backends():
+    app.state.warm_up = asyncio.create_task(warm_up())
+
+
+# 🔹 Start the background generation workers
+@app.on_event("startup")
+async def startup_jobs():
+    generation_jobs.start(run_generation_job)
+
+
+# 🔹 Start the background vector indexing workers (and the posts change stream, if enabled)
+@app.on_event("startup")
+async def startup_indexing():
+    indexing_queue.start(index_user_posts)
+    if INDEXING_CHANGE_STREAM:
+        indexing_queue.watch(lambda queue: watch_posts_collection(queue, get_database(), POSTS_COLLECTION_NAME))
+
+
+# 🔹 Start the trending sample cache (pooled scraper client + background refresh)
+@app.on_event("startup")
+async def startup_trending():
+    trending_cache.start()
 
 
-# 🔹 Close DB connection when app shuts down
+# 🔹 Stop workers and background refreshes, close DB connection and the blocking I/O pool when app shuts down
 @app.on_event("shutdown")
 async def shutdown_db():
+    app.state.warm_up.cancel()
+    await generation_jobs.stop()
+    await indexing_queue.stop()
+    await trending_cache.stop()
     await close_mongo_connection()
+    shutdown_executor()
@@ -5,7 +5,7 @@ from bson import ObjectId
 import uuid
 
 class GeneratedPostItem(BaseModel):
-    """Individual generated post item that goes into the posts array"""
+    """Individual generated post, stored as its own document in generated_post_items"""
     post_id: str = Field(default_factory=lambda: str(uuid.uuid4()))  # Unique ID for each post
     original_prompt: str
     generated_text: str
@@ -17,7 +17,7 @@ class GeneratedPostItem(BaseModel):
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
 class GeneratedPostsDocument(BaseModel):
-    """Document structure that matches your existing posts collection pattern"""
+    """Legacy per-user document with a posts array (see migrations/split_generated_posts.py)"""
     id: Optional[str] = None
     username: str  # LinkedIn username from URL
     user_id: Optional[int] = None  # From auth service if available
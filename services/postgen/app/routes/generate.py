@@ -1,16 +1,27 @@
+import asyncio
 import logging
-from fastapi import APIRouter, Depends, HTTPException
+import time
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
-from typing import Optional, List
-from shared.db.mongo_db import get_database, POSTS_COLLECTION_NAME
-from app.utils.embeddings import get_embedding
-from app.utils.prompt import build_prompt
-from app.llm import generate_post_langchain
-from app.config import GENERATED_POSTS_COLLECTION_NAME, SCRAPER_SERVICE_URL
+from typing import Optional, List, Dict, Any, Set
+from shared.db.mongo_db import get_database
+from app.utils.embeddings import aget_embedding, embedding_cache
+from app.utils.prompt import assemble_prompt
+from app.llm import generate_post_langchain, stream_post_langchain
+from app.config import GENERATED_POST_ITEMS_COLLECTION_NAME, RETRIEVAL_DEADLINE
 from app.utils.pinecone import pinecone_service
+from app.utils.vector_sync import sync_user_posts
 from app.models.generated_post import GeneratedPostItem
+from app.utils.sse import format_sse, SSE_HEADERS
+from app.utils.generation_cache import generation_cache
+from app.utils.trending import trending_cache
+from app.utils.model_scheduler import llm_scheduler, embedding_scheduler, set_model_context
 from datetime import datetime
-import httpx
+from pymongo import ASCENDING, DESCENDING
+import base64
+import json
+import uuid
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -25,214 +36,377 @@ class GeneratePostRequest(BaseModel):
     hashtag: Optional[str] = Field(None, description="Hashtag to get trending samples")
     num_variations: Optional[int] = Field(1, ge=1, le=3, description="Number of variations to generate (1-3)")
     username: Optional[str] = Field(None, description="LinkedIn username (added by main service from JWT)")
+    bypass_cache: Optional[bool] = Field(False, description="Skip the generation cache and always call the LLM")
 
 async def ensure_user_posts_in_pinecone(username: str, db):
     """
-    Ensure user's posts are stored in Pinecone vector database
-    Flow: Check Pinecone -> If not found, get from MongoDB -> Embed to Pinecone
+    Ensure user's posts are stored in the vector store
+    Flow: incremental sync - embed posts newer than the registry watermark, drop stale ones
     """
     try:
-        # 1. Check if user posts already exist in Pinecone
-        query_response = pinecone_service.index.query(
-            vector=[0.0] * 1536,
-            filter={"username": username},
-            top_k=1,
-            include_metadata=True
-        )
-        
-        if query_response.matches:
-            print(f"User {username} posts found in Pinecone")
-            return True
-        
-        print(f"User {username} posts not found in Pinecone, checking MongoDB...")
-        
-        # 2. Get posts from MongoDB (assuming they're already stored by another service)
-        user_posts_cursor = db[POSTS_COLLECTION_NAME].find({"username": username})
-        user_document = await user_posts_cursor.to_list(length=1)
-        
-        if user_document:
-            # User exists in MongoDB - embed their posts to Pinecone
-            all_posts = user_document[0].get("posts", [])
-            recent_posts = sorted(all_posts, key=lambda x: x.get("scraped_at", ""), reverse=True)[:10]
-            
-            if recent_posts:
-                success = pinecone_service.store_user_posts(username, recent_posts)
-                if success:
-                    print(f"Embedded {len(recent_posts)} MongoDB posts to Pinecone for {username}")
-                    return True
-                else:
-                    print(f"Failed to embed posts to Pinecone for {username}")
-                    return False
-            else:
-                print(f"User {username} exists in MongoDB but has no posts")
-                return False
-        else:
-            print(f"User {username} not found in MongoDB - posts should be pre-stored by another service")
-            return False
-            
+        return await sync_user_posts(username, db)
     except Exception as e:
         print(f"Error ensuring user posts in Pinecone: {e}")
         return False
 
+async def ensure_generation_indexes(db):
+    """History reads page newest-first per user, tie-broken by post id"""
+    try:
+        await db[GENERATED_POST_ITEMS_COLLECTION_NAME].create_index(
+            [("username", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)]
+        )
+    except Exception as e:
+        print(f"Error creating generated post indexes: {e}")
+
 async def save_generated_posts(db, username: str, post_items: List[GeneratedPostItem]) -> str:
     """
-    Save generated posts to MongoDB (adds to existing array or creates new document)
+    Save generated posts to MongoDB, one document per post, in a single insert.
+    Returns the generation id shared by the variations.
     """
     try:
-        collection = db[GENERATED_POSTS_COLLECTION_NAME]
-        
-        existing_doc = await collection.find_one({"username": username})
-        
-        if existing_doc:
-            await collection.update_one(
-                {"username": username},
-                {
-                    "$push": {"generated_posts": {"$each": [item.dict() for item in post_items]}},
-                    "$set": {"updated_at": datetime.utcnow()}
-                }
-            )
-            print(f"Added {len(post_items)} posts to existing user document: {username}")
-            return str(existing_doc["_id"])
-        else:
-            new_doc = {
-                "username": username,
-                "user_id": None,
-                "generated_posts": [item.dict() for item in post_items],
-                "created_at": datetime.utcnow(),
-                "updated_at": datetime.utcnow()
-            }
-            result = await collection.insert_one(new_doc)
-            print(f"Created new document for user {username} with {len(post_items)} posts")
-            return str(result.inserted_id)
+        generation_id = str(uuid.uuid4())
+        docs = [
+            {"_id": item.post_id, "username": username, "generation_id": generation_id, **item.dict()}
+            for item in post_items
+        ]
+        await db[GENERATED_POST_ITEMS_COLLECTION_NAME].insert_many(docs)
+        print(f"Saved {len(post_items)} generated posts for user {username}")
+        return generation_id
             
     except Exception as e:
         print(f"Error saving generated posts: {e}")
         raise
 
+def encode_history_cursor(post: Dict[str, Any]) -> str:
+    payload = json.dumps({"created_at": post["created_at"].isoformat(), "post_id": post["post_id"]})
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+def decode_history_cursor(cursor: str) -> Dict[str, Any]:
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return {"created_at": datetime.fromisoformat(payload["created_at"]), "post_id": payload["post_id"]}
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+# Vector syncs that outlived the request that started them
+_background_tasks: Set[asyncio.Task] = set()
+
+def _elapsed_ms(start: float) -> float:
+    return round((time.perf_counter() - start) * 1000, 1)
+
+async def _timed(timings: Dict[str, Any], stage: str, awaitable):
+    """Await `awaitable`, recording its duration in timings[stage] (ms) even if it fails or is cancelled"""
+    start = time.perf_counter()
+    try:
+        return await awaitable
+    finally:
+        timings[stage] = _elapsed_ms(start)
+
+class PreparedGeneration(BaseModel):
+    """Everything resolved before the LLM is called"""
+    username: str
+    prompt: str
+    topic: Optional[str] = None
+    tone: Optional[str] = None
+    length: Optional[str] = None
+    audience: Optional[str] = None
+    hashtag: Optional[str] = None
+    num_variations: int = 1
+    style_sample: Optional[str] = None
+    trending_sample: Optional[str] = None
+    final_prompt: str
+    prompt_tokens: int = 0
+    trimmed_samples: List[str] = Field(default_factory=list)  # samples cut down to the token budget
+    timings: Dict[str, Any] = Field(default_factory=dict)  # per-stage milliseconds
+
+async def prepare_generation(req: GeneratePostRequest, db) -> PreparedGeneration:
+    """Steps 1-4 of generation: concurrent style + trending retrieval and prompt building"""
+    logger.info(f"Received post generation request for username: {req.username}")
+    
+    # Extract parameters
+    prompt = req.prompt
+    topic = req.topic
+    tone = req.tone
+    length = req.length
+    audience = req.audience
+    hashtag = req.hashtag
+    num_variations = min(req.num_variations or 1, 3)
+    username = req.username
+    
+    if not username:
+        raise HTTPException(status_code=400, detail="Username is required")
+    
+    # Extract username from LinkedIn URL if needed
+    if username and 'linkedin.com' in username:
+        if '/in/' in username:
+            username = username.split('/in/')[-1].rstrip('/')
+    
+    logger.info(f"Processing request for user: {username}")
+    print(f"Processing request for user: {username}")
+    # Model calls below take turns with other users' in the schedulers
+    set_model_context(user=username)
+    
+    # 1-3. Style retrieval (vector sync -> similarity search) and the trending sample run
+    # concurrently under one deadline; whatever isn't back in time is cancelled and skipped
+    timings: Dict[str, Any] = {}
+    retrieval_start = time.perf_counter()
+
+    # The sync may be indexing a new user: let it finish in the background even if we stop waiting
+    sync_task = asyncio.create_task(ensure_user_posts_in_pinecone(username, db))
+    _background_tasks.add(sync_task)
+    sync_task.add_done_callback(_background_tasks.discard)
+
+    async def retrieve_style() -> Optional[str]:
+        # The prompt embedding is computed alongside the sync and lands in the embedding cache
+        posts_available, _ = await asyncio.gather(
+            _timed(timings, "vector_sync", asyncio.shield(sync_task)),
+            _timed(timings, "prompt_embedding", aget_embedding(prompt)),
+        )
+        if not posts_available:
+            print("No posts available - skipping style sample search")
+            return None
+        sample = await _timed(timings, "style_search", pinecone_service.afind_similar_post(username, prompt))
+        print(f"Style sample found: {'Yes' if sample else 'No'}")
+        return sample
+
+    stages = {"style": asyncio.create_task(retrieve_style())}
+    if hashtag:
+        # Local cache only - a cold hashtag never blocks past its own (shorter) deadline
+        stages["trending"] = asyncio.create_task(_timed(timings, "trending", trending_cache.get(hashtag)))
+
+    done, pending = await asyncio.wait(stages.values(), timeout=RETRIEVAL_DEADLINE)
+    for task in pending:
+        task.cancel()
+    # Let the cancellations land so the skipped stages still report how long they ran
+    await asyncio.gather(*pending, return_exceptions=True)
+    timings["timed_out"] = [name for name, task in stages.items() if task in pending]
+    if timings["timed_out"]:
+        print(f"Retrieval deadline ({RETRIEVAL_DEADLINE}s) hit, skipping: {timings['timed_out']}")
+
+    def stage_result(name: str) -> Optional[str]:
+        task = stages.get(name)
+        if task is None or task.cancelled() or task.exception() is not None:
+            return None
+        return task.result()
+
+    style_sample = stage_result("style")
+    trending_sample = stage_result("trending")
+    timings["retrieval"] = _elapsed_ms(retrieval_start)
+    if trending_sample:
+        print(f"Trending sample found: {trending_sample[:100]}...")
+
+    # 4. Build prompt (samples trimmed to the token budget)
+    build_start = time.perf_counter()
+    assembled = assemble_prompt(prompt, topic, tone, length, audience, style_sample, trending_sample)
+    timings["prompt_build"] = _elapsed_ms(build_start)
+    print(f"Final prompt built: {assembled.tokens} tokens (trimmed: {assembled.trimmed or 'none'})")
+
+    return PreparedGeneration(
+        username=username,
+        prompt=prompt,
+        topic=topic,
+        tone=tone,
+        length=length,
+        audience=audience,
+        hashtag=hashtag,
+        num_variations=num_variations,
+        style_sample=style_sample,
+        trending_sample=trending_sample,
+        final_prompt=assembled.text,
+        prompt_tokens=assembled.tokens,
+        trimmed_samples=assembled.trimmed,
+        timings=timings
+    )
+
+async def persist_generation(db, prepared: PreparedGeneration, generated_posts: List[str]) -> str:
+    """Steps 6-7 of generation: wrap each variation in a GeneratedPostItem and save them"""
+    post_items = []
+    for i, post_text in enumerate(generated_posts):
+        post_item = GeneratedPostItem(
+            original_prompt=prepared.prompt,
+            generated_text=post_text,
+            parameters={
+                "topic": prepared.topic,
+                "tone": prepared.tone,
+                "length": prepared.length, 
+                "audience": prepared.audience,
+                "hashtag": prepared.hashtag
+            },
+            style_sample_used=prepared.style_sample,
+            trending_sample_used=prepared.trending_sample,
+            variation_number=i + 1,
+            created_at=datetime.utcnow()
+        )
+        post_items.append(post_item)
+    
+    logger.info(f"Created {len(post_items)} post items")
+    
+    doc_id = await save_generated_posts(db, prepared.username, post_items)
+    logger.info(f"Saved posts to MongoDB with generation id: {doc_id}")
+    return doc_id
+
+async def run_generation(req: GeneratePostRequest, db) -> Dict[str, Any]:
+    """
+    Full generation pipeline for one request: style + trending retrieval, prompt,
+    LLM variations and persistence. Shared by /generate and the background job workers.
+    """
+    prepared = await prepare_generation(req, db)
+
+    # 5. Generate posts (unless an identical or near-identical request was answered recently)
+    timings = prepared.timings
+    generation_start = time.perf_counter()
+    generated_posts, cache_status = await generation_cache.lookup(prepared, bypass=bool(req.bypass_cache))
+    if generated_posts is None:
+        generated_posts = await generate_post_langchain(prepared.final_prompt, num_variations=prepared.num_variations)
+        await generation_cache.store(prepared, generated_posts)
+    timings["generation"] = _elapsed_ms(generation_start)
+    logger.info(f"Generated {len(generated_posts)} post variations (cache: {cache_status})")
+    
+    doc_id = await _timed(timings, "persist", persist_generation(db, prepared, generated_posts))
+    
+    # Return response
+    return {
+        "success": True,
+        "variations": generated_posts,
+        "username_used": prepared.username,
+        "style_sample_found": prepared.style_sample is not None,
+        "trending_sample_found": prepared.trending_sample is not None,
+        "saved_to_db": True,
+        "document_id": doc_id,
+        "cache": cache_status,
+        "prompt_tokens": prepared.prompt_tokens,
+        "trimmed_samples": prepared.trimmed_samples,
+        "timings": timings
+    }
+
 @router.post("/generate")
 async def generate_post(req: GeneratePostRequest, db=Depends(get_database)):
     """Enhanced post generation with better user handling"""
     try:
-        logger.info(f"Received post generation request for username: {req.username}")
-        
-        # Extract parameters
-        prompt = req.prompt
-        topic = req.topic
-        tone = req.tone
-        length = req.length
-        audience = req.audience
-        hashtag = req.hashtag
-        num_variations = min(req.num_variations or 1, 3)
-        username = req.username
-        
-        if not username:
-            raise HTTPException(status_code=400, detail="Username is required")
-        
-        # Extract username from LinkedIn URL if needed
-        if username and 'linkedin.com' in username:
-            if '/in/' in username:
-                username = username.split('/in/')[-1].rstrip('/')
-        
-        logger.info(f"Processing request for user: {username}")
-        print(f"Processing request for user: {username}")
-        
-        # 1. Ensure user posts are in Pinecone (check Pinecone -> MongoDB -> Embed if needed)
-        posts_available = await ensure_user_posts_in_pinecone(username, db)
-        
-        # 2. Find similar style post (only if posts are available)
-        style_sample = None
-        if posts_available:
-            style_sample = pinecone_service.find_similar_post(username, prompt)
-            print(f"Style sample found: {'Yes' if style_sample else 'No'}")
-        else:
-            print("No posts available - skipping style sample search")
-        
-        # 3. Get trending post sample
-        trending_sample = None
-        if hashtag:
-            try:
-                async with httpx.AsyncClient() as client:
-                    resp = await client.get(
-                        f"{SCRAPER_SERVICE_URL}/scraper/hashtag/posts",
-                        params={"hashtag": hashtag, "n_posts": 5}
-                    )
-                    if resp.status_code == 200:
-                        data = resp.json()
-                        trending_sample = data.get("top_post")
-                        print(f"Trending sample found: {trending_sample[:100]}..." if trending_sample else "No trending sample")
-            except Exception as e:
-                print(f"Error fetching trending sample: {e}")
-                trending_sample = None
-
-        # 4. Build prompt
-        final_prompt = build_prompt(prompt, topic, tone, length, audience, style_sample, trending_sample)
-        print("Final prompt built")    
-
-        # 5. Generate posts
-        generated_posts = generate_post_langchain(final_prompt, num_variations=num_variations)
-        logger.info(f"Generated {len(generated_posts)} post variations")
-        
-        # 6. Prepare post items for saving - CORRECTED VERSION
-        post_items = []
-        for i, post_text in enumerate(generated_posts):
-            post_item = GeneratedPostItem(
-                original_prompt=prompt,           # CORRECT FIELD NAME
-                generated_text=post_text,         # CORRECT FIELD NAME
-                parameters={                      # CORRECT - put these in parameters dict
-                    "topic": topic,
-                    "tone": tone,
-                    "length": length, 
-                    "audience": audience,
-                    "hashtag": hashtag
-                },
-                style_sample_used=style_sample,
-                trending_sample_used=trending_sample,
-                variation_number=i + 1,
-                created_at=datetime.utcnow()
-            )
-            post_items.append(post_item)
-        
-        logger.info(f"Created {len(post_items)} post items")
-        
-        # 7. Save to MongoDB
-        doc_id = await save_generated_posts(db, username, post_items)
-        logger.info(f"Saved posts to MongoDB with doc_id: {doc_id}")
-        
-        # Return response
-        return {
-            "success": True,
-            "variations": generated_posts,
-            "username_used": username,
-            "style_sample_found": style_sample is not None,
-            "trending_sample_found": trending_sample is not None,
-            "saved_to_db": True,
-            "document_id": doc_id
-        }
-        
+        return await run_generation(req, db)
     except Exception as e:
         logger.error(f"Error in generate_post: {e}")
         print(f"Error in generate_post: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/generate/stream")
+async def generate_post_stream(req: GeneratePostRequest, db=Depends(get_database)):
+    """
+    Streaming variant of /generate (Server-Sent Events).
+
+    Events: `start` once retrieval is done, `token` {variation, token} as the model
+    produces text, `variation_done` {variation, text} per finished variation, then a
+    final `done` with the saved document id - or `error` if generation fails midway.
+    On a generation cache hit (`start.cache` is "exact"/"semantic") no `token` events are sent.
+    """
+    try:
+        prepared = await prepare_generation(req, db)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error preparing streamed generation: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    async def events():
+        parts = [[] for _ in range(prepared.num_variations)]
+        try:
+            cached, cache_status = await generation_cache.lookup(prepared, bypass=bool(req.bypass_cache))
+            yield format_sse("start", {
+                "username_used": prepared.username,
+                "num_variations": prepared.num_variations,
+                "style_sample_found": prepared.style_sample is not None,
+                "trending_sample_found": prepared.trending_sample is not None,
+                "cache": cache_status,
+                "prompt_tokens": prepared.prompt_tokens,
+                "trimmed_samples": prepared.trimmed_samples,
+                "timings": prepared.timings
+            })
+            if cached is not None:
+                # Cache hit: no tokens to stream, just the finished variations
+                for variation, text in enumerate(cached, start=1):
+                    yield format_sse("variation_done", {"variation": variation, "text": text})
+                variations = cached
+            else:
+                async for variation, token in stream_post_langchain(prepared.final_prompt, prepared.num_variations):
+                    if token is None:
+                        yield format_sse("variation_done", {"variation": variation, "text": "".join(parts[variation - 1]).strip()})
+                        continue
+                    parts[variation - 1].append(token)
+                    yield format_sse("token", {"variation": variation, "token": token})
+                variations = ["".join(p).strip() for p in parts]
+                await generation_cache.store(prepared, variations)
+
+            doc_id = await persist_generation(db, prepared, variations)
+            yield format_sse("done", {"success": True, "variations": variations, "saved_to_db": True, "document_id": doc_id})
+        except Exception as e:
+            logger.error(f"Error in streamed generation: {e}")
+            yield format_sse("error", {"message": str(e)})
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
+
 @router.get("/history/{username}")
-async def get_user_history(username: str, limit: int = 20, db=Depends(get_database)):
-    """Get generation history for a user"""
+async def get_user_history(
+    username: str,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    db=Depends(get_database)
+):
+    """
+    Get generation history for a user, newest first.
+    Pass the returned `next_cursor` back as `cursor` for the next page.
+    """
     try:
-        collection = db[GENERATED_POSTS_COLLECTION_NAME]
-        user_doc = await collection.find_one({"username": username})
-        
-        if not user_doc:
-            return {"success": True, "posts": [], "total_posts": 0}
-        
-        all_posts = user_doc.get("generated_posts", [])
-        sorted_posts = sorted(all_posts, key=lambda x: x.get("created_at"), reverse=True)
-        limited_posts = sorted_posts[:limit]
-        
-        return {
+        collection = db[GENERATED_POST_ITEMS_COLLECTION_NAME]
+        query: Dict[str, Any] = {"username": username}
+        if cursor:
+            after = decode_history_cursor(cursor)
+            query["$or"] = [
+                {"created_at": {"$lt": after["created_at"]}},
+                {"created_at": after["created_at"], "_id": {"$lt": after["post_id"]}},
+            ]
+
+        # One extra row tells us whether there is another page
+        posts = await collection.find(query, {"_id": 0, "username": 0}) \
+            .sort([("created_at", DESCENDING), ("_id", DESCENDING)]) \
+            .limit(limit + 1) \
+            .to_list(length=limit + 1)
+        has_more = len(posts) > limit
+        posts = posts[:limit]
+
+        response = {
             "success": True,
-            "posts": limited_posts,
-            "total_posts": len(all_posts),
-            "returned": len(limited_posts)
+            "posts": posts,
+            "returned": len(posts),
+            "next_cursor": encode_history_cursor(posts[-1]) if has_more else None
         }
+        if not cursor:
+            response["total_posts"] = await collection.count_documents({"username": username})
+        return response
+    except HTTPException:
+        raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/generate/cache")
+async def get_generation_cache_stats():
+    """Exact / semantic hit counts and size of the generation cache"""
+    return generation_cache.stats()
+
+
+@router.get("/trending/cache")
+async def get_trending_cache_stats():
+    """Hit / deadline-miss counts and tracked hashtags of the trending sample cache"""
+    return trending_cache.stats()
+
+
+@router.get("/embeddings/cache")
+async def get_embedding_cache_stats():
+    """Hit ratio and memory/storage footprint of the embedding cache tiers"""
+    return await embedding_cache.stats()
+
+
+@router.get("/scheduler")
+async def get_model_scheduler_stats():
+    """Queue depth per priority, wait times and rate-limit budget use of the LLM and embedding schedulers"""
+    return {"llm": llm_scheduler.stats(), "embeddings": embedding_scheduler.stats()}
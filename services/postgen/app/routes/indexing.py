@@ -0,0 +1,31 @@
+import logging
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from shared.db.mongo_db import get_database
+from app.utils.indexing import indexing_queue
+from app.utils.vector_sync import sync_user_posts
+from app.utils.model_scheduler import set_model_context, PRIORITY_BACKGROUND
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+
+async def index_user_posts(username: str):
+    """Indexing handler: force a sync so freshly scraped posts are embedded now"""
+    set_model_context(priority=PRIORITY_BACKGROUND, user=username)
+    await sync_user_posts(username, get_database(), force=True, raise_on_failure=True)
+
+
+@router.post("/index/{username}", status_code=202)
+async def request_indexing(username: str):
+    """Called by the scraper after it stores new posts; indexing happens in the background"""
+    if not indexing_queue.enqueue(username):
+        return JSONResponse(status_code=503, content={"detail": "Indexing queue is full"}, headers={"Retry-After": "30"})
+    logger.info(f"Queued vector indexing for {username}")
+    return {"username": username, "status": "queued"}
+
+
+@router.get("/index")
+async def indexing_stats():
+    """Worker count, queue depth and indexing outcome counters"""
+    return indexing_queue.stats()
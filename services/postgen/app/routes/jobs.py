@@ -0,0 +1,82 @@
+import asyncio
+import logging
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import JSONResponse, StreamingResponse
+from shared.db.mongo_db import get_database
+from app.routes.generate import GeneratePostRequest, run_generation
+from app.utils.jobs import generation_jobs, QueueFullError
+from app.utils.sse import format_sse, SSE_HEADERS
+from app.utils.model_scheduler import set_model_context, PRIORITY_QUEUED
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+# Seconds between keep-alive comments on an idle job event stream
+EVENT_KEEPALIVE_SECONDS = 15
+
+
+async def run_generation_job(req: GeneratePostRequest):
+    """Job handler: same pipeline as /generate, results saved via save_generated_posts"""
+    # Nobody is holding a connection open for this one - let interactive requests go first
+    set_model_context(priority=PRIORITY_QUEUED)
+    return await run_generation(req, get_database())
+
+
+def _get_job_or_404(job_id: str, username: Optional[str]):
+    job = generation_jobs.get(job_id)
+    # Jobs are only visible to the user that submitted them (when the caller says who that is)
+    if job is None or (username is not None and job.username != username):
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@router.post("/jobs", status_code=202)
+async def submit_generation_job(req: GeneratePostRequest):
+    """Queue a generation and return immediately with a job id to poll or subscribe to"""
+    if not req.username:
+        raise HTTPException(status_code=400, detail="Username is required")
+    try:
+        job = generation_jobs.submit(req.username, req)
+    except QueueFullError as e:
+        return JSONResponse(status_code=503, content={"detail": str(e)}, headers={"Retry-After": "5"})
+
+    logger.info(f"Queued generation job {job.id} for {req.username}")
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "status_url": f"/postgen/jobs/{job.id}",
+        "events_url": f"/postgen/jobs/{job.id}/events",
+    }
+
+
+@router.get("/jobs/{job_id}")
+async def get_generation_job(job_id: str, username: Optional[str] = Query(None)):
+    """Current status of a job, including the generation result once it has succeeded"""
+    return _get_job_or_404(job_id, username).to_dict()
+
+
+@router.get("/jobs/{job_id}/events")
+async def stream_generation_job(job_id: str, username: Optional[str] = Query(None)):
+    """Server-Sent Events: one `status` event per state change, closing after the final one"""
+    job = _get_job_or_404(job_id, username)
+
+    async def events():
+        while True:
+            changed = job.changed_event()
+            yield format_sse("status", job.to_dict())
+            if job.done:
+                return
+            while not changed.is_set():
+                try:
+                    await asyncio.wait_for(changed.wait(), timeout=EVENT_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+
+@router.get("/jobs")
+async def generation_job_stats():
+    """Worker count, queue depth and per-status job counts"""
+    return generation_jobs.stats()
@@ -0,0 +1,125 @@
+import asyncio
+import hashlib
+import re
+import time
+from abc import ABC, abstractmethod
+from typing import List
+import numpy as np
+from app.config import EMBEDDING_BACKEND, EMBEDDING_MODEL, EMBEDDING_DIMENSION, FAKE_EMBEDDING_LATENCY
+
+
+class EmbeddingBackend(ABC):
+    """
+    Text -> vector, with the same four methods as langchain's embeddings so call
+    sites don't care which backend is configured. `model` names the vector space
+    (it is part of every embedding cache key).
+    """
+
+    name = "base"
+    model = "base"
+
+    @abstractmethod
+    def embed_query(self, text: str) -> List[float]:
+        ...
+
+    @abstractmethod
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        ...
+
+    @abstractmethod
+    async def aembed_query(self, text: str) -> List[float]:
+        ...
+
+    @abstractmethod
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        ...
+
+
+class OpenAIEmbeddingBackend(EmbeddingBackend):
+    """OpenAIEmbeddings through langchain"""
+
+    name = "openai"
+
+    def __init__(self, model: str = EMBEDDING_MODEL):
+        # Imported here so the hash backend runs without langchain / network access
+        from langchain.embeddings.openai import OpenAIEmbeddings
+
+        self.model = model
+        # Retries (429s included) are left to embedding_scheduler so they respect the shared budget
+        self.client = OpenAIEmbeddings(model=model, max_retries=0)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.client.embed_query(text)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.client.embed_documents(texts)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return await self.client.aembed_query(text)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return await self.client.aembed_documents(texts)
+
+
+class HashEmbeddingBackend(EmbeddingBackend):
+    """
+    Deterministic offline embedder: each word is hashed to a signed dimension
+    (feature hashing) and the sum is L2-normalized. Texts sharing words score as
+    similar, so vector search and the semantic generation cache behave plausibly.
+    Every call (single text or batch) takes `latency` seconds.
+    """
+
+    name = "hash"
+    _WORD = re.compile(r"\w+")
+
+    def __init__(self, dimension: int = EMBEDDING_DIMENSION, latency: float = FAKE_EMBEDDING_LATENCY):
+        self.dimension = dimension
+        self.latency = latency
+        self.model = f"hash-{dimension}"
+        self.calls = 0
+
+    def _vector(self, text: str) -> List[float]:
+        vector = np.zeros(self.dimension, dtype=np.float32)
+        for word in self._WORD.findall(text.lower()):
+            digest = int.from_bytes(hashlib.blake2b(word.encode("utf-8"), digest_size=8).digest(), "little")
+            vector[(digest >> 1) % self.dimension] += 1.0 if digest & 1 else -1.0
+        norm = np.linalg.norm(vector)
+        if norm == 0:
+            vector[0] = 1.0  # empty / symbol-only text still gets a valid unit vector
+        else:
+            vector /= norm
+        return vector.tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        self.calls += 1
+        time.sleep(self.latency)
+        return self._vector(text)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.calls += 1
+        time.sleep(self.latency)
+        return [self._vector(t) for t in texts]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        return self._vector(text)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        return [self._vector(t) for t in texts]
+
+
+def embedding_model_name(backend: str = EMBEDDING_BACKEND) -> str:
+    """The `model` the configured backend will report, known without building it"""
+    return f"hash-{EMBEDDING_DIMENSION}" if backend == "hash" else EMBEDDING_MODEL
+
+
+def create_embedding_backend(backend: str = EMBEDDING_BACKEND) -> EmbeddingBackend:
+    """Build the configured backend ("openai" or "hash")"""
+    if backend == "openai":
+        return OpenAIEmbeddingBackend()
+    if backend == "hash":
+        return HashEmbeddingBackend()
+    raise ValueError(f"Unknown EMBEDDING_BACKEND: {backend}")
@@ -0,0 +1,155 @@
+import hashlib
+import threading
+import unicodedata
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List, Optional
+import numpy as np
+from bson import Binary
+from shared.db.mongo_db import get_database
+from app.config import EMBEDDING_CACHE_MAX_ENTRIES, EMBEDDING_CACHE_PERSIST, EMBEDDING_CACHE_COLLECTION_NAME
+
+
+def normalize_text(text: str) -> str:
+    """Canonical form used both as cache key input and as the text actually embedded"""
+    return " ".join(unicodedata.normalize("NFC", text or "").split())
+
+
+class EmbeddingCache:
+    """
+    Two-tier, content-addressed embedding cache.
+
+    Key: sha256(model + normalized text). Tier 1 is an in-process LRU of float32
+    vectors (thread-safe, since blocking ingestion runs on the I/O pool). Tier 2 is a
+    Mongo collection storing each vector as raw float32 bytes (6 KB for 1536 dims),
+    shared by every postgen process and surviving restarts. Tier 2 is only used from
+    async code and silently skipped when Mongo isn't connected.
+    """
+
+    def __init__(
+        self,
+        model: str,
+        max_entries: int = EMBEDDING_CACHE_MAX_ENTRIES,
+        persist: bool = EMBEDDING_CACHE_PERSIST,
+        collection_name: str = EMBEDDING_CACHE_COLLECTION_NAME,
+    ):
+        self.model = model
+        self.max_entries = max_entries
+        self.persist = persist
+        self.collection_name = collection_name
+        self._local: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._local_bytes = 0
+        self._lock = threading.Lock()
+        self.counters = {"local_hits": 0, "persistent_hits": 0, "misses": 0}
+
+    def key(self, normalized_text: str) -> str:
+        return hashlib.sha256(f"{self.model}\0{normalized_text}".encode("utf-8")).hexdigest()
+
+    def _collection(self):
+        if not self.persist:
+            return None
+        try:
+            return get_database()[self.collection_name]
+        except RuntimeError:
+            return None  # Mongo not connected (e.g. scripts) - in-process tier only
+
+    # ---- Tier 1 ----
+
+    def get_local(self, key: str) -> Optional[np.ndarray]:
+        with self._lock:
+            vector = self._local.get(key)
+            if vector is not None:
+                self._local.move_to_end(key)
+            return vector
+
+    def put_local(self, key: str, vector) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32)
+        with self._lock:
+            previous = self._local.pop(key, None)
+            if previous is not None:
+                self._local_bytes -= previous.nbytes
+            self._local[key] = vector
+            self._local_bytes += vector.nbytes
+            while len(self._local) > self.max_entries:
+                _, evicted = self._local.popitem(last=False)
+                self._local_bytes -= evicted.nbytes
+        return vector
+
+    def lookup_local(self, normalized_text: str) -> Optional[np.ndarray]:
+        """Sync lookup (tier 1 only), counting the hit or miss"""
+        vector = self.get_local(self.key(normalized_text))
+        self.counters["local_hits" if vector is not None else "misses"] += 1
+        return vector
+
+    # ---- Both tiers (async) ----
+
+    async def get_many(self, normalized_texts: List[str]) -> Dict[str, np.ndarray]:
+        """Return {text: vector} for every text found in either tier; tier-2 hits are promoted"""
+        found: Dict[str, np.ndarray] = {}
+        pending: Dict[str, str] = {}
+        for text in normalized_texts:
+            key = self.key(text)
+            vector = self.get_local(key)
+            if vector is not None:
+                found[text] = vector
+                self.counters["local_hits"] += 1
+            else:
+                pending[key] = text
+
+        collection = self._collection()
+        if pending and collection is not None:
+            try:
+                cursor = collection.find({"_id": {"$in": list(pending)}}, {"vector": 1})
+                async for doc in cursor:
+                    vector = self.put_local(doc["_id"], np.frombuffer(doc["vector"], dtype=np.float32))
+                    found[pending.pop(doc["_id"])] = vector
+                    self.counters["persistent_hits"] += 1
+            except Exception as e:
+                # The cache must never fail an embedding request - treat the rest as misses
+                print(f"Error reading embeddings from cache: {e}")
+
+        self.counters["misses"] += len(pending)
+        return found
+
+    async def put_many(self, vectors: Dict[str, List[float]]):
+        """Store freshly computed {normalized text: vector} pairs in both tiers"""
+        docs = []
+        now = datetime.utcnow()
+        for text, values in vectors.items():
+            key = self.key(text)
+            vector = self.put_local(key, values)
+            docs.append({
+                "_id": key,
+                "model": self.model,
+                "dim": int(vector.shape[0]),
+                "vector": Binary(vector.tobytes()),
+                "created_at": now,
+            })
+
+        collection = self._collection()
+        if docs and collection is not None:
+            try:
+                # Unordered so a duplicate key (another process got there first) doesn't stop the rest
+                await collection.insert_many(docs, ordered=False)
+            except Exception as e:
+                if "duplicate key" not in str(e).lower():
+                    print(f"Error persisting embeddings to cache: {e}")
+
+    async def stats(self) -> Dict[str, float]:
+        lookups = sum(self.counters.values())
+        hits = self.counters["local_hits"] + self.counters["persistent_hits"]
+        data = {
+            **self.counters,
+            "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+            "local_entries": len(self._local),
+            "local_bytes": self._local_bytes,
+        }
+        collection = self._collection()
+        if collection is not None:
+            try:
+                coll_stats = await collection.database.command("collStats", self.collection_name)
+                data["persistent_entries"] = coll_stats.get("count", 0)
+                data["persistent_bytes"] = coll_stats.get("size", 0)
+            except Exception as e:
+                data["persistent_error"] = str(e)
+        return data
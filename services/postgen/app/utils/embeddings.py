@@ -1,15 +1,78 @@
-from langchain.embeddings.openai import OpenAIEmbeddings
 import numpy as np
 from typing import List, Optional, Dict, Any
+from app.utils.embedding_backend import create_embedding_backend, embedding_model_name
+from app.utils.embedding_cache import EmbeddingCache, normalize_text
+from app.utils.model_scheduler import embedding_scheduler
+from app.utils.prompt import count_tokens
+from app.utils.readiness import LazyResource
 
-# Initialize OpenAI embeddings
-embeddings = OpenAIEmbeddings()
+# Embeddings backend selected by EMBEDDING_BACKEND (OpenAI, or the offline hash embedder), built on first use
+embeddings = LazyResource("embeddings", create_embedding_backend)
+
+# Content-addressed cache in front of the embeddings API (keyed by model + normalized text)
+embedding_cache = EmbeddingCache(model=embedding_model_name())
 
 def get_embedding(text: str) -> List[float]:
     """
-    Generate an embedding for the given text using OpenAI embeddings.
+    Generate an embedding for the given text with the configured backend.
+    Sync callers only see the in-process cache tier and bypass embedding_scheduler
+    (only legacy, off-loop code paths use the sync helpers).
+    """
+    text = normalize_text(text)
+    cached = embedding_cache.lookup_local(text)
+    if cached is not None:
+        return cached.tolist()
+    vector = embeddings.get().embed_query(text)
+    embedding_cache.put_local(embedding_cache.key(text), vector)
+    return vector
+
+async def aget_embedding(text: str) -> List[float]:
+    """
+    Async variant of get_embedding - uses the client's native async call so a slow
+    embedding request never blocks the event loop. Checks both cache tiers first.
+    """
+    text = normalize_text(text)
+    cached = await embedding_cache.get_many([text])
+    if text in cached:
+        return cached[text].tolist()
+    backend = await embeddings.aget()
+    vector = await embedding_scheduler.run(lambda: backend.aembed_query(text), count_tokens(text, backend.model))
+    await embedding_cache.put_many({text: vector})
+    return vector
+
+def get_embeddings(texts: List[str]) -> List[List[float]]:
+    """
+    Embed many texts with one embed_documents call (cache misses only), in input order.
+    """
+    texts = [normalize_text(t) for t in texts]
+    found = {}
+    for text in texts:
+        cached = embedding_cache.lookup_local(text)
+        if cached is not None:
+            found[text] = cached.tolist()
+    missing = list(dict.fromkeys(t for t in texts if t not in found))
+    if missing:
+        for text, vector in zip(missing, embeddings.get().embed_documents(missing)):
+            embedding_cache.put_local(embedding_cache.key(text), vector)
+            found[text] = vector
+    return [found[t] for t in texts]
+
+async def aget_embeddings(texts: List[str]) -> List[List[float]]:
+    """
+    Async variant of get_embeddings. Callers chunk large inputs themselves so they
+    can bound concurrency and act on each batch as soon as it is ready.
     """
-    return embeddings.embed_query(text)
+    texts = [normalize_text(t) for t in texts]
+    found = {text: vector.tolist() for text, vector in (await embedding_cache.get_many(texts)).items()}
+    missing = list(dict.fromkeys(t for t in texts if t not in found))
+    if missing:
+        backend = await embeddings.aget()
+        tokens = sum(count_tokens(t, backend.model) for t in missing)
+        vectors = await embedding_scheduler.run(lambda: backend.aembed_documents(missing), tokens)
+        fresh = dict(zip(missing, vectors))
+        await embedding_cache.put_many(fresh)
+        found.update(fresh)
+    return [found[t] for t in texts]
 
 def cosine_similarity(a: List[float], b: List[float]) -> float:
     """
@@ -21,11 +84,12 @@ def cosine_similarity(a: List[float], b: List[float]) -> float:
 
 def most_similar_post(user_posts: List[Dict[str, Any]], prompt_embedding: List[float]) -> Optional[str]:
     """
-    DEPRECATED: This function is now replaced by Pinecone vector search.
+    DEPRECATED: This function is now replaced by vector store search.
     Kept for backward compatibility.
     
     Find the most similar post to the given prompt embedding.
-    Now generates embeddings on-the-fly instead of expecting pre-stored embeddings.
+    Embeds all candidate posts in one batch call and scores them with a single
+    matrix-vector product.
 
     Args:
         user_posts: A list of user post dictionaries (each must have "text").
@@ -34,38 +98,28 @@ def most_similar_post(user_posts: List[Dict[str, Any]], prompt_embedding: List[f
     Returns:
         The text of the most similar post, or None if no valid posts are found.
     """
-    max_sim = -1
-    best_post = None
-
     print(f"[DEPRECATED] Analyzing {len(user_posts)} posts for style similarity...")
     print("Consider using PineconeService.find_similar_post() for better performance")
 
-    for i, post in enumerate(user_posts):
-        post_text = post.get("text")
-        if not post_text or len(post_text.strip()) < 10:  # Skip very short posts
-            continue
-
-        try:
-            # Generate embedding on-the-fly
-            print(f"Generating embedding for post {i+1}...")
-            post_embedding = get_embedding(post_text)
-            
-            # Calculate cosine similarity
-            sim = cosine_similarity(post_embedding, prompt_embedding)
-            print(f"Post {i+1} similarity: {sim:.3f}")
-            
-            if sim > max_sim:
-                max_sim = sim
-                best_post = post_text
-                print(f"New best post found with similarity: {sim:.3f}")
-                
-        except Exception as e:
-            print(f"Error generating embedding for post {i+1}: {e}")
-            continue
-
-    if best_post is None:
+    texts = [
+        post.get("text") for post in user_posts
+        if post.get("text") and len(post.get("text").strip()) >= 10  # Skip very short posts
+    ]
+    if not texts:
         print("No valid posts found for style matching")
         return None
-    
-    print(f"Best matching post found with similarity: {max_sim:.3f}")
-    return best_post
\ No newline at end of file
+
+    try:
+        matrix = np.asarray(get_embeddings(texts), dtype=np.float32)
+    except Exception as e:
+        print(f"Error generating embeddings for posts: {e}")
+        return None
+
+    query = np.asarray(prompt_embedding, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1) * np.linalg.norm(query)
+    norms[norms == 0] = 1.0
+    similarities = (matrix @ query) / norms
+    best = int(np.argmax(similarities))
+
+    print(f"Best matching post found with similarity: {similarities[best]:.3f}")
+    return texts[best]
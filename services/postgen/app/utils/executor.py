@@ -0,0 +1,22 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, TypeVar
+from app.config import BLOCKING_IO_WORKERS
+
+T = TypeVar("T")
+
+# Bounded pool reserved for blocking network clients. Using our own executor (rather
+# than the loop default) keeps a burst of slow vector-store calls from starving
+# anything else that relies on the default pool.
+blocking_io_executor = ThreadPoolExecutor(max_workers=BLOCKING_IO_WORKERS, thread_name_prefix="postgen-io")
+
+
+async def run_blocking(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run a blocking call on the I/O pool and await its result without blocking the event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(blocking_io_executor, partial(fn, *args, **kwargs))
+
+
+def shutdown_executor():
+    blocking_io_executor.shutdown(wait=False, cancel_futures=True)
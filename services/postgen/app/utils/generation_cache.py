@@ -0,0 +1,150 @@
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from app.config import (
+    GENERATION_CACHE_MAX_ENTRIES, GENERATION_CACHE_TTL, GENERATION_CACHE_SEMANTIC,
+    GENERATION_CACHE_SIMILARITY_THRESHOLD
+)
+from app.utils.embeddings import aget_embedding
+
+# Cache status values returned to callers
+EXACT = "exact"
+SEMANTIC = "semantic"
+MISS = "miss"
+BYPASS = "bypass"
+
+
+class _Entry:
+    __slots__ = ("variations", "group", "embedding", "expires_at")
+
+    def __init__(self, variations: List[str], group: str, embedding: Optional[np.ndarray], ttl: float):
+        self.variations = variations
+        self.group = group
+        self.embedding = embedding
+        self.expires_at = time.monotonic() + ttl
+
+
+class GenerationCache:
+    """
+    In-memory LRU cache of generated variations with a TTL.
+
+    Tier 1 is an exact match on the final built prompt (which already contains the
+    style and trending samples) plus user and parameters. Tier 2 compares the
+    embedding of the user's raw prompt against earlier prompts from the same user
+    with the same parameters and reuses the closest result when the cosine
+    similarity reaches `threshold`. That embedding is usually already in the
+    embedding cache from the style search, so tier 2 rarely costs an API call.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = GENERATION_CACHE_MAX_ENTRIES,
+        ttl: float = GENERATION_CACHE_TTL,
+        semantic: bool = GENERATION_CACHE_SEMANTIC,
+        threshold: float = GENERATION_CACHE_SIMILARITY_THRESHOLD,
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.semantic = semantic
+        self.threshold = threshold
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._groups: Dict[str, "OrderedDict[str, None]"] = {}
+        self.counters = {"exact_hits": 0, "semantic_hits": 0, "misses": 0, "bypasses": 0, "evictions": 0}
+
+    @staticmethod
+    def _hash(payload: Dict[str, Any]) -> str:
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def _keys(self, prepared) -> Tuple[str, str]:
+        """(exact key, semantic group) for a PreparedGeneration"""
+        params = {
+            "username": prepared.username,
+            "topic": prepared.topic,
+            "tone": prepared.tone,
+            "length": prepared.length,
+            "audience": prepared.audience,
+            "hashtag": prepared.hashtag,
+            "num_variations": prepared.num_variations,
+        }
+        group = self._hash(params)
+        return self._hash({**params, "final_prompt": prepared.final_prompt}), group
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            members = self._groups.get(entry.group)
+            if members is not None:
+                members.pop(key, None)
+                if not members:
+                    del self._groups[entry.group]
+
+    async def _prompt_embedding(self, prompt: str) -> Optional[np.ndarray]:
+        try:
+            vector = np.asarray(await aget_embedding(prompt), dtype=np.float32)
+        except Exception as e:
+            print(f"Error embedding prompt for generation cache: {e}")
+            return None
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else None
+
+    def _live(self, key: str) -> Optional[_Entry]:
+        entry = self._entries.get(key)
+        if entry is not None and entry.expires_at <= time.monotonic():
+            self._remove(key)
+            return None
+        return entry
+
+    async def lookup(self, prepared, bypass: bool = False) -> Tuple[Optional[List[str]], str]:
+        """Return (cached variations or None, cache status)"""
+        if bypass:
+            self.counters["bypasses"] += 1
+            return None, BYPASS
+
+        key, group = self._keys(prepared)
+        entry = self._live(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self.counters["exact_hits"] += 1
+            return list(entry.variations), EXACT
+
+        members = [k for k in list(self._groups.get(group, ())) if self._live(k) is not None]
+        candidates = [k for k in members if self._entries[k].embedding is not None]
+        if self.semantic and candidates:
+            query = await self._prompt_embedding(prepared.prompt)
+            if query is not None:
+                scores = np.stack([self._entries[k].embedding for k in candidates]) @ query
+                best = int(np.argmax(scores))
+                if scores[best] >= self.threshold:
+                    self._entries.move_to_end(candidates[best])
+                    self.counters["semantic_hits"] += 1
+                    return list(self._entries[candidates[best]].variations), SEMANTIC
+
+        self.counters["misses"] += 1
+        return None, MISS
+
+    async def store(self, prepared, variations: List[str]):
+        key, group = self._keys(prepared)
+        embedding = await self._prompt_embedding(prepared.prompt) if self.semantic else None
+        self._remove(key)
+        self._entries[key] = _Entry(list(variations), group, embedding, self.ttl)
+        self._groups.setdefault(group, OrderedDict())[key] = None
+        while len(self._entries) > self.max_entries:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.counters["evictions"] += 1
+
+    def stats(self) -> Dict[str, float]:
+        hits = self.counters["exact_hits"] + self.counters["semantic_hits"]
+        lookups = hits + self.counters["misses"]
+        return {
+            **self.counters,
+            "entries": len(self._entries),
+            "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+# Global cache used by run_generation and /generate/stream (see routes/generate.py)
+generation_cache = GenerationCache()
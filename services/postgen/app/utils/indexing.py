@@ -0,0 +1,128 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+
+from app.config import (
+    INDEXING_WORKERS, INDEXING_QUEUE_MAX_DEPTH, INDEXING_MAX_RETRIES, INDEXING_RETRY_BASE_DELAY
+)
+
+logger = logging.getLogger(__name__)
+
+
+class IndexingQueue:
+    """
+    Bounded queue of usernames whose posts should be (re-)indexed, served by a
+    fixed pool of asyncio workers.
+
+    A user already waiting is not queued twice, and `enqueue` returns False once
+    `max_depth` users are waiting so producers can back off; the lazy sync in
+    /generate still covers anything dropped. Failed syncs are retried with
+    exponential backoff up to `max_retries` times.
+    """
+
+    def __init__(
+        self,
+        workers: int = INDEXING_WORKERS,
+        max_depth: int = INDEXING_QUEUE_MAX_DEPTH,
+        max_retries: int = INDEXING_MAX_RETRIES,
+        retry_base_delay: float = INDEXING_RETRY_BASE_DELAY,
+    ):
+        self.workers = workers
+        self.max_depth = max_depth
+        self.max_retries = max_retries
+        self.retry_base_delay = retry_base_delay
+        self._queue: Optional[asyncio.Queue] = None
+        self._pending: Set[str] = set()
+        self._tasks: List[asyncio.Task] = []
+        self._handler: Optional[Callable[[str], Awaitable[object]]] = None
+        self.counters = {"enqueued": 0, "deduplicated": 0, "rejected": 0, "indexed": 0, "retries": 0, "failed": 0}
+
+    def start(self, handler: Callable[[str], Awaitable[object]]):
+        """Spawn the workers; `handler(username)` indexes one user and raises on failure"""
+        self._handler = handler
+        self._queue = asyncio.Queue(maxsize=self.max_depth)
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+        logger.info(f"Started {self.workers} indexing workers (queue depth {self.max_depth})")
+
+    def watch(self, source: Callable[["IndexingQueue"], Awaitable[None]]):
+        """Run an extra producer (e.g. a change stream) alongside the workers until stop()"""
+        self._tasks.append(asyncio.create_task(source(self)))
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def enqueue(self, username: str) -> bool:
+        """Queue a user for indexing; False means the queue is full (try again later)"""
+        if self._queue is None:
+            raise RuntimeError("Indexing queue not started")
+        if username in self._pending:
+            self.counters["deduplicated"] += 1
+            return True
+        try:
+            self._queue.put_nowait(username)
+        except asyncio.QueueFull:
+            self.counters["rejected"] += 1
+            return False
+        self._pending.add(username)
+        self.counters["enqueued"] += 1
+        return True
+
+    async def _index_with_retries(self, username: str):
+        for attempt in range(self.max_retries + 1):
+            try:
+                await self._handler(username)
+                self.counters["indexed"] += 1
+                return
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if attempt == self.max_retries:
+                    self.counters["failed"] += 1
+                    logger.error(f"Giving up indexing {username} after {attempt + 1} attempts: {e}")
+                    return
+                delay = self.retry_base_delay * (2 ** attempt)
+                self.counters["retries"] += 1
+                logger.warning(f"Indexing {username} failed ({e}); retrying in {delay:.0f}s")
+                await asyncio.sleep(delay)
+
+    async def _worker(self, worker_id: int):
+        while True:
+            username = await self._queue.get()
+            # Cleared before running so posts saved mid-sync queue a fresh pass
+            self._pending.discard(username)
+            try:
+                await self._index_with_retries(username)
+            finally:
+                self._queue.task_done()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "workers": self.workers,
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "max_depth": self.max_depth,
+            **self.counters,
+        }
+
+
+async def watch_posts_collection(queue: IndexingQueue, db, collection_name: str):
+    """Feed the queue from a MongoDB change stream on the scraped posts collection"""
+    pipeline = [{"$match": {"operationType": {"$in": ["insert", "update", "replace"]}}}]
+    try:
+        async with db[collection_name].watch(pipeline, full_document="updateLookup") as stream:
+            logger.info(f"Watching {collection_name} for new posts")
+            async for change in stream:
+                username = (change.get("fullDocument") or {}).get("username")
+                if username and not queue.enqueue(username):
+                    logger.warning(f"Indexing queue full, dropped change for {username}")
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        # Standalone MongoDB has no change streams - the scraper's notify call still works
+        logger.error(f"Posts change stream stopped: {e}")
+
+
+# Global queue for POST /postgen/index/{username}; workers are started in main.py
+indexing_queue = IndexingQueue()
@@ -0,0 +1,156 @@
+import asyncio
+import logging
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from app.config import GENERATION_WORKERS, GENERATION_QUEUE_MAX_DEPTH, GENERATION_JOB_TTL
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+TERMINAL_STATES = (SUCCEEDED, FAILED)
+
+
+class QueueFullError(Exception):
+    """Raised when a job is submitted while the queue is at its maximum depth"""
+
+
+class Job:
+    """A single queued unit of work and its outcome"""
+
+    def __init__(self, username: str, payload: Any):
+        self.id = uuid.uuid4().hex
+        self.username = username
+        self.payload = payload
+        self.status = QUEUED
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._changed = asyncio.Event()
+
+    def _set_status(self, status: str):
+        self.status = status
+        # Wake everyone waiting on the current event, then arm a fresh one
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def changed_event(self) -> asyncio.Event:
+        """Event set on the next status change - grab it *before* reading the status"""
+        return self._changed
+
+    @property
+    def done(self) -> bool:
+        return self.status in TERMINAL_STATES
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "username": self.username,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+class JobQueue:
+    """
+    Bounded in-process job queue served by a fixed pool of asyncio workers.
+
+    `submit` never blocks: once `max_depth` jobs are waiting it raises QueueFullError
+    so the route can answer 503 right away. Finished jobs stay pollable for `ttl`
+    seconds and are pruned lazily on the next submit.
+    """
+
+    def __init__(
+        self,
+        workers: int = GENERATION_WORKERS,
+        max_depth: int = GENERATION_QUEUE_MAX_DEPTH,
+        ttl: float = GENERATION_JOB_TTL,
+    ):
+        self.workers = workers
+        self.max_depth = max_depth
+        self.ttl = ttl
+        self._queue: Optional[asyncio.Queue] = None
+        self._jobs: Dict[str, Job] = {}
+        self._worker_tasks: List[asyncio.Task] = []
+        self._handler: Optional[Callable[[Any], Awaitable[Dict[str, Any]]]] = None
+
+    def start(self, handler: Callable[[Any], Awaitable[Dict[str, Any]]]):
+        """Spawn the workers; `handler(payload)` produces a job's result"""
+        self._handler = handler
+        self._queue = asyncio.Queue(maxsize=self.max_depth)
+        self._worker_tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+        logger.info(f"Started {self.workers} job workers (queue depth {self.max_depth})")
+
+    async def stop(self):
+        for task in self._worker_tasks:
+            task.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
+
+    def _prune(self):
+        cutoff = time.time() - self.ttl
+        expired = [job_id for job_id, job in self._jobs.items() if job.done and job.finished_at < cutoff]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def submit(self, username: str, payload: Any) -> Job:
+        if self._queue is None:
+            raise RuntimeError("Job queue not started")
+        self._prune()
+        job = Job(username, payload)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise QueueFullError(f"Generation queue is full ({self.max_depth} jobs waiting)")
+        self._jobs[job.id] = job
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    async def _worker(self, worker_id: int):
+        while True:
+            job = await self._queue.get()
+            job.started_at = time.time()
+            job._set_status(RUNNING)
+            try:
+                job.result = await self._handler(job.payload)
+                job.finished_at = time.time()
+                job._set_status(SUCCEEDED)
+            except asyncio.CancelledError:
+                job.error = "Worker shut down before the job finished"
+                job.finished_at = time.time()
+                job._set_status(FAILED)
+                raise
+            except Exception as e:
+                logger.error(f"Job {job.id} failed in worker {worker_id}: {e}")
+                job.error = str(getattr(e, "detail", None) or e)
+                job.finished_at = time.time()
+                job._set_status(FAILED)
+            finally:
+                self._queue.task_done()
+
+    def stats(self) -> Dict[str, int]:
+        counts = {QUEUED: 0, RUNNING: 0, SUCCEEDED: 0, FAILED: 0}
+        for job in self._jobs.values():
+            counts[job.status] += 1
+        return {
+            "workers": len(self._worker_tasks),
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "max_depth": self.max_depth,
+            **counts,
+        }
+
+
+# Global queue for POST /postgen/jobs; workers are started in main.py
+generation_jobs = JobQueue()
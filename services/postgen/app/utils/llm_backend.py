@@ -0,0 +1,99 @@
+import asyncio
+import hashlib
+import random
+from abc import ABC, abstractmethod
+from typing import AsyncIterator
+from app.config import (
+    LLM_BACKEND, LLM_MODEL, FAKE_LLM_LATENCY, FAKE_LLM_TOKEN_LATENCY, FAKE_LLM_TOKENS
+)
+
+
+class LLMBackend(ABC):
+    """
+    Text generation for a finished prompt. `variation` numbers the concurrent
+    completions of one request; real models ignore it (temperature varies them).
+    """
+
+    name = "base"
+
+    @abstractmethod
+    async def agenerate(self, prompt: str, variation: int = 1) -> str:
+        ...
+
+    @abstractmethod
+    def astream(self, prompt: str, variation: int = 1) -> AsyncIterator[str]:
+        """Yield the completion in chunks as the model produces them"""
+
+
+class OpenAIChatBackend(LLMBackend):
+    """ChatOpenAI through langchain (the chain's template is just "{prompt}")"""
+
+    name = "openai"
+
+    def __init__(self, model: str = LLM_MODEL, temperature: float = 0.7):
+        # Imported here so the fake backend runs without langchain / network access
+        from langchain.chat_models import ChatOpenAI
+        from langchain.chains import LLMChain
+        from langchain.prompts import PromptTemplate
+
+        self.model = model
+        # Retries (429s included) are left to llm_scheduler so they respect the shared budget
+        self.llm = ChatOpenAI(model=model, temperature=temperature, max_retries=0)
+        self.chain = LLMChain(llm=self.llm, prompt=PromptTemplate(input_variables=["prompt"], template="{prompt}"))
+
+    async def agenerate(self, prompt: str, variation: int = 1) -> str:
+        return await self.chain.arun(prompt=prompt)
+
+    async def astream(self, prompt: str, variation: int = 1) -> AsyncIterator[str]:
+        async for chunk in self.llm.astream(prompt):
+            if chunk.content:
+                yield chunk.content
+
+
+class FakeLLMBackend(LLMBackend):
+    """
+    Offline stand-in for load tests: the same (prompt, variation) always yields the
+    same text, after `latency` seconds to the first token and `token_latency` per
+    token after that - streamed or not.
+    """
+
+    name = "fake"
+    _VOCABULARY = (
+        "team", "shipping", "growth", "lesson", "customers", "data", "product", "learned", "today",
+        "build", "trust", "leaders", "simple", "week", "launch", "feedback", "hiring", "focus",
+    )
+
+    def __init__(self, latency: float = FAKE_LLM_LATENCY, token_latency: float = FAKE_LLM_TOKEN_LATENCY,
+                 tokens: int = FAKE_LLM_TOKENS):
+        self.model = "fake"
+        self.latency = latency
+        self.token_latency = token_latency
+        self.tokens = tokens
+        self.calls = 0
+
+    def _words(self, prompt: str, variation: int):
+        seed = hashlib.sha256(f"{variation}\0{prompt}".encode("utf-8")).digest()
+        rng = random.Random(seed)
+        return [rng.choice(self._VOCABULARY) for _ in range(self.tokens)]
+
+    async def agenerate(self, prompt: str, variation: int = 1) -> str:
+        self.calls += 1
+        await asyncio.sleep(self.latency + self.token_latency * max(0, self.tokens - 1))
+        return " ".join(self._words(prompt, variation))
+
+    async def astream(self, prompt: str, variation: int = 1) -> AsyncIterator[str]:
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        for i, word in enumerate(self._words(prompt, variation)):
+            if i:
+                await asyncio.sleep(self.token_latency)
+            yield word if i == 0 else f" {word}"
+
+
+def create_llm_backend(backend: str = LLM_BACKEND) -> LLMBackend:
+    """Build the configured backend ("openai" or "fake")"""
+    if backend == "openai":
+        return OpenAIChatBackend()
+    if backend == "fake":
+        return FakeLLMBackend()
+    raise ValueError(f"Unknown LLM_BACKEND: {backend}")
@@ -0,0 +1,259 @@
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import numpy as np
+from app.config import (
+    EMBEDDING_DIMENSION, LOCAL_VECTOR_STORE_PATH, LOCAL_VECTOR_STORE_IVF, LOCAL_VECTOR_IVF_MIN_VECTORS,
+    LOCAL_VECTOR_IVF_NPROBE
+)
+from app.utils.vector_store import VectorMatch, VectorStore
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (matrix / norms).astype(np.float32, copy=False)
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest scores, best first, without sorting the whole array"""
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    idx = np.argpartition(-scores, k - 1)[:k]
+    return idx[np.argsort(-scores[idx])]
+
+
+class IVFIndex:
+    """
+    Inverted-file index over a normalized matrix: spherical k-means splits the rows
+    into ~sqrt(n) clusters and a query only scores the rows of its `nprobe` closest
+    clusters. Approximate - recall depends on nprobe.
+    """
+
+    def __init__(self, matrix: np.ndarray, nlist: Optional[int] = None, iterations: int = 10, seed: int = 0):
+        n = matrix.shape[0]
+        self.nlist = max(1, min(nlist or int(np.sqrt(n)), n))
+        rng = np.random.default_rng(seed)
+
+        # Train on a sample (plenty for k-means), then assign every row once
+        sample_size = min(n, self.nlist * 64)
+        sample = np.asarray(matrix[rng.choice(n, sample_size, replace=False)])
+        centroids = sample[rng.choice(sample_size, self.nlist, replace=False)].copy()
+        for _ in range(iterations):
+            assign = np.argmax(sample @ centroids.T, axis=1)
+            for c in range(self.nlist):
+                members = sample[assign == c]
+                if len(members):
+                    centroids[c] = members.sum(axis=0)
+                else:
+                    centroids[c] = sample[rng.integers(sample_size)]  # re-seed an empty cluster
+            centroids = _normalize_rows(centroids)
+        self.centroids = centroids
+
+        assign = np.empty(n, dtype=np.int64)
+        for start in range(0, n, 16384):  # chunked to bound the n x nlist score matrix
+            assign[start:start + 16384] = np.argmax(np.asarray(matrix[start:start + 16384]) @ centroids.T, axis=1)
+        order = np.argsort(assign, kind="stable")
+        bounds = np.searchsorted(assign[order], np.arange(self.nlist + 1))
+        self.lists = [order[bounds[c]:bounds[c + 1]] for c in range(self.nlist)]
+
+    def candidates(self, query: np.ndarray, nprobe: int) -> np.ndarray:
+        probe = _top_k(self.centroids @ query, nprobe)
+        return np.concatenate([self.lists[c] for c in probe])
+
+
+class _UserVectors:
+    """One user's vectors: a normalized float32 matrix (memory-mapped once persisted) plus ids/metadata"""
+
+    def __init__(self, username: str, ids: List[str], metadata: List[Dict[str, Any]], matrix: np.ndarray):
+        self.username = username
+        self.ids = ids
+        self.metadata = metadata
+        self.matrix = matrix
+        self.rows = {vector_id: row for row, vector_id in enumerate(ids)}
+        self.ivf: Optional[IVFIndex] = None
+
+
+class LocalVectorStore(VectorStore):
+    """
+    In-process vector search with NumPy, for offline / on-prem runs and tests.
+
+    Each user's vectors are L2-normalized once at upsert time, so a top-k query is a
+    single matrix-vector product (cosine similarity) plus argpartition. With `ivf`
+    enabled, users with at least `ivf_min_vectors` vectors are searched through an
+    IVFIndex instead. Matrices are saved as .npy files under `path` and opened with
+    mmap_mode="r", so the OS page cache - not the Python heap - holds them.
+    """
+
+    name = "local"
+
+    def __init__(
+        self,
+        path: str = LOCAL_VECTOR_STORE_PATH,
+        dimension: int = EMBEDDING_DIMENSION,
+        ivf: bool = LOCAL_VECTOR_STORE_IVF,
+        ivf_min_vectors: int = LOCAL_VECTOR_IVF_MIN_VECTORS,
+        nprobe: int = LOCAL_VECTOR_IVF_NPROBE,
+    ):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.dimension = dimension
+        self.ivf = ivf
+        self.ivf_min_vectors = ivf_min_vectors
+        self.nprobe = nprobe
+        self._users: Dict[str, Optional[_UserVectors]] = {}
+        self._lock = threading.Lock()
+
+    # ---- Persistence ----
+
+    def _files(self, username: str):
+        key = hashlib.sha1(username.encode("utf-8")).hexdigest()
+        return self.path / f"{key}.npy", self.path / f"{key}.json"
+
+    def _load(self, username: str) -> Optional[_UserVectors]:
+        if username in self._users:
+            return self._users[username]
+        matrix_file, meta_file = self._files(username)
+        user = None
+        if meta_file.exists() and matrix_file.exists():
+            meta = json.loads(meta_file.read_text())
+            user = _UserVectors(username, meta["ids"], meta["metadata"], np.load(matrix_file, mmap_mode="r"))
+        self._users[username] = user
+        return user
+
+    def _save(self, username: str, ids, metadata, matrix: np.ndarray) -> _UserVectors:
+        matrix_file, meta_file = self._files(username)
+        # Write-then-rename so a crash never leaves a half-written file behind
+        tmp_matrix = matrix_file.with_suffix(".tmp.npy")
+        np.save(tmp_matrix, matrix)
+        os.replace(tmp_matrix, matrix_file)
+        tmp_meta = meta_file.with_suffix(".tmp")
+        tmp_meta.write_text(json.dumps({"username": username, "ids": ids, "metadata": metadata}))
+        os.replace(tmp_meta, meta_file)
+        return _UserVectors(username, ids, metadata, np.load(matrix_file, mmap_mode="r"))
+
+    def _all_usernames(self) -> List[str]:
+        names = {name for name, user in self._users.items() if user is not None}
+        for meta_file in self.path.glob("*.json"):
+            names.add(json.loads(meta_file.read_text())["username"])
+        return sorted(names)
+
+    # ---- VectorStore ----
+
+    def upsert(self, username: str, vectors: List[Dict[str, Any]]) -> None:
+        if not vectors:
+            return
+        incoming = _normalize_rows(np.asarray([v["values"] for v in vectors], dtype=np.float32))
+        if incoming.shape[1] != self.dimension:
+            raise ValueError(f"Expected {self.dimension}-dim vectors, got {incoming.shape[1]}")
+
+        with self._lock:
+            user = self._load(username)
+            ids = list(user.ids) if user else []
+            metadata = list(user.metadata) if user else []
+            rows = dict(user.rows) if user else {}
+            matrix = np.array(user.matrix) if user else np.empty((0, self.dimension), dtype=np.float32)
+
+            existing = len(ids)
+            new_rows = []
+            for vector, values in zip(vectors, incoming):
+                row = rows.get(vector["id"])
+                if row is None:
+                    rows[vector["id"]] = len(ids)
+                    new_rows.append(values)
+                    ids.append(vector["id"])
+                    metadata.append(vector.get("metadata", {}))
+                else:
+                    if row < existing:
+                        matrix[row] = values
+                    else:
+                        new_rows[row - existing] = values  # repeated id within this upsert
+                    metadata[row] = vector.get("metadata", {})
+            if new_rows:
+                matrix = np.vstack([matrix, np.asarray(new_rows, dtype=np.float32)])
+
+            # Readers keep using the previous snapshot until this swap
+            self._users[username] = self._save(username, ids, metadata, matrix)
+
+    def _query_user(self, user: _UserVectors, query: np.ndarray, top_k: int) -> List[VectorMatch]:
+        if self.ivf and len(user.ids) >= self.ivf_min_vectors:
+            if user.ivf is None:
+                user.ivf = IVFIndex(user.matrix)
+            rows = user.ivf.candidates(query, self.nprobe)
+            scores = user.matrix[rows] @ query
+            best = rows[_top_k(scores, top_k)]
+            best_scores = user.matrix[best] @ query
+        else:
+            scores = user.matrix @ query
+            best = _top_k(scores, top_k)
+            best_scores = scores[best]
+        return [
+            VectorMatch(user.ids[row], float(score), user.metadata[row])
+            for row, score in zip(best, best_scores)
+        ]
+
+    def query(self, username: Optional[str], vector: List[float], top_k: int = 1) -> List[VectorMatch]:
+        query = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm == 0:
+            query = np.zeros_like(query)
+        else:
+            query = query / norm
+
+        usernames = [username] if username else self._all_usernames()
+        matches: List[VectorMatch] = []
+        for name in usernames:
+            with self._lock:
+                user = self._load(name)
+            if user is not None and user.ids:
+                matches.extend(self._query_user(user, query, top_k))
+        return sorted(matches, key=lambda m: m.score, reverse=True)[:top_k]
+
+    def has_user(self, username: str) -> bool:
+        with self._lock:
+            user = self._load(username)
+        return bool(user and user.ids)
+
+    def delete(self, username: str, ids: List[str]) -> None:
+        with self._lock:
+            user = self._load(username)
+            if user is None:
+                return
+            doomed = {user.rows[i] for i in ids if i in user.rows}
+            if not doomed:
+                return
+            keep = [row for row in range(len(user.ids)) if row not in doomed]
+            self._users[username] = self._save(
+                username,
+                [user.ids[row] for row in keep],
+                [user.metadata[row] for row in keep],
+                np.array(user.matrix[keep]),
+            )
+
+    def delete_user(self, username: str) -> int:
+        with self._lock:
+            user = self._load(username)
+            for file in self._files(username):
+                file.unlink(missing_ok=True)
+            self._users[username] = None
+        return len(user.ids) if user else 0
+
+    def stats(self) -> Dict[str, Any]:
+        usernames = self._all_usernames()
+        total = 0
+        for name in usernames:
+            with self._lock:
+                user = self._load(name)
+            total += len(user.ids) if user else 0
+        return {
+            "backend": self.name,
+            "total_vectors": total,
+            "dimension": self.dimension,
+            "users": len(usernames),
+            "bytes_on_disk": sum(f.stat().st_size for f in self.path.glob("*.npy")),
+            "ivf": self.ivf,
+        }
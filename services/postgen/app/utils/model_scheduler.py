@@ -0,0 +1,287 @@
+import asyncio
+import logging
+import random
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, Optional, Tuple, TypeVar
+
+from app.config import (
+    LLM_REQUESTS_PER_MINUTE, LLM_TOKENS_PER_MINUTE, LLM_MAX_CONCURRENCY, EMBEDDING_REQUESTS_PER_MINUTE,
+    EMBEDDING_TOKENS_PER_MINUTE, EMBEDDING_MAX_INFLIGHT, MODEL_MAX_RETRIES, MODEL_RETRY_BASE_DELAY
+)
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Lower runs first
+PRIORITY_INTERACTIVE = 0  # /generate and /generate/stream - someone is waiting on the response
+PRIORITY_QUEUED = 1  # background generation jobs
+PRIORITY_BACKGROUND = 2  # vector (re-)indexing
+
+_WINDOW = 60.0  # provider limits are per minute
+
+# (priority, user) of the work running in the current task; inherited by tasks it creates
+_model_context: ContextVar[Tuple[int, str]] = ContextVar("model_context", default=(PRIORITY_INTERACTIVE, ""))
+
+
+def set_model_context(priority: Optional[int] = None, user: Optional[str] = None):
+    """Tag model calls made from the current task (and tasks it spawns) with a priority and/or user"""
+    current_priority, current_user = _model_context.get()
+    _model_context.set((current_priority if priority is None else priority, current_user if user is None else user))
+
+
+def is_rate_limited(exc: BaseException) -> bool:
+    """Whether a provider error is a 429, across openai SDK versions and langchain wrappers"""
+    status = getattr(exc, "status_code", None) or getattr(exc, "http_status", None)
+    return status == 429 or type(exc).__name__ == "RateLimitError"
+
+
+def _retry_after(exc: BaseException) -> Optional[float]:
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None) or getattr(exc, "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class _Ticket:
+    __slots__ = ("priority", "user", "tokens", "future", "enqueued_at")
+
+    def __init__(self, priority: int, user: str, tokens: int, future: asyncio.Future):
+        self.priority = priority
+        self.user = user
+        self.tokens = tokens
+        self.future = future
+        self.enqueued_at = time.monotonic()
+
+
+class ModelScheduler:
+    """
+    Admission control for one rate-limited model API (requests and tokens per minute).
+
+    Calls wait in a queue ordered by priority; within a priority, users take turns
+    (round robin) so one user's burst can't starve the others. A call is admitted
+    when the sliding one-minute window has room for one more request and its
+    estimated tokens, and fewer than `max_concurrency` calls are in flight. A 429
+    pauses admissions for everyone (the limit is shared) and the call is retried
+    with exponential backoff, honouring Retry-After when the provider sends it.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        requests_per_minute: int,
+        tokens_per_minute: int,
+        max_concurrency: int,
+        max_retries: int = MODEL_MAX_RETRIES,
+        retry_base_delay: float = MODEL_RETRY_BASE_DELAY,
+    ):
+        self.name = name
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.retry_base_delay = retry_base_delay
+        self._queues: Dict[int, "OrderedDict[str, Deque[_Ticket]]"] = {}
+        self._window: Deque[Tuple[float, int]] = deque()  # (admitted at, tokens)
+        self._window_tokens = 0
+        self._inflight = 0
+        self._paused_until = 0.0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._waits: Deque[float] = deque(maxlen=1000)  # seconds queued, most recent calls
+        self.counters = {"admitted": 0, "completed": 0, "failed": 0, "rate_limited": 0, "retries": 0}
+
+    # ---- Queue ----
+
+    def _enqueue(self, tokens: int) -> _Ticket:
+        priority, user = _model_context.get()
+        ticket = _Ticket(priority, user, tokens, asyncio.get_running_loop().create_future())
+        self._queues.setdefault(priority, OrderedDict()).setdefault(user, deque()).append(ticket)
+        self._dispatch()
+        return ticket
+
+    def _remove(self, ticket: _Ticket):
+        users = self._queues.get(ticket.priority, {})
+        tickets = users.get(ticket.user)
+        if tickets and ticket in tickets:
+            tickets.remove(ticket)
+            if not tickets:
+                del users[ticket.user]
+        self._dispatch()  # a cancelled head-of-line call may have been blocking others
+
+    def _next(self) -> Optional[_Ticket]:
+        for priority in sorted(self._queues):
+            users = self._queues[priority]
+            if users:
+                return next(iter(users.values()))[0]
+        return None
+
+    def _pop(self, ticket: _Ticket):
+        users = self._queues[ticket.priority]
+        tickets = users[ticket.user]
+        tickets.popleft()
+        if tickets:
+            users.move_to_end(ticket.user)  # the next turn goes to another user
+        else:
+            del users[ticket.user]
+
+    # ---- Admission ----
+
+    def _trim_window(self, now: float):
+        while self._window and now - self._window[0][0] >= _WINDOW:
+            _, tokens = self._window.popleft()
+            self._window_tokens -= tokens
+
+    def _wait_time(self, ticket: _Ticket, now: float) -> float:
+        """Seconds until `ticket` fits the per-minute budgets (0 = admit now)"""
+        if now < self._paused_until:
+            return self._paused_until - now
+        if len(self._window) >= self.requests_per_minute:
+            return self._window[0][0] + _WINDOW - now
+        # A call bigger than the whole budget runs alone rather than never
+        if self._window and self._window_tokens + ticket.tokens > self.tokens_per_minute:
+            freed = 0
+            for admitted_at, tokens in self._window:
+                freed += tokens
+                if self._window_tokens - freed + ticket.tokens <= self.tokens_per_minute:
+                    return admitted_at + _WINDOW - now
+            return self._window[-1][0] + _WINDOW - now
+        return 0.0
+
+    def _dispatch(self):
+        now = time.monotonic()
+        self._trim_window(now)
+        while self._inflight < self.max_concurrency:
+            ticket = self._next()
+            if ticket is None:
+                return
+            if ticket.future.done():  # cancelled while queued
+                self._pop(ticket)
+                continue
+            delay = self._wait_time(ticket, now)
+            if delay > 0:
+                # Strict priority order: nothing jumps ahead of a call that is waiting for budget
+                self._schedule(delay)
+                return
+            self._pop(ticket)
+            self._window.append((now, ticket.tokens))
+            self._window_tokens += ticket.tokens
+            self._inflight += 1
+            self.counters["admitted"] += 1
+            self._waits.append(now - ticket.enqueued_at)
+            ticket.future.set_result(None)
+
+    def _schedule(self, delay: float):
+        loop = asyncio.get_running_loop()
+        when = loop.time() + delay
+        if self._timer is not None and not self._timer.cancelled() and self._timer.when() <= when:
+            return
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = loop.call_at(when, self._on_timer)
+
+    def _on_timer(self):
+        self._timer = None
+        self._dispatch()
+
+    def _release(self):
+        self._inflight -= 1
+        self._dispatch()
+
+    @asynccontextmanager
+    async def acquire(self, tokens: int = 0):
+        """Hold one admitted call for the duration of the block"""
+        ticket = self._enqueue(tokens)
+        try:
+            await ticket.future
+        except BaseException:
+            if ticket.future.done() and not ticket.future.cancelled():
+                self._release()  # admitted just as the caller went away
+            else:
+                ticket.future.cancel()
+                self._remove(ticket)
+            raise
+        try:
+            yield
+        finally:
+            self._release()
+
+    # ---- Retries ----
+
+    def _backoff(self, exc: BaseException, attempt: int) -> float:
+        """Pause admissions after a 429 and return how long the caller should wait"""
+        self.counters["rate_limited"] += 1
+        delay = _retry_after(exc) or self.retry_base_delay * (2 ** attempt) * (1 + random.random() * 0.25)
+        self._paused_until = max(self._paused_until, time.monotonic() + delay)
+        logger.warning(f"[{self.name}] Rate limited (attempt {attempt + 1}), pausing for {delay:.1f}s")
+        return delay
+
+    async def run(self, call: Callable[[], Awaitable[T]], tokens: int = 0) -> T:
+        """Run `call()` once admitted, retrying 429s with backoff"""
+        for attempt in range(self.max_retries + 1):
+            try:
+                async with self.acquire(tokens):
+                    result = await call()
+                self.counters["completed"] += 1
+                return result
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if not is_rate_limited(e) or attempt == self.max_retries:
+                    self.counters["failed"] += 1
+                    raise
+                self.counters["retries"] += 1
+                await asyncio.sleep(self._backoff(e, attempt))
+
+    async def stream(self, call: Callable[[], AsyncIterator[T]], tokens: int = 0) -> AsyncIterator[T]:
+        """Like run() for a streaming call; a 429 is only retried before the first chunk arrives"""
+        for attempt in range(self.max_retries + 1):
+            started = False
+            try:
+                async with self.acquire(tokens):
+                    async for chunk in call():
+                        started = True
+                        yield chunk
+                self.counters["completed"] += 1
+                return
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if started or not is_rate_limited(e) or attempt == self.max_retries:
+                    self.counters["failed"] += 1
+                    raise
+                self.counters["retries"] += 1
+                await asyncio.sleep(self._backoff(e, attempt))
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        self._trim_window(now)
+        waits = sorted(self._waits)
+        return {
+            "queued": {
+                str(priority): sum(len(tickets) for tickets in users.values())
+                for priority, users in sorted(self._queues.items())
+            },
+            "queued_users": sum(len(users) for users in self._queues.values()),
+            "inflight": self._inflight,
+            "max_concurrency": self.max_concurrency,
+            "requests_last_minute": len(self._window),
+            "requests_per_minute": self.requests_per_minute,
+            "tokens_last_minute": self._window_tokens,
+            "tokens_per_minute": self.tokens_per_minute,
+            "paused_for": round(max(0.0, self._paused_until - now), 2),
+            "wait_p50_ms": round(waits[len(waits) // 2] * 1000, 1) if waits else 0.0,
+            "wait_p95_ms": round(waits[max(0, int(len(waits) * 0.95) - 1)] * 1000, 1) if waits else 0.0,
+            "wait_max_ms": round(waits[-1] * 1000, 1) if waits else 0.0,
+            **self.counters,
+        }
+
+
+llm_scheduler = ModelScheduler("llm", LLM_REQUESTS_PER_MINUTE, LLM_TOKENS_PER_MINUTE, LLM_MAX_CONCURRENCY)
+embedding_scheduler = ModelScheduler(
+    "embeddings", EMBEDDING_REQUESTS_PER_MINUTE, EMBEDDING_TOKENS_PER_MINUTE, EMBEDDING_MAX_INFLIGHT
+)
@@ -1,105 +1,65 @@
-from pinecone import Pinecone, ServerlessSpec
+import asyncio
 from typing import List, Dict, Any, Optional
-import uuid
-import time
-from app.config import PINECONE_API_KEY, PINECONE_ENVIRONMENT, PINECONE_INDEX_NAME
-from app.utils.embeddings import get_embedding
+import hashlib
+from app.config import EMBEDDING_BATCH_SIZE, EMBEDDING_MAX_CONCURRENCY
+from app.utils.embeddings import get_embedding, aget_embedding, aget_embeddings
+from app.utils.executor import run_blocking
+from app.utils.vector_registry import vector_registry
+from app.utils.vector_store import VectorStore, vector_store
 
 class PineconeService:
-    def __init__(self):
-        self.pc = None
-        self.index = None
-        self.initialize_pinecone()
-    
-    def initialize_pinecone(self):
-        """Initialize Pinecone connection and index"""
-        try:
-            # New way to connect
-            self.pc = Pinecone(api_key=PINECONE_API_KEY)
-
-            # List existing indexes
-            existing_indexes = [i["name"] for i in self.pc.list_indexes()]
-
-            # Create index if it doesn't exist
-            if PINECONE_INDEX_NAME not in existing_indexes:
-                print(f"Creating Pinecone index: {PINECONE_INDEX_NAME}")
-                self.pc.create_index(
-                    name=PINECONE_INDEX_NAME,
-                    dimension=1536,  # OpenAI embedding dimension
-                    metric="cosine",
-                    spec=ServerlessSpec(
-                        cloud="aws",      # adjust if needed
-                        region=PINECONE_ENVIRONMENT  # make sure this matches your .env
-                    ),
-                )
-                # Wait for index to be ready
-                while PINECONE_INDEX_NAME not in [
-                    i["name"] for i in self.pc.list_indexes()
-                ]:
-                    time.sleep(1)
-
-            self.index = self.pc.Index(PINECONE_INDEX_NAME)
-            print(f"Connected to Pinecone index: {PINECONE_INDEX_NAME}")
-            
-        except Exception as e:
-            print(f"Error initializing Pinecone: {e}")
-            raise
+    """
+    Post ingestion and style retrieval on top of a VectorStore - the hosted Pinecone
+    index by default, or the local NumPy backend (VECTOR_STORE_BACKEND=local).
+    """
 
-    def store_user_posts(self, username: str, posts: List[Dict[str, Any]]) -> bool:
-        """Store user's posts in Pinecone with embeddings"""
-        try:
-            vectors_to_upsert = []
+    def __init__(self, store: Optional[VectorStore] = None):
+        self._store = store
+
+    @property
+    def store(self) -> VectorStore:
+        """The given store, or the configured one - connected on first use (blocking)"""
+        return self._store if self._store is not None else vector_store.get()
+
+    async def _astore(self) -> VectorStore:
+        return self._store if self._store is not None else await vector_store.aget()
+
+    def _post_records(self, username: str, posts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Index records (id + metadata + text to embed) for every post worth storing"""
+        records = []
+        for post in posts:
+            # Get the post content (adjust field names based on your data structure)
+            post_content = post.get("content", "") or post.get("text", "") or post.get("post_text", "")
             
-            for post in posts:
-                # Get the post content (adjust field names based on your data structure)
-                post_content = post.get("content", "") or post.get("text", "") or post.get("post_text", "")
-                
-                if not post_content or len(post_content.strip()) < 10:
-                    continue  # Skip very short or empty posts
-                
-                # Generate embedding for the post
-                embedding = get_embedding(post_content)
-                if not embedding:
-                    print(f"Failed to generate embedding for post: {post_content[:50]}...")
-                    continue
-                
-                # Create unique ID for this post
-                post_id = f"{username}_{post.get('post_id', str(uuid.uuid4()))}"
-                
-                # Prepare metadata
-                metadata = {
-                    "username": username,
-                    "content": post_content[:1000],  # Limit content length for metadata
-                    "post_id": post.get("post_id", ""),
-                    "scraped_at": post.get("scraped_at", ""),
-                    "likes": post.get("likes", 0),
-                    "comments": post.get("comments", 0),
-                    "reposts": post.get("reposts", 0)
-                }
-                
-                vectors_to_upsert.append({
-                    "id": post_id,
-                    "values": embedding,
-                    "metadata": metadata
-                })
+            if not post_content or len(post_content.strip()) < 10:
+                continue  # Skip very short or empty posts
             
-            if vectors_to_upsert:
-                # Upsert in batches of 100
-                batch_size = 100
-                for i in range(0, len(vectors_to_upsert), batch_size):
-                    batch = vectors_to_upsert[i:i + batch_size]
-                    self.index.upsert(vectors=batch)
-                    print(f"Upserted batch {i//batch_size + 1} with {len(batch)} vectors")
-                
-                print(f"Successfully stored {len(vectors_to_upsert)} posts for {username}")
-                return True
-            else:
-                print(f"No valid posts to store for {username}")
-                return False
-                
-        except Exception as e:
-            print(f"Error storing posts for {username}: {e}")
-            return False
+            # Deterministic ID (content hash when the post has no id) so re-syncs upsert in place
+            post_id = f"{username}_{post.get('post_id') or hashlib.sha1(post_content.encode('utf-8')).hexdigest()[:16]}"
+            
+            # Prepare metadata
+            metadata = {
+                "username": username,
+                "content": post_content[:1000],  # Limit content length for metadata
+                "post_id": post.get("post_id", ""),
+                "scraped_at": post.get("scraped_at", ""),
+                "likes": post.get("likes", 0),
+                "comments": post.get("comments", 0),
+                "reposts": post.get("reposts", 0)
+            }
+            
+            records.append({"id": post_id, "text": post_content, "metadata": metadata})
+        return records
+
+    @staticmethod
+    def _vectors(records: List[Dict[str, Any]], embeddings: List[List[float]]) -> List[Dict[str, Any]]:
+        vectors = []
+        for record, embedding in zip(records, embeddings):
+            if not embedding:
+                print(f"Failed to generate embedding for post: {record['text'][:50]}...")
+                continue
+            vectors.append({"id": record["id"], "values": embedding, "metadata": record["metadata"]})
+        return vectors
 
     def find_similar_post(self, username: str, query: str, top_k: int = 1) -> Optional[str]:
         """Find similar posts by a specific user based on query"""
@@ -111,16 +71,11 @@ class PineconeService:
                 return None
             
             # Search for similar posts by this specific user
-            results = self.index.query(
-                vector=query_embedding,
-                filter={"username": username},
-                top_k=top_k,
-                include_metadata=True
-            )
+            matches = self.store.query(username, query_embedding, top_k=top_k)
             
-            if results.matches:
+            if matches:
                 # Return the content of the most similar post
-                best_match = results.matches[0]
+                best_match = matches[0]
                 content = best_match.metadata.get("content", "")
                 print(f"Found similar post with score {best_match.score:.3f}")
                 return content
@@ -139,20 +94,10 @@ class PineconeService:
             if not query_embedding:
                 return []
             
-            # Build filter
-            filter_dict = {}
-            if username:
-                filter_dict["username"] = username
-            
-            results = self.index.query(
-                vector=query_embedding,
-                filter=filter_dict if filter_dict else None,
-                top_k=top_k,
-                include_metadata=True
-            )
+            matches = self.store.query(username, query_embedding, top_k=top_k)
             
             similar_posts = []
-            for match in results.matches:
+            for match in matches:
                 similar_posts.append({
                     "content": match.metadata.get("content", ""),
                     "username": match.metadata.get("username", ""),
@@ -168,62 +113,105 @@ class PineconeService:
             print(f"Error searching similar posts: {e}")
             return []
 
-    def delete_user_posts(self, username: str) -> bool:
-        """Delete all posts for a specific user"""
+    # ---- Async variants for request handlers: blocking SDK calls run on the I/O pool ----
+
+    async def aquery(self, username: Optional[str], vector: List[float], top_k: int = 1):
+        """store.query without blocking the event loop"""
+        return await run_blocking((await self._astore()).query, username, vector, top_k)
+
+    async def ahas_user_posts(self, username: str) -> bool:
+        # The registry is written right after each upsert; index stats can lag behind it
+        entry = await vector_registry.get(username)
+        if entry is not None and entry["indexed"]:
+            return True
+        return await run_blocking((await self._astore()).has_user, username)
+
+    async def adelete_posts(self, username: str, ids: List[str]) -> bool:
+        """Remove specific vectors (e.g. posts that dropped out of the synced window)"""
         try:
-            # First, get all post IDs for this user
-            query_response = self.index.query(
-                vector=[0.0] * 1536,  # Dummy vector
-                filter={"username": username},
-                top_k=10000,  # Large number to get all posts
-                include_metadata=True
-            )
-            
-            if query_response.matches:
-                post_ids = [match.id for match in query_response.matches]
-                
-                # Delete in batches
-                batch_size = 1000
-                for i in range(0, len(post_ids), batch_size):
-                    batch = post_ids[i:i + batch_size]
-                    self.index.delete(ids=batch)
-                
-                print(f"Deleted {len(post_ids)} posts for user {username}")
-                return True
-            else:
-                print(f"No posts found to delete for user {username}")
+            await run_blocking((await self._astore()).delete, username, ids)
+            print(f"Deleted {len(ids)} stale posts for user {username}")
+            return True
+        except Exception as e:
+            print(f"Error deleting stale posts for {username}: {e}")
+            return False
+
+    async def astore_user_posts(self, username: str, posts: List[Dict[str, Any]]) -> bool:
+        """
+        Embed and store the user's posts (the registry is updated by vector_sync): posts are embedded in batches of EMBEDDING_BATCH_SIZE with
+        up to EMBEDDING_MAX_CONCURRENCY batches in flight, and each batch is upserted as
+        soon as its embeddings arrive rather than after the whole set is done.
+        """
+        try:
+            records = self._post_records(username, posts)
+            semaphore = asyncio.Semaphore(EMBEDDING_MAX_CONCURRENCY)
+
+            async def ingest(batch_no: int, batch: List[Dict[str, Any]]) -> int:
+                async with semaphore:
+                    vectors = self._vectors(batch, await aget_embeddings([r["text"] for r in batch]))
+                    if vectors:
+                        await run_blocking((await self._astore()).upsert, username, vectors)
+                        print(f"Upserted batch {batch_no} with {len(vectors)} vectors")
+                    return len(vectors)
+
+            counts = await asyncio.gather(*(
+                ingest(i // EMBEDDING_BATCH_SIZE + 1, records[i:i + EMBEDDING_BATCH_SIZE])
+                for i in range(0, len(records), EMBEDDING_BATCH_SIZE)
+            ))
+            stored = sum(counts)
+
+            if stored:
+                print(f"Successfully stored {stored} posts for {username}")
                 return True
-                
+            print(f"No valid posts to store for {username}")
+            return False
+
         except Exception as e:
-            print(f"Error deleting posts for {username}: {e}")
+            print(f"Error storing posts for {username}: {e}")
             return False
 
+    async def afind_similar_post(self, username: str, query: str, top_k: int = 1) -> Optional[str]:
+        """Async find_similar_post: native async embedding + pooled index query"""
+        try:
+            query_embedding = await aget_embedding(query)
+            if not query_embedding:
+                print("Failed to generate embedding for query")
+                return None
+            
+            matches = await self.aquery(username, query_embedding, top_k=top_k)
+            
+            if matches:
+                best_match = matches[0]
+                print(f"Found similar post with score {best_match.score:.3f}")
+                return best_match.metadata.get("content", "")
+            print(f"No similar posts found for user {username}")
+            return None
+                
+        except Exception as e:
+            print(f"Error finding similar post: {e}")
+            return None
+
     def get_index_stats(self) -> Dict[str, Any]:
-        """Get statistics about the Pinecone index"""
+        """Get statistics about the vector store"""
         try:
-            stats = self.index.describe_index_stats()
-            return {
-                "total_vectors": stats.total_vector_count,
-                "dimension": stats.dimension,
-                "index_fullness": stats.index_fullness,
-                "namespaces": dict(stats.namespaces) if stats.namespaces else {}
-            }
+            return self.store.stats()
         except Exception as e:
             print(f"Error getting index stats: {e}")
             return {}
 
-    def update_user_posts(self, username: str, new_posts: List[Dict[str, Any]]) -> bool:
-        """Update posts for a user (delete old ones and add new ones)"""
+    async def adelete_user_posts(self, username: str) -> bool:
+        """Delete every vector for the user and mark them as not indexed in the registry"""
+        entry = await vector_registry.get(username)
         try:
-            # Delete existing posts
-            self.delete_user_posts(username)
-            
-            # Add new posts
-            return self.store_user_posts(username, new_posts)
-            
+            store_count = await run_blocking((await self._astore()).delete_user, username)
         except Exception as e:
-            print(f"Error updating posts for {username}: {e}")
+            print(f"Error deleting posts for {username}: {e}")
             return False
+        # The registry knows what we indexed; the store's count comes from lagging stats
+        deleted = entry["vector_count"] if entry and entry.get("vector_count") is not None else store_count
+        print(f"Deleted {deleted} posts for user {username}")
+        await vector_registry.record(username, indexed=False, vector_count=0)
+        return True
 
-# Create the global instance
+# Global instance; the vector store behind it connects lazily (see utils/readiness.py)
 pinecone_service = PineconeService()
\ No newline at end of file
@@ -1,30 +1,143 @@
-from langchain.prompts import PromptTemplate
-
-post_prompt_template = PromptTemplate(
-    input_variables=["prompt", "topic", "tone", "length", "audience", "style_sample", "trending_sample"],
-    template=(
-        "Generate a LinkedIn post: {prompt}\n"
-        "Topic: {topic}. "
-        "Tone: {tone}. "
-        "Length: {length}. "
-        "Target audience: {audience}.\n"
-        "Match this style: {style_sample}\n"
-        "Reference or take inspiration from this trending post: {trending_sample}\n"
-        "Return only the final post text."
-    )
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Dict, List, Tuple
+from app.config import LLM_MODEL, PROMPT_MAX_TOKENS, PROMPT_SAMPLE_MIN_TOKENS
+
+# Prompt lines in order; a line is only included when its field(s) are non-empty
+_HEADER = "Generate a LinkedIn post: {prompt}"
+_BRIEF = (  # joined onto one line, like the original template
+    ("topic", "Topic: {topic}."),
+    ("tone", "Tone: {tone}."),
+    ("length", "Length: {length}."),
+    ("audience", "Target audience: {audience}."),
 )
+_SAMPLES = (
+    ("style_sample", "Match this style: {style_sample}"),
+    ("trending_sample", "Reference or take inspiration from this trending post: {trending_sample}"),
+)
+_FOOTER = "Return only the final post text."
+
+# Rough chars-per-token for English text, used when tiktoken is unavailable
+_CHARS_PER_TOKEN = 4
+
+
+@dataclass
+class AssembledPrompt:
+    """The final prompt plus what it cost"""
+    text: str
+    tokens: int
+    sample_tokens: Dict[str, int] = field(default_factory=dict)  # tokens kept per sample
+    trimmed: List[str] = field(default_factory=list)  # samples shortened or dropped to fit the budget
+
+
+@lru_cache(maxsize=4)
+def _encoding(model: str):
+    try:
+        import tiktoken
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        # Not installed, or the BPE files can't be fetched (offline) - fall back to an estimate
+        return None
+
+
+def count_tokens(text: str, model: str = LLM_MODEL) -> int:
+    if not text:
+        return 0
+    encoding = _encoding(model)
+    if encoding is None:
+        return -(-len(text) // _CHARS_PER_TOKEN)
+    return len(encoding.encode(text))
+
+
+def trim_to_tokens(text: str, max_tokens: int, model: str = LLM_MODEL) -> str:
+    """Cut `text` to at most `max_tokens`, preferring to end on a sentence or line break"""
+    if max_tokens <= 0:
+        return ""
+    encoding = _encoding(model)
+    if encoding is None:
+        head = text[:max_tokens * _CHARS_PER_TOKEN]
+    else:
+        tokens = encoding.encode(text)
+        if len(tokens) <= max_tokens:
+            return text
+        head = encoding.decode(tokens[:max_tokens])
+    if len(head) == len(text):
+        return text
+    cut = max(head.rfind(mark) for mark in (". ", "! ", "? ", "\n"))
+    if cut >= len(head) // 2:  # only if that keeps most of what fits
+        head = head[:cut + 1]
+    return head.rstrip()
+
+
+@lru_cache(maxsize=128)
+def _compile_template(fields: Tuple[str, ...]) -> str:
+    """Format string for one combination of non-empty fields"""
+    lines = [_HEADER]
+    brief = " ".join(line for name, line in _BRIEF if name in fields)
+    if brief:
+        lines.append(brief)
+    lines.extend(line for name, line in _SAMPLES if name in fields)
+    lines.append(_FOOTER)
+    return "\n".join(lines)
+
+
+def _allot(counts: Dict[str, int], budget: int) -> Dict[str, int]:
+    """Split `budget` evenly across samples; a sample shorter than its share leaves the rest to the others"""
+    allotted = {}
+    for name in sorted(counts, key=counts.get):
+        share = budget // (len(counts) - len(allotted))
+        allotted[name] = min(counts[name], share)
+        budget -= allotted[name]
+    return allotted
+
+
+def assemble_prompt(
+    prompt, topic=None, tone=None, length=None, audience=None, style_sample=None, trending_sample=None,
+    max_tokens: int = PROMPT_MAX_TOKENS, model: str = LLM_MODEL
+) -> AssembledPrompt:
+    """
+    Build the generation prompt within `max_tokens`: empty fields are left out, and the
+    style/trending samples share whatever the fixed lines don't use.
+    """
+    values = {
+        "prompt": (prompt or "").strip(),
+        "topic": (topic or "").strip(),
+        "tone": (tone or "").strip(),
+        "length": (length or "").strip(),
+        "audience": (audience or "").strip(),
+        "style_sample": (style_sample or "").strip(),
+        "trending_sample": (trending_sample or "").strip(),
+    }
+    samples = {name: values[name] for name, _ in _SAMPLES if values[name]}
+
+    # Tokens used by everything except the sample text itself
+    fields = tuple(name for name, value in values.items() if value)
+    template = _compile_template(fields)
+    fixed_tokens = count_tokens(template.format(**{**values, **dict.fromkeys(samples, "")}), model)
+
+    counts = {name: count_tokens(text, model) for name, text in samples.items()}
+    allotted = _allot(counts, max(0, max_tokens - fixed_tokens))
+    trimmed = []
+    for name, limit in allotted.items():
+        if limit >= counts[name]:
+            continue
+        trimmed.append(name)
+        values[name] = trim_to_tokens(samples[name], limit, model) if limit >= PROMPT_SAMPLE_MIN_TOKENS else ""
+
+    fields = tuple(name for name, value in values.items() if value)
+    text = _compile_template(fields).format(**values)
+    return AssembledPrompt(
+        text=text,
+        tokens=count_tokens(text, model),
+        sample_tokens={name: count_tokens(values[name], model) for name in samples},
+        trimmed=trimmed,
+    )
+
 
 def build_prompt(
     prompt, topic=None, tone=None, length=None, audience=None, style_sample=None, trending_sample=None
 ):
-    # Fill defaults with empty strings to avoid None in prompt
-    prompt_vals = {
-        "prompt": prompt or "",
-        "topic": topic or "",
-        "tone": tone or "",
-        "length": length or "",
-        "audience": audience or "",
-        "style_sample": style_sample or "",
-        "trending_sample": trending_sample or ""
-    }
-    return post_prompt_template.format(**prompt_vals)
+    return assemble_prompt(prompt, topic, tone, length, audience, style_sample, trending_sample).text
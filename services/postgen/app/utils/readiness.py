@@ -0,0 +1,85 @@
+import asyncio
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Generic, List, Optional, TypeVar
+from app.utils.executor import run_blocking
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class LazyResource(Generic[T]):
+    """
+    A client built on first use instead of at import time - connecting, creating
+    indexes and importing heavy SDKs all wait until something needs it (or until
+    warm_up() builds it in the background at startup). Thread-safe; a failed build
+    is retried by the next get(). Every instance is listed by /ready.
+    """
+
+    def __init__(self, name: str, factory: Callable[[], T]):
+        self.name = name
+        self._factory = factory
+        self._instance: Optional[T] = None
+        self._lock = threading.Lock()
+        self.state = "idle"  # idle -> connecting -> ready | failed
+        self.error: Optional[str] = None
+        self.init_seconds: Optional[float] = None
+        resources.append(self)
+
+    @property
+    def ready(self) -> bool:
+        return self._instance is not None
+
+    def get(self) -> T:
+        """The instance, building it now if needed (blocking - async code should call aget)"""
+        if self._instance is not None:
+            return self._instance
+        with self._lock:
+            if self._instance is None:
+                self.state = "connecting"
+                start = time.perf_counter()
+                try:
+                    instance = self._factory()
+                except Exception as e:
+                    self.state, self.error = "failed", str(e)
+                    raise
+                self.init_seconds = round(time.perf_counter() - start, 3)
+                self._instance, self.state, self.error = instance, "ready", None
+                logger.info(f"{self.name} ready in {self.init_seconds}s")
+        return self._instance
+
+    async def aget(self) -> T:
+        """get() that builds the instance on the I/O pool so the event loop never blocks on it"""
+        if self._instance is not None:
+            return self._instance
+        return await run_blocking(self.get)
+
+    def set(self, instance: T):
+        """Use `instance` instead of building one (benchmarks, tests)"""
+        with self._lock:
+            self._instance, self.state, self.error = instance, "ready", None
+
+    def status(self) -> Dict[str, Any]:
+        return {"state": self.state, "error": self.error, "init_seconds": self.init_seconds}
+
+
+# Every LazyResource, in creation order
+resources: List[LazyResource] = []
+
+
+async def warm_up():
+    """Build every resource concurrently; failures are logged and reported by /ready, not raised"""
+    async def warm(resource: LazyResource):
+        try:
+            await resource.aget()
+        except Exception as e:
+            logger.error(f"Failed to initialize {resource.name}: {e}")
+
+    await asyncio.gather(*(warm(resource) for resource in resources))
+
+
+def readiness() -> Dict[str, Any]:
+    backends = {resource.name: resource.status() for resource in resources}
+    return {"ready": all(resource.ready for resource in resources), "backends": backends}
@@ -0,0 +1,10 @@
+import json
+from typing import Any
+
+# Headers for text/event-stream responses: no caching, and no proxy buffering (nginx honours X-Accel-Buffering)
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+def format_sse(event: str, data: Any) -> str:
+    """Encode one Server-Sent Event with a JSON payload"""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
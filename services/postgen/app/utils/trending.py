@@ -0,0 +1,172 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Set
+import httpx
+from app.config import (
+    SCRAPER_SERVICE_URL, TRENDING_SAMPLE_TTL, TRENDING_NEGATIVE_TTL, TRENDING_SAMPLE_DEADLINE,
+    TRENDING_FETCH_TIMEOUT, TRENDING_REFRESH_INTERVAL, TRENDING_CACHE_MAX_HASHTAGS, TRENDING_IDLE_EXPIRY
+)
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_hashtag(hashtag: str) -> str:
+    return hashtag.strip().lstrip("#").lower()
+
+
+def top_trending_post(data: Dict[str, Any]) -> Optional[str]:
+    """Text of the highest-engagement post in a /scraper/hashtag/posts response"""
+    posts = [p for p in data.get("posts") or [] if p.get("text")]
+    if not posts:
+        return None
+    return max(posts, key=lambda p: p.get("engagement", 0))["text"]
+
+
+class _Sample:
+    __slots__ = ("text", "refresh_at", "requested_at")
+
+    def __init__(self, text: Optional[str], ttl: float, requested_at: Optional[float] = None):
+        now = time.monotonic()
+        self.text = text
+        self.refresh_at = now + ttl
+        self.requested_at = requested_at or now
+
+
+class TrendingSampleCache:
+    """
+    Local cache of the top trending post per hashtag.
+
+    Generation only ever waits `deadline` seconds: a cached sample (even one due
+    for refresh) is returned immediately, and a cold hashtag starts a background
+    fetch and falls back to "no sample" if it isn't done in time. The fetch itself
+    may take minutes (the scraper logs into LinkedIn on its own cache miss), so it
+    runs with its own long timeout on a pooled client. A background loop
+    re-fetches samples past their TTL; "no sample" results are kept for a shorter
+    negative TTL. Hashtags not requested for `idle_expiry` seconds are dropped
+    instead of refreshed, and at most `max_hashtags` are tracked (LRU).
+    """
+
+    def __init__(
+        self,
+        ttl: float = TRENDING_SAMPLE_TTL,
+        negative_ttl: float = TRENDING_NEGATIVE_TTL,
+        deadline: float = TRENDING_SAMPLE_DEADLINE,
+        fetch_timeout: float = TRENDING_FETCH_TIMEOUT,
+        refresh_interval: float = TRENDING_REFRESH_INTERVAL,
+        max_hashtags: int = TRENDING_CACHE_MAX_HASHTAGS,
+        idle_expiry: float = TRENDING_IDLE_EXPIRY,
+    ):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.deadline = deadline
+        self.fetch_timeout = fetch_timeout
+        self.refresh_interval = refresh_interval
+        self.max_hashtags = max_hashtags
+        self.idle_expiry = idle_expiry
+        self._samples: "OrderedDict[str, _Sample]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._tasks: Set[asyncio.Task] = set()
+        self._client: Optional[httpx.AsyncClient] = None
+        self._loop_task: Optional[asyncio.Task] = None
+        self.counters = {"hits": 0, "stale_hits": 0, "cold_misses": 0, "deadline_misses": 0, "fetches": 0, "fetch_errors": 0}
+
+    def start(self):
+        self._client = httpx.AsyncClient(base_url=SCRAPER_SERVICE_URL, timeout=self.fetch_timeout)
+        self._loop_task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self):
+        tasks = list(self._tasks) + ([self._loop_task] if self._loop_task else [])
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._loop_task = None
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _fetch(self, hashtag: str):
+        self.counters["fetches"] += 1
+        try:
+            resp = await self._client.get("/scraper/hashtag/posts", params={"hashtag": hashtag, "n_posts": 5})
+            resp.raise_for_status()
+            text = top_trending_post(resp.json())
+        except Exception as e:
+            # Keep serving the previous sample; the refresh loop retries later
+            self.counters["fetch_errors"] += 1
+            logger.warning(f"Trending sample fetch failed for #{hashtag}: {e!r}")
+            previous = self._samples.get(hashtag)
+            if previous is None or previous.text is None:
+                self._store(hashtag, None, self.negative_ttl)
+            else:
+                previous.refresh_at = time.monotonic() + self.negative_ttl
+            return
+        self._store(hashtag, text, self.ttl if text else self.negative_ttl)
+
+    def _store(self, hashtag: str, text: Optional[str], ttl: float):
+        previous = self._samples.get(hashtag)
+        self._samples[hashtag] = _Sample(text, ttl, previous.requested_at if previous else None)
+        self._samples.move_to_end(hashtag)
+        while len(self._samples) > self.max_hashtags:
+            self._samples.popitem(last=False)
+
+    def _refresh(self, hashtag: str) -> asyncio.Task:
+        """Start (or join) the background fetch for a hashtag"""
+        task = self._inflight.get(hashtag)
+        if task is None:
+            task = asyncio.create_task(self._fetch(hashtag))
+            self._inflight[hashtag] = task
+            self._tasks.add(task)
+            task.add_done_callback(lambda t: (self._tasks.discard(t), self._inflight.pop(hashtag, None)))
+        return task
+
+    async def get(self, hashtag: str) -> Optional[str]:
+        """Trending sample for the hashtag, or None - never waits longer than `deadline`"""
+        if self._client is None:
+            return None
+        hashtag = normalize_hashtag(hashtag)
+        if not hashtag:
+            return None
+
+        sample = self._samples.get(hashtag)
+        if sample is not None:
+            sample.requested_at = time.monotonic()
+            self._samples.move_to_end(hashtag)
+            if time.monotonic() >= sample.refresh_at:
+                self.counters["stale_hits"] += 1
+                self._refresh(hashtag)
+            else:
+                self.counters["hits"] += 1
+            return sample.text
+
+        self.counters["cold_misses"] += 1
+        try:
+            await asyncio.wait_for(asyncio.shield(self._refresh(hashtag)), timeout=self.deadline)
+        except asyncio.TimeoutError:
+            self.counters["deadline_misses"] += 1
+            print(f"Trending sample for #{hashtag} not ready within {self.deadline}s - generating without it")
+            return None
+        sample = self._samples.get(hashtag)
+        return sample.text if sample else None
+
+    async def _refresh_loop(self):
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            now = time.monotonic()
+            for hashtag, sample in list(self._samples.items()):
+                if now - sample.requested_at > self.idle_expiry:
+                    del self._samples[hashtag]
+                elif now >= sample.refresh_at:
+                    self._refresh(hashtag)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            **self.counters,
+            "hashtags": len(self._samples),
+            "refreshing": len(self._inflight),
+        }
+
+
+# Global cache used by prepare_generation; started and stopped in main.py
+trending_cache = TrendingSampleCache()
@@ -0,0 +1,73 @@
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from shared.db.mongo_db import get_database
+from app.config import VECTOR_REGISTRY_COLLECTION_NAME, VECTOR_REGISTRY_CACHE_TTL
+
+
+class VectorRegistry:
+    """
+    Which users have posts in the vector index, how many vectors and up to which
+    `scraped_at` (the sync watermark).
+
+    One Mongo document per user ({_id: username, indexed, vector_count, watermark,
+    post_ids, updated_at}) with an in-process TTL cache in front, so the per-request check is a
+    dict lookup. `get` returns None when the user has never been recorded, which
+    callers treat as "unknown" rather than "not indexed".
+    """
+
+    def __init__(self, collection_name: str = VECTOR_REGISTRY_COLLECTION_NAME, ttl: float = VECTOR_REGISTRY_CACHE_TTL):
+        self.collection_name = collection_name
+        self.ttl = ttl
+        self._cache: Dict[str, Tuple[float, Optional[Dict[str, Any]]]] = {}
+
+    def _collection(self):
+        try:
+            return get_database()[self.collection_name]
+        except RuntimeError:
+            return None
+
+    def _remember(self, username: str, entry: Optional[Dict[str, Any]]):
+        self._cache[username] = (time.monotonic() + self.ttl, entry)
+
+    def invalidate(self, username: str):
+        self._cache.pop(username, None)
+
+    async def get(self, username: str) -> Optional[Dict[str, Any]]:
+        cached = self._cache.get(username)
+        if cached is not None and cached[0] > time.monotonic():
+            return cached[1]
+
+        collection = self._collection()
+        if collection is None:
+            return None
+        entry = await collection.find_one({"_id": username})
+        self._remember(username, entry)
+        return entry
+
+    async def record(
+        self,
+        username: str,
+        indexed: bool,
+        vector_count: Optional[int] = None,
+        watermark: Optional[str] = None,
+        post_ids: Optional[List[str]] = None,
+    ) -> Dict[str, Any]:
+        """Upsert the user's entry (called after ingestion, deletion or a backfill probe)"""
+        entry = {
+            "_id": username,
+            "indexed": indexed,
+            "vector_count": vector_count,
+            "watermark": watermark,
+            "post_ids": post_ids,
+            "updated_at": datetime.utcnow(),
+        }
+        collection = self._collection()
+        if collection is not None:
+            await collection.replace_one({"_id": username}, entry, upsert=True)
+        self._remember(username, entry)
+        return entry
+
+
+# Global registry shared by ingestion (utils/pinecone.py) and the generate route
+vector_registry = VectorRegistry()
@@ -0,0 +1,193 @@
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+from app.config import (
+    PINECONE_API_KEY, PINECONE_ENVIRONMENT, PINECONE_INDEX_NAME, PINECONE_NAMESPACE_PREFIX, EMBEDDING_DIMENSION,
+    VECTOR_STORE_BACKEND
+)
+from app.utils.readiness import LazyResource
+
+
+@dataclass
+class VectorMatch:
+    """One query hit, backend independent"""
+    id: str
+    score: float
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
+
+def _is_not_found(exc: BaseException) -> bool:
+    """Whether a Pinecone error is a 404 (e.g. deleting from a namespace that doesn't exist)"""
+    status = getattr(exc, "status", None) or getattr(exc, "status_code", None)
+    return status == 404 or type(exc).__name__ == "NotFoundException"
+
+
+class VectorStore(ABC):
+    """
+    Storage for per-user post vectors ({"id", "values", "metadata"} dicts).
+
+    Methods are blocking; async callers go through run_blocking (see utils/pinecone.py).
+    Scores are cosine similarities, higher is closer.
+    """
+
+    name = "base"
+
+    @abstractmethod
+    def upsert(self, username: str, vectors: List[Dict[str, Any]]) -> None:
+        """Insert or replace vectors (matched by id) for a user"""
+
+    @abstractmethod
+    def query(self, username: Optional[str], vector: List[float], top_k: int = 1) -> List[VectorMatch]:
+        """Top-k matches within one user's vectors, or across all users when username is None"""
+
+    @abstractmethod
+    def has_user(self, username: str) -> bool:
+        """Whether any vectors are stored for the user"""
+
+    @abstractmethod
+    def delete(self, username: str, ids: List[str]) -> None:
+        """Remove specific vectors for the user (unknown ids are ignored)"""
+
+    @abstractmethod
+    def delete_user(self, username: str) -> int:
+        """Remove every vector for the user, returning how many were deleted (best effort)"""
+
+    @abstractmethod
+    def stats(self) -> Dict[str, Any]:
+        ...
+
+
+class PineconeVectorStore(VectorStore):
+    """
+    Hosted Pinecone index with one namespace per user (PINECONE_NAMESPACE_PREFIX +
+    username), so a query only scans that user's vectors and deleting a user is a
+    single delete_all call. Vectors written before namespaces were introduced live
+    in the default namespace; migrations/migrate_vector_namespaces.py moves them.
+    """
+
+    name = "pinecone"
+
+    def __init__(self, api_key: str = PINECONE_API_KEY, index_name: str = PINECONE_INDEX_NAME,
+                 environment: str = PINECONE_ENVIRONMENT, dimension: int = EMBEDDING_DIMENSION,
+                 namespace_prefix: str = PINECONE_NAMESPACE_PREFIX):
+        # Imported here so the local backend works without the pinecone package installed
+        from pinecone import Pinecone, ServerlessSpec
+
+        self.dimension = dimension
+        self.namespace_prefix = namespace_prefix
+        try:
+            # New way to connect
+            self.pc = Pinecone(api_key=api_key)
+
+            # List existing indexes
+            existing_indexes = [i["name"] for i in self.pc.list_indexes()]
+
+            # Create index if it doesn't exist
+            if index_name not in existing_indexes:
+                print(f"Creating Pinecone index: {index_name}")
+                self.pc.create_index(
+                    name=index_name,
+                    dimension=dimension,
+                    metric="cosine",
+                    spec=ServerlessSpec(
+                        cloud="aws",      # adjust if needed
+                        region=environment  # make sure this matches your .env
+                    ),
+                )
+                # Wait for index to be ready
+                while index_name not in [i["name"] for i in self.pc.list_indexes()]:
+                    time.sleep(1)
+
+            self.index = self.pc.Index(index_name)
+            print(f"Connected to Pinecone index: {index_name}")
+
+        except Exception as e:
+            print(f"Error initializing Pinecone: {e}")
+            raise
+
+    def namespace(self, username: str) -> str:
+        return f"{self.namespace_prefix}{username}"
+
+    def _namespace_counts(self) -> Dict[str, int]:
+        namespaces = self.index.describe_index_stats().namespaces or {}
+        return {name: ns.vector_count for name, ns in namespaces.items()}
+
+    def upsert(self, username: str, vectors: List[Dict[str, Any]]) -> None:
+        # Pinecone recommends at most 100 vectors per upsert request
+        for i in range(0, len(vectors), 100):
+            self.index.upsert(vectors=vectors[i:i + 100], namespace=self.namespace(username))
+
+    def query(self, username: Optional[str], vector: List[float], top_k: int = 1) -> List[VectorMatch]:
+        if username:
+            results = self.index.query(
+                vector=vector,
+                namespace=self.namespace(username),
+                top_k=top_k,
+                include_metadata=True
+            )
+        else:
+            # Cross-user search fans out over every user namespace and merges server-side
+            namespaces = [name for name in self._namespace_counts() if name.startswith(self.namespace_prefix)]
+            if not namespaces:
+                return []
+            results = self.index.query_namespaces(
+                vector=vector,
+                namespaces=namespaces,
+                metric="cosine",
+                top_k=top_k,
+                include_metadata=True
+            )
+        return [VectorMatch(m.id, m.score, dict(m.metadata or {})) for m in results.matches]
+
+    def _probe(self) -> List[float]:
+        probe = [0.0] * self.dimension
+        probe[0] = 1.0  # any non-zero vector; cosine rejects all-zero queries
+        return probe
+
+    def has_user(self, username: str) -> bool:
+        if self._namespace_counts().get(self.namespace(username), 0) > 0:
+            return True
+        # Index stats are eventually consistent (0 right after an upsert) - confirm with a query
+        results = self.index.query(vector=self._probe(), namespace=self.namespace(username), top_k=1)
+        return bool(results.matches)
+
+    def delete(self, username: str, ids: List[str]) -> None:
+        for i in range(0, len(ids), 1000):
+            self.index.delete(ids=ids[i:i + 1000], namespace=self.namespace(username))
+
+    def delete_user(self, username: str) -> int:
+        # Stats may lag behind recent upserts, so the count is informational only and
+        # delete_all always runs; a namespace that doesn't exist means nothing to delete
+        count = self._namespace_counts().get(self.namespace(username), 0)
+        try:
+            self.index.delete(delete_all=True, namespace=self.namespace(username))
+        except Exception as e:
+            if _is_not_found(e):
+                return 0
+            raise
+        return count
+
+    def stats(self) -> Dict[str, Any]:
+        stats = self.index.describe_index_stats()
+        return {
+            "backend": self.name,
+            "total_vectors": stats.total_vector_count,
+            "dimension": stats.dimension,
+            "index_fullness": stats.index_fullness,
+            "namespaces": len(stats.namespaces or {})
+        }
+
+
+def create_vector_store(backend: str = VECTOR_STORE_BACKEND) -> VectorStore:
+    """Build the configured backend ("pinecone" or "local")"""
+    if backend == "local":
+        from app.utils.local_vector_store import LocalVectorStore
+        return LocalVectorStore()
+    if backend == "pinecone":
+        return PineconeVectorStore()
+    raise ValueError(f"Unknown VECTOR_STORE_BACKEND: {backend}")
+
+
+# The configured backend, connected on first use or by the startup warm-up
+vector_store: LazyResource[VectorStore] = LazyResource("vector_store", create_vector_store)
@@ -0,0 +1,101 @@
+import time
+from typing import Any, Dict, List
+from shared.db.mongo_db import POSTS_COLLECTION_NAME
+from app.config import VECTOR_SYNC_MAX_POSTS, VECTOR_SYNC_MIN_INTERVAL
+from app.utils.pinecone import pinecone_service
+from app.utils.vector_registry import vector_registry
+
+# Monotonic time of the last completed sync per user (this process only)
+_last_sync: Dict[str, float] = {}
+
+
+async def latest_posts(db, username: str, limit: int = VECTOR_SYNC_MAX_POSTS) -> List[Dict[str, Any]]:
+    """The user's `limit` most recent posts, newest first, sorted and trimmed by MongoDB"""
+    # Over-fetch a little: the scraper re-pushes posts it has already seen, and
+    # duplicates collapse onto one vector id below
+    pipeline = [
+        {"$match": {"username": username}},
+        {"$unwind": "$posts"},
+        {"$replaceRoot": {"newRoot": "$posts"}},
+        {"$sort": {"scraped_at": -1}},
+        {"$limit": limit * 2},
+    ]
+    return await db[POSTS_COLLECTION_NAME].aggregate(pipeline).to_list(length=limit * 2)
+
+
+class VectorSyncError(Exception):
+    """Raised by sync_user_posts(raise_on_failure=True) when new posts could not be indexed"""
+
+
+async def sync_user_posts(username: str, db, force: bool = False, raise_on_failure: bool = False) -> bool:
+    """
+    Bring the user's vectors in line with their latest scraped posts and return
+    whether they have any.
+
+    Posts in the newest VECTOR_SYNC_MAX_POSTS whose ids aren't indexed yet are
+    embedded - however old they are, since duplicate cleanup or a stale delete can
+    pull an older post into the window - and vectors for posts that left it are
+    deleted. The registry watermark only short-cuts a sync where nothing changed.
+    An indexed user is re-synced at most every VECTOR_SYNC_MIN_INTERVAL seconds
+    unless `force` is set. A failed ingestion keeps the previous vectors and
+    returns their status, or raises VectorSyncError when `raise_on_failure` is set.
+    """
+    entry = await vector_registry.get(username)
+    if entry is None:
+        # Never recorded (e.g. indexed before the registry existed) - probe the vector store once and backfill
+        has_posts = await pinecone_service.ahas_user_posts(username)
+        entry = await vector_registry.record(username, indexed=has_posts)
+
+    last = _last_sync.get(username)
+    if entry["indexed"] and not force and last is not None and time.monotonic() - last < VECTOR_SYNC_MIN_INTERVAL:
+        return True
+
+    posts = await latest_posts(db, username)
+    if not posts:
+        print(f"User {username} not found in MongoDB - posts should be pre-stored by another service")
+        return entry["indexed"]
+
+    records = {}  # vector id -> post, newest first, skipping posts too short to index
+    for post in posts:
+        for record in pinecone_service._post_records(username, [post]):
+            if len(records) < VECTOR_SYNC_MAX_POSTS:
+                records.setdefault(record["id"], post)
+    newest = max((str(post.get("scraped_at") or "") for post in posts), default="") or None
+
+    indexed_ids = entry.get("post_ids")
+    watermark = entry.get("watermark") if entry["indexed"] else None
+    if entry["indexed"] and indexed_ids is None:
+        # Indexed before ids were tracked (random ids): replace the whole set once
+        await pinecone_service.adelete_user_posts(username)
+        watermark = None
+    indexed = set(indexed_ids or [])
+
+    # What to embed or delete is decided by the id diff alone
+    new = {record_id: post for record_id, post in records.items() if record_id not in indexed}
+    stale_ids = [record_id for record_id in indexed if record_id not in records]
+    if not new and not stale_ids and watermark is not None and (newest is None or newest <= watermark):
+        # Nothing scraped since the last sync and the window is unchanged
+        _last_sync[username] = time.monotonic()
+        return entry["indexed"]
+
+    if new:
+        if not await pinecone_service.astore_user_posts(username, list(new.values())):
+            print(f"Failed to embed posts to vector store for {username}")
+            if raise_on_failure:
+                raise VectorSyncError(f"Failed to embed {len(new)} posts for {username}")
+            return entry["indexed"]
+        print(f"Embedded {len(new)} new posts for {username}")
+    kept_ids = [record_id for record_id in records if record_id in indexed or record_id in new]
+    if stale_ids and not await pinecone_service.adelete_posts(username, stale_ids):
+        # Keep the stale ids in the registry so the next sync retries the delete
+        kept_ids += stale_ids
+
+    await vector_registry.record(
+        username,
+        indexed=bool(kept_ids),
+        vector_count=len(kept_ids),
+        watermark=newest,
+        post_ids=kept_ids,
+    )
+    _last_sync[username] = time.monotonic()
+    return bool(kept_ids)
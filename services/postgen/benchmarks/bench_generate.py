@@ -0,0 +1,136 @@
+"""
+Benchmark: offline throughput and latency of the whole generate pipeline.
+
+Runs run_generation in-process with the fake LLM, the hash embedder and the local
+vector store (LLM_BACKEND=fake, EMBEDDING_BACKEND=hash, VECTOR_STORE_BACKEND=local),
+so no request leaves the machine and repeated runs produce the same prompts and
+posts. Model latency is simulated with the --llm-* / --embed-latency flags.
+
+MongoDB is still required (the docker-compose instance is fine). Synthetic users
+are seeded into the --db database and removed again afterwards.
+
+Run from services/postgen:
+    python -m benchmarks.bench_generate --users 20 --concurrency 1,8,32 --requests 64
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+
+def configure(args):
+    """Backends are chosen at import time, so this must run before any app import"""
+    os.environ["LLM_BACKEND"] = "fake"
+    os.environ["EMBEDDING_BACKEND"] = "hash"
+    os.environ["VECTOR_STORE_BACKEND"] = "local"
+    os.environ["LOCAL_VECTOR_STORE_PATH"] = tempfile.mkdtemp(prefix="postgen-bench-vectors-")
+    os.environ["EMBEDDING_CACHE_PERSIST"] = "false"
+    os.environ["FAKE_LLM_LATENCY"] = str(args.llm_latency)
+    os.environ["FAKE_LLM_TOKEN_LATENCY"] = str(args.llm_token_latency)
+    os.environ["FAKE_LLM_TOKENS"] = str(args.llm_tokens)
+    os.environ["FAKE_EMBEDDING_LATENCY"] = str(args.embed_latency)
+    os.environ["MONGODB_NAME"] = args.db
+    os.environ.setdefault("MONGODB_URI", "mongodb://localhost:27017")
+
+
+def make_user_posts(user: int, count: int):
+    now = datetime.utcnow()
+    topics = ("remote work", "hiring engineers", "product launches", "customer feedback", "burnout")
+    return [
+        {
+            "post_id": f"bench-{user}-{i}",
+            "text": f"Post {i} from benchmark user {user} about {topics[(user + i) % len(topics)]} and what we learned.",
+            "scraped_at": (now - timedelta(minutes=i)).isoformat(),
+        }
+        for i in range(count)
+    ]
+
+
+async def run_level(run_generation, request_cls, db, usernames, total, concurrency, use_cache):
+    sem = asyncio.Semaphore(concurrency)
+    latencies, stages, errors = [], {}, 0
+
+    async def one(i):
+        nonlocal errors
+        req = request_cls(
+            prompt=f"Share a lesson about team culture #{i % 8}",
+            username=usernames[i % len(usernames)],
+            tone="friendly",
+            num_variations=1,
+            bypass_cache=not use_cache,
+        )
+        async with sem:
+            start = time.perf_counter()
+            try:
+                result = await run_generation(req, db)
+            except Exception as e:
+                errors += 1
+                print(f"request {i} failed: {e}")
+                return
+            latencies.append(time.perf_counter() - start)
+            for stage, ms in result["timings"].items():
+                if isinstance(ms, (int, float)):
+                    stages.setdefault(stage, []).append(ms)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    p95 = latencies[max(0, int(len(latencies) * 0.95) - 1)] if latencies else 0.0
+    print(
+        f"concurrency {concurrency:>3}   {len(latencies) / elapsed:>7.2f} req/s   "
+        f"p50 {statistics.median(latencies or [0]):>6.3f} s   p95 {p95:>6.3f} s   errors {errors}"
+    )
+    print("    mean ms: " + "  ".join(f"{stage} {statistics.mean(values):.1f}" for stage, values in stages.items()))
+
+
+async def run(args):
+    from shared.db.mongo_db import connect_to_mongo, close_mongo_connection, get_database, POSTS_COLLECTION_NAME
+    from app.config import GENERATED_POST_ITEMS_COLLECTION_NAME
+    from app.llm import llm_backend
+    from app.routes.generate import GeneratePostRequest, run_generation, ensure_generation_indexes
+    from app.utils.embeddings import embeddings
+
+    await connect_to_mongo()
+    db = get_database()
+    await ensure_generation_indexes(db)
+
+    usernames = [f"bench_user_{u}" for u in range(args.users)]
+    await db[POSTS_COLLECTION_NAME].delete_many({"username": {"$in": usernames}})
+    await db[POSTS_COLLECTION_NAME].insert_many([
+        {"username": name, "posts": make_user_posts(u, args.posts_per_user)} for u, name in enumerate(usernames)
+    ])
+
+    try:
+        for level in args.concurrency:
+            await run_level(run_generation, GeneratePostRequest, db, usernames, args.requests, level, args.cache)
+        print(f"LLM calls {llm_backend.get().calls}   embedding calls {embeddings.get().calls}")
+    finally:
+        await db[POSTS_COLLECTION_NAME].delete_many({"username": {"$in": usernames}})
+        await db[GENERATED_POST_ITEMS_COLLECTION_NAME].delete_many({"username": {"$in": usernames}})
+        await close_mongo_connection()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--posts-per-user", type=int, default=10)
+    parser.add_argument("--concurrency", type=lambda s: [int(x) for x in s.split(",")], default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=64, help="requests per concurrency level")
+    parser.add_argument("--cache", action="store_true", help="allow generation cache hits (default: bypass)")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="seconds to first token")
+    parser.add_argument("--llm-token-latency", type=float, default=0.01, help="seconds per further token")
+    parser.add_argument("--llm-tokens", type=int, default=120)
+    parser.add_argument("--embed-latency", type=float, default=0.05, help="seconds per embeddings call")
+    parser.add_argument("--db", default="postpilot_bench", help="MongoDB database to seed and clean up")
+    args = parser.parse_args()
+    configure(args)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
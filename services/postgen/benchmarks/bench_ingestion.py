@@ -0,0 +1,108 @@
+"""
+Benchmark: vector store ingestion time for 10 / 100 / 1000 posts.
+
+Compares the old path (one embeddings round trip per post, run serially) with
+PineconeService.astore_user_posts (chunked embed_documents calls, bounded
+parallelism across chunks, upsert per chunk as it completes).
+
+The embeddings client and the vector store are replaced with fakes that sleep
+for a configurable per-call + per-item latency, so results measure round-trip
+structure rather than network noise. Nothing connects to the configured vector
+store or embeddings API. The embedding cache is cleared between runs.
+
+Run from services/postgen:
+    python -m benchmarks.bench_ingestion --sizes 10,100,1000 --embed-latency 0.08
+"""
+import argparse
+import asyncio
+import time
+
+import app.utils.embeddings as embeddings_module
+from app.utils.pinecone import PineconeService
+
+
+class FakeEmbeddings:
+    def __init__(self, call_latency: float, item_latency: float, dimension: int):
+        self.call_latency = call_latency
+        self.item_latency = item_latency
+        self.dimension = dimension
+        self.model = "fake"
+        self.calls = 0
+
+    def _vector(self, text):
+        return [float(len(text) % 7 + 1)] * self.dimension
+
+    async def aembed_query(self, text):
+        self.calls += 1
+        await asyncio.sleep(self.call_latency + self.item_latency)
+        return self._vector(text)
+
+    async def aembed_documents(self, texts):
+        self.calls += 1
+        await asyncio.sleep(self.call_latency + self.item_latency * len(texts))
+        return [self._vector(t) for t in texts]
+
+
+class FakeStore:
+    def __init__(self, call_latency: float):
+        self.call_latency = call_latency
+        self.vectors = 0
+        self.calls = 0
+
+    def upsert(self, username, vectors):
+        self.calls += 1
+        time.sleep(self.call_latency)
+        self.vectors += len(vectors)
+
+
+def make_posts(count: int):
+    return [
+        {"post_id": f"p{i}", "text": f"Benchmark post number {i} about shipping software on time."}
+        for i in range(count)
+    ]
+
+
+async def serial_ingest(service: PineconeService, username: str, posts):
+    """The pre-batching behaviour: one embedding call per post, then upserts of 100"""
+    vectors = []
+    for record in service._post_records(username, posts):
+        embedding = await embeddings_module.embeddings.get().aembed_query(record["text"])
+        vectors.append({"id": record["id"], "values": embedding, "metadata": record["metadata"]})
+    for i in range(0, len(vectors), 100):
+        await asyncio.to_thread(service.store.upsert, username, vectors[i:i + 100])
+
+
+async def run(args):
+    print(f"{'posts':>6} {'mode':>8} {'seconds':>9} {'embed calls':>12} {'upserts':>8}")
+    for size in args.sizes:
+        posts = make_posts(size)
+        for mode in ("serial", "batched"):
+            fake_embeddings = FakeEmbeddings(args.embed_latency, args.embed_item_latency, args.dimension)
+            embeddings_module.embeddings.set(fake_embeddings)
+            embeddings_module.embedding_cache.persist = False
+            embeddings_module.embedding_cache._local.clear()
+            embeddings_module.embedding_cache._local_bytes = 0
+
+            service = PineconeService(store=FakeStore(args.upsert_latency))
+
+            start = time.perf_counter()
+            if mode == "serial":
+                await serial_ingest(service, "bench_user", posts)
+            else:
+                await service.astore_user_posts("bench_user", posts)
+            elapsed = time.perf_counter() - start
+            print(f"{size:>6} {mode:>8} {elapsed:>9.3f} {fake_embeddings.calls:>12} {service.store.calls:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=lambda s: [int(x) for x in s.split(",")], default=[10, 100, 1000])
+    parser.add_argument("--embed-latency", type=float, default=0.08, help="seconds per embeddings API call")
+    parser.add_argument("--embed-item-latency", type=float, default=0.0005, help="extra seconds per text embedded")
+    parser.add_argument("--upsert-latency", type=float, default=0.03, help="seconds per index upsert")
+    parser.add_argument("--dimension", type=int, default=1536)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
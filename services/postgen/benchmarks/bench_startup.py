@@ -0,0 +1,60 @@
+"""
+Benchmark: cold-start cost of the postgen service.
+
+Imports app.main in fresh interpreters and reports the median wall time, plus
+the slowest modules by cumulative import time (python -X importtime) from one
+extra run. Backends (vector store, LLM and embedding clients) are built lazily,
+so importing must not touch the network - a regression here usually means
+something started connecting or pulling in a heavy SDK at import time again.
+
+Run from services/postgen:
+    python -m benchmarks.bench_startup --runs 5 --top 15
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+IMPORT = "import app.main"
+
+
+def timed_import(env) -> float:
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", IMPORT], env=env, check=True, capture_output=True)
+    return time.perf_counter() - start
+
+
+def slowest_modules(env, top: int):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", IMPORT], env=env, check=True, capture_output=True, text=True
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package"
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        rows.append((int(cumulative), name))
+    return sorted(rows, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="slowest modules to list")
+    args = parser.parse_args()
+
+    env = {**os.environ, "PYTHONDONTWRITEBYTECODE": "1"}
+    timed_import(env)  # populate the OS file cache; .pyc files stay as they are
+    times = [timed_import(env) for _ in range(args.runs)]
+    print(f"import app.main: median {statistics.median(times):.3f} s   min {min(times):.3f} s   max {max(times):.3f} s")
+
+    print(f"\n{'cumulative ms':>14}  module")
+    for cumulative, name in slowest_modules(env, args.top):
+        print(f"{cumulative / 1000:>14.1f}  {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Benchmark: recall@k and query latency of the vector store backends.
+
+Builds a synthetic clustered corpus (normalized float32, like real embeddings),
+computes exact top-k with NumPy as ground truth, then measures:
+
+  * loop     - the old per-post Python cosine loop (most_similar_post style)
+  * local    - LocalVectorStore brute force (one matrix-vector product)
+  * ivf      - LocalVectorStore with the IVF index (approximate)
+  * pinecone - the hosted index (only with --pinecone; vectors are written under a
+               throwaway username and deleted afterwards)
+
+Run from services/postgen:
+    python -m benchmarks.bench_vector_store --vectors 1000,20000 --queries 200 --nprobe 8
+"""
+import argparse
+import statistics
+import tempfile
+import time
+
+import numpy as np
+
+from app.utils.local_vector_store import LocalVectorStore
+
+BENCH_USER = "__bench_vector_store__"
+
+
+def make_corpus(n: int, dimension: int, clusters: int, rng):
+    centers = rng.standard_normal((clusters, dimension)).astype(np.float32)
+    data = centers[rng.integers(clusters, size=n)] + 0.6 * rng.standard_normal((n, dimension)).astype(np.float32)
+    return data / np.linalg.norm(data, axis=1, keepdims=True)
+
+
+def loop_query(corpus: np.ndarray, query: np.ndarray, top_k: int):
+    scores = []
+    for row in corpus:
+        a, b = row.tolist(), query.tolist()
+        dot = sum(x * y for x, y in zip(a, b))
+        scores.append(dot / ((sum(x * x for x in a) ** 0.5) * (sum(y * y for y in b) ** 0.5)))
+    return sorted(range(len(scores)), key=scores.__getitem__, reverse=True)[:top_k]
+
+
+def measure(name, run_query, queries, truth, top_k):
+    latencies, recalls = [], []
+    for query, expected in zip(queries, truth):
+        start = time.perf_counter()
+        found = run_query(query)
+        latencies.append((time.perf_counter() - start) * 1000)
+        recalls.append(len(set(found) & set(expected)) / top_k)
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95) - 1] if len(latencies) > 1 else latencies[0]
+    print(f"  {name:<9} recall@{top_k}={statistics.mean(recalls):.3f}  "
+          f"p50={statistics.median(latencies):8.3f}ms  p95={p95:8.3f}ms")
+
+
+def run(args):
+    rng = np.random.default_rng(0)
+    for n in args.vectors:
+        corpus = make_corpus(n, args.dimension, args.clusters, rng)
+        queries = make_corpus(args.queries, args.dimension, args.clusters, rng)
+        truth = [np.argsort(-(corpus @ q))[:args.top_k].tolist() for q in queries]
+        vectors = [{"id": str(i), "values": row.tolist(), "metadata": {}} for i, row in enumerate(corpus)]
+        print(f"{n} vectors x {args.dimension} dims, {args.queries} queries")
+
+        if n <= args.loop_max:
+            loop_queries = queries[:min(len(queries), 20)]
+            measure("loop", lambda q: [str(i) for i in loop_query(corpus, q, args.top_k)],
+                    loop_queries, [[str(i) for i in t] for t in truth[:len(loop_queries)]], args.top_k)
+
+        str_truth = [[str(i) for i in t] for t in truth]
+        for name, ivf in (("local", False), ("ivf", True)):
+            with tempfile.TemporaryDirectory() as path:
+                store = LocalVectorStore(path=path, dimension=args.dimension, ivf=ivf,
+                                         ivf_min_vectors=0, nprobe=args.nprobe)
+                store.upsert(BENCH_USER, vectors)
+                start = time.perf_counter()
+                store.query(BENCH_USER, queries[0].tolist(), args.top_k)  # builds the IVF index when enabled
+                print(f"  {name:<9} first query (incl. index build) {(time.perf_counter() - start) * 1000:.1f}ms")
+                measure(name, lambda q: [m.id for m in store.query(BENCH_USER, q.tolist(), args.top_k)],
+                        queries, str_truth, args.top_k)
+
+        if args.pinecone:
+            from app.utils.vector_store import PineconeVectorStore
+            store = PineconeVectorStore(dimension=args.dimension)
+            store.upsert(BENCH_USER, [{**v, "metadata": {"username": BENCH_USER}} for v in vectors])
+            time.sleep(args.pinecone_settle)  # the hosted index is eventually consistent
+            try:
+                measure("pinecone", lambda q: [m.id for m in store.query(BENCH_USER, q.tolist(), args.top_k)],
+                        queries, str_truth, args.top_k)
+            finally:
+                store.delete_user(BENCH_USER)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vectors", type=lambda s: [int(x) for x in s.split(",")], default=[1000, 20000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--dimension", type=int, default=1536)
+    parser.add_argument("--clusters", type=int, default=50, help="clusters in the synthetic corpus")
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--nprobe", type=int, default=8)
+    parser.add_argument("--loop-max", type=int, default=2000, help="skip the Python loop above this corpus size")
+    parser.add_argument("--pinecone", action="store_true", help="also benchmark the configured Pinecone index")
+    parser.add_argument("--pinecone-settle", type=float, default=10.0)
+    run(parser.parse_args())
+
+
+if __name__ == "__main__":
+    main()
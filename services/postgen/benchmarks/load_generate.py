@@ -0,0 +1,67 @@
+"""
+Load test: /postgen/generate throughput at increasing concurrency.
+
+Fires `--requests` generate calls at each concurrency level against a running
+postgen service and reports requests/s and latency percentiles. With blocking
+calls off the event loop, throughput should grow with concurrency (up to the
+LLM / I/O pool caps) instead of staying flat at the single-request rate.
+
+Run from services/postgen:
+    python -m benchmarks.load_generate --url http://localhost:8003 --username someuser \\
+        --concurrency 1,4,16 --requests 32
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+
+async def run_level(client: httpx.AsyncClient, url: str, payload: dict, total: int, concurrency: int):
+    sem = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = 0
+
+    async def one():
+        nonlocal errors
+        async with sem:
+            start = time.perf_counter()
+            try:
+                resp = await client.post(url, json=payload)
+                if resp.status_code != 200:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    p95 = latencies[max(0, int(len(latencies) * 0.95) - 1)]
+    print(
+        f"concurrency {concurrency:>3}   {total / elapsed:>7.2f} req/s   "
+        f"p50 {statistics.median(latencies):>6.2f} s   p95 {p95:>6.2f} s   errors {errors}"
+    )
+
+
+async def main(args):
+    payload = {"prompt": args.prompt, "username": args.username, "num_variations": args.variations}
+    url = f"{args.url.rstrip('/')}/postgen/generate"
+    async with httpx.AsyncClient(timeout=args.timeout, limits=httpx.Limits(max_connections=None)) as client:
+        for level in (int(c) for c in args.concurrency.split(",")):
+            await run_level(client, url, payload, args.requests, level)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8003")
+    parser.add_argument("--username", required=True)
+    parser.add_argument("--prompt", default="Share one lesson from shipping a side project")
+    parser.add_argument("--variations", type=int, default=1)
+    parser.add_argument("--concurrency", default="1,4,16")
+    parser.add_argument("--requests", type=int, default=32)
+    parser.add_argument("--timeout", type=float, default=300)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,110 @@
+"""
+Migration: move vectors from the shared default namespace into per-user namespaces.
+
+Before per-user namespaces every vector lived in the default ("") namespace and
+was told apart by `username` metadata. This walks that namespace by id
+(index.list), fetches vectors in batches, upserts each one into its user's
+namespace under the id vector_sync would give it ({username}_{post_id}) and
+records those ids, the count and a watermark in the vector registry. Source vectors
+are only deleted with --delete-source, after their batch has been copied, so the
+migration can be re-run safely (upserts are idempotent by id).
+
+Run from services/postgen (against the configured index and MongoDB):
+    python -m migrations.migrate_vector_namespaces --dry-run
+    python -m migrations.migrate_vector_namespaces --delete-source
+"""
+import argparse
+import asyncio
+import hashlib
+from collections import defaultdict
+from typing import Any, Dict
+
+from shared.db.mongo_db import connect_to_mongo, close_mongo_connection
+from app.utils.vector_registry import vector_registry
+from app.utils.vector_store import PineconeVectorStore
+
+SOURCE_NAMESPACE = ""
+FETCH_BATCH_SIZE = 100
+
+
+def target_id(username: str, metadata: Dict[str, Any]) -> str:
+    """The id vector_sync gives this post (see PineconeService._post_records)"""
+    post_id = metadata.get("post_id")
+    if post_id:
+        return f"{username}_{post_id}"
+    # Metadata content is capped at 1000 chars, so this only matches for posts that fit
+    content = metadata.get("content", "")
+    return f"{username}_{hashlib.sha1(content.encode('utf-8')).hexdigest()[:16]}"
+
+
+def migrate_batch(store: PineconeVectorStore, ids, dry_run: bool, delete_source: bool) -> Dict[str, Dict[str, str]]:
+    """Copy one page of vectors; returns {username: {new id: scraped_at}}"""
+    fetched = store.index.fetch(ids=ids, namespace=SOURCE_NAMESPACE).vectors
+    by_user = defaultdict(list)
+    source_ids = []
+    skipped = 0
+    for vector_id, vector in fetched.items():
+        metadata = dict(vector.metadata or {})
+        username = metadata.get("username")
+        if not username:
+            skipped += 1
+            continue
+        source_ids.append(vector_id)
+        by_user[username].append({"id": target_id(username, metadata), "values": list(vector.values), "metadata": metadata})
+
+    moved = {
+        username: {v["id"]: str(v["metadata"].get("scraped_at") or "") for v in vectors}
+        for username, vectors in by_user.items()
+    }
+    if not dry_run:
+        for username, vectors in by_user.items():
+            store.upsert(username, vectors)
+        if delete_source and source_ids:
+            store.index.delete(ids=source_ids, namespace=SOURCE_NAMESPACE)
+    if skipped:
+        print(f"Skipped {skipped} vectors without username metadata")
+    return moved
+
+
+async def run(args):
+    store = PineconeVectorStore()
+    moved: Dict[str, Dict[str, str]] = defaultdict(dict)
+    for page in store.index.list(namespace=SOURCE_NAMESPACE, limit=FETCH_BATCH_SIZE):
+        ids = list(page)
+        if ids:
+            for username, vectors in migrate_batch(store, ids, args.dry_run, args.delete_source).items():
+                moved[username].update(vectors)
+            print(f"Processed {sum(len(v) for v in moved.values())} vectors across {len(moved)} users")
+
+    if args.dry_run:
+        for username, vectors in sorted(moved.items()):
+            print(f"{username}: {len(vectors)} vectors")
+        return
+
+    # Record the ids now in each namespace so the next sync diffs against them
+    # instead of treating the user as unknown and re-embedding everything
+    await connect_to_mongo()
+    try:
+        for username, vectors in moved.items():
+            entry = await vector_registry.get(username) or {}
+            await vector_registry.record(
+                username,
+                indexed=True,
+                vector_count=len(vectors),
+                watermark=entry.get("watermark") or max(vectors.values()) or None,
+                post_ids=list(vectors),
+            )
+    finally:
+        await close_mongo_connection()
+    print(f"Migrated {sum(len(v) for v in moved.values())} vectors for {len(moved)} users")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dry-run", action="store_true", help="only report what would move")
+    parser.add_argument("--delete-source", action="store_true", help="delete migrated vectors from the default namespace")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
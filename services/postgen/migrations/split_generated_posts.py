@@ -0,0 +1,79 @@
+"""
+Migration: split per-user `generated_posts` arrays into one document per post.
+
+Generated posts used to be $push-ed into a single document per user in the
+generated_posts collection. This copies every array item into the
+generated_post_items collection (_id = the item's post_id, so re-running skips
+posts already copied) and ensures the (username, created_at) history index.
+Legacy documents are only deleted with --delete-source, after their items have
+been copied.
+
+Run from services/postgen (against the configured MongoDB):
+    python -m migrations.split_generated_posts --dry-run
+    python -m migrations.split_generated_posts --delete-source
+"""
+import argparse
+import asyncio
+
+from pymongo.errors import BulkWriteError
+
+from shared.db.mongo_db import connect_to_mongo, close_mongo_connection, get_database
+from app.config import GENERATED_POSTS_COLLECTION_NAME, GENERATED_POST_ITEMS_COLLECTION_NAME
+from app.routes.generate import ensure_generation_indexes
+
+BATCH_SIZE = 500
+
+
+async def copy_items(target, docs) -> int:
+    """Insert a batch, ignoring items that a previous run already copied"""
+    if not docs:
+        return 0
+    try:
+        result = await target.insert_many(docs, ordered=False)
+        return len(result.inserted_ids)
+    except BulkWriteError as e:
+        if any(err.get("code") != 11000 for err in e.details.get("writeErrors", [])):
+            raise
+        return e.details.get("nInserted", 0)
+
+
+async def run(args):
+    await connect_to_mongo()
+    db = get_database()
+    source = db[GENERATED_POSTS_COLLECTION_NAME]
+    target = db[GENERATED_POST_ITEMS_COLLECTION_NAME]
+    await ensure_generation_indexes(db)
+
+    users = items = copied = 0
+    try:
+        async for user_doc in source.find({"generated_posts": {"$exists": True}}):
+            username = user_doc["username"]
+            docs = [
+                {"_id": item["post_id"], "username": username, "generation_id": None, **item}
+                for item in user_doc.get("generated_posts", []) if item.get("post_id")
+            ]
+            users += 1
+            items += len(docs)
+            if args.dry_run:
+                print(f"{username}: {len(docs)} posts")
+                continue
+
+            for i in range(0, len(docs), BATCH_SIZE):
+                copied += await copy_items(target, docs[i:i + BATCH_SIZE])
+            if args.delete_source:
+                await source.delete_one({"_id": user_doc["_id"]})
+    finally:
+        await close_mongo_connection()
+
+    print(f"{users} users, {items} posts found, {copied} newly copied")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dry-run", action="store_true", help="only report what would be copied")
+    parser.add_argument("--delete-source", action="store_true", help="delete legacy documents once copied")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
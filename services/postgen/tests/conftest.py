@@ -0,0 +1,7 @@
+import os
+
+# Offline backends for everything the app builds; set before any app module is imported.
+# `shared` must be importable too (pip install -e . from the repo root, or PYTHONPATH).
+os.environ.setdefault("LLM_BACKEND", "fake")
+os.environ.setdefault("EMBEDDING_BACKEND", "hash")
+os.environ.setdefault("VECTOR_STORE_BACKEND", "local")
@@ -0,0 +1,97 @@
+import asyncio
+
+import pytest
+
+from app.utils import vector_sync
+from app.utils.pinecone import pinecone_service
+from app.utils.vector_registry import vector_registry
+
+USERNAME = "sync_test_user"
+
+
+class FakePostsCollection:
+    def __init__(self, posts):
+        self.posts = posts
+
+    def aggregate(self, pipeline):
+        return self
+
+    async def to_list(self, length=None):
+        ordered = sorted(self.posts, key=lambda post: post["scraped_at"], reverse=True)
+        return ordered[:length]
+
+
+class FakeDB:
+    def __init__(self, posts):
+        self.posts = FakePostsCollection(posts)
+
+    def __getitem__(self, name):
+        return self.posts
+
+
+def post(post_id, scraped_at):
+    return {"post_id": post_id, "text": f"Post {post_id} about shipping the product", "scraped_at": scraped_at}
+
+
+@pytest.fixture
+def store(monkeypatch):
+    """In-memory stand-in for the vector store calls sync_user_posts makes"""
+    vectors = set()
+    calls = {"stored": [], "deleted": []}
+
+    async def astore_user_posts(username, posts):
+        ids = [record["id"] for record in pinecone_service._post_records(username, posts)]
+        calls["stored"].append(ids)
+        vectors.update(ids)
+        return True
+
+    async def adelete_posts(username, ids):
+        calls["deleted"].append(list(ids))
+        vectors.difference_update(ids)
+        return True
+
+    async def ahas_user_posts(username):
+        return bool(vectors)
+
+    monkeypatch.setattr(pinecone_service, "astore_user_posts", astore_user_posts)
+    monkeypatch.setattr(pinecone_service, "adelete_posts", adelete_posts)
+    monkeypatch.setattr(pinecone_service, "ahas_user_posts", ahas_user_posts)
+    monkeypatch.setattr(vector_sync, "VECTOR_SYNC_MAX_POSTS", 2)
+    vector_registry.invalidate(USERNAME)
+    vector_sync._last_sync.pop(USERNAME, None)
+    yield vectors, calls
+    vector_registry.invalidate(USERNAME)
+    vector_sync._last_sync.pop(USERNAME, None)
+
+
+def test_post_entering_window_late_is_embedded(store):
+    vectors, calls = store
+    posts = [post("a", "2025-08-03T00:00:00"), post("b", "2025-08-02T00:00:00"), post("c", "2025-08-01T00:00:00")]
+    db = FakeDB(posts)
+
+    assert asyncio.run(vector_sync.sync_user_posts(USERNAME, db, force=True))
+    assert vectors == {f"{USERNAME}_a", f"{USERNAME}_b"}
+
+    # Duplicate cleanup drops "b": "c" is older than the watermark but now inside the window
+    posts.remove(posts[1])
+    assert asyncio.run(vector_sync.sync_user_posts(USERNAME, db, force=True))
+
+    assert vectors == {f"{USERNAME}_a", f"{USERNAME}_c"}
+    assert calls["stored"][-1] == [f"{USERNAME}_c"]
+    assert calls["deleted"] == [[f"{USERNAME}_b"]]
+    entry = asyncio.run(vector_registry.get(USERNAME))
+    assert sorted(entry["post_ids"]) == [f"{USERNAME}_a", f"{USERNAME}_c"]
+    assert entry["watermark"] == "2025-08-03T00:00:00"
+
+
+def test_unchanged_window_skips_the_sync(store):
+    vectors, calls = store
+    db = FakeDB([post("a", "2025-08-03T00:00:00"), post("b", "2025-08-02T00:00:00")])
+
+    asyncio.run(vector_sync.sync_user_posts(USERNAME, db, force=True))
+    entry = asyncio.run(vector_registry.get(USERNAME))
+    assert asyncio.run(vector_sync.sync_user_posts(USERNAME, db, force=True))
+
+    assert len(calls["stored"]) == 1
+    assert calls["deleted"] == []
+    assert asyncio.run(vector_registry.get(USERNAME)) is entry
@@ -2,7 +2,7 @@ import sys
 import os
 from fastapi import FastAPI
 
-from app.routes.scraping import router as scraping_router
+from app.routes.scraping import router as scraping_router, close_postgen_client
 from shared.db.mongo_db import connect_to_mongo, close_mongo_connection
 
 
@@ -35,6 +35,7 @@ async def startup_event():
 async def shutdown_event():
     print("🔄 Scraper service is shutting down...")
     try:
+        await close_postgen_client()
         await close_mongo_connection()
         print("✅ MongoDB connection closed")
     except Exception as e:
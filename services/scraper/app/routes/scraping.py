@@ -5,9 +5,12 @@ from motor.motor_asyncio import AsyncIOMotorDatabase
 from pydantic import BaseModel, Field, HttpUrl
 from typing import List, Optional, Literal
 from datetime import datetime, timedelta, timezone
+import asyncio
 import os
 import json
+import httpx
 from pathlib import Path
+from urllib.parse import quote
 from shared.db.mongo_db import get_database
 from app.models.post import PostInDB, UserPosts, HashtagPosts
 from app.utils.linkedin_bot import LinkedInBot
@@ -24,6 +27,11 @@ HASHTAG_DATA_DIR = BASE_DATA_DIR / "hashtag_posts"
 Path(DATA_DIR).mkdir(parents=True, exist_ok=True)
 Path(HASHTAG_DATA_DIR).mkdir(parents=True, exist_ok=True)
 
+# Postgen embeds a user's posts in the background when told new ones were saved
+POSTGEN_SERVICE_URL = os.getenv("POSTGEN_SERVICE_URL", "http://postgen-service:8000")
+_notify_tasks = set()
+_postgen_client: Optional[httpx.AsyncClient] = None  # pooled keep-alive client, opened on first notify
+
 # ======== Schemas ========
 Source = Literal["profile", "hashtag"]
 
@@ -78,6 +86,33 @@ def convert_post_to_response_format(post_dict: dict) -> PostData:
         hashtag=post_dict.get("hashtag")
     )
 
+def _get_postgen_client() -> httpx.AsyncClient:
+    global _postgen_client
+    if _postgen_client is None:
+        _postgen_client = httpx.AsyncClient(base_url=POSTGEN_SERVICE_URL, timeout=5)
+    return _postgen_client
+
+async def close_postgen_client():
+    global _postgen_client
+    if _postgen_client is not None:
+        await _postgen_client.aclose()
+        _postgen_client = None
+
+async def notify_postgen_indexing(username: str):
+    """Ask postgen to index the user's new posts; best effort - generation syncs lazily anyway"""
+    try:
+        resp = await _get_postgen_client().post(f"/postgen/index/{quote(username, safe='')}")
+        if resp.status_code == 503:
+            print(f"⚠️ Postgen indexing queue full, {username} will be indexed on first generation")
+    except httpx.HTTPError as e:
+        print(f"⚠️ Could not notify postgen to index {username}: {e}")
+
+def schedule_indexing(username: str):
+    """Fire-and-forget notify_postgen_indexing without delaying the scrape response"""
+    task = asyncio.create_task(notify_postgen_indexing(username))
+    _notify_tasks.add(task)
+    task.add_done_callback(_notify_tasks.discard)
+
 async def save_profile_posts_to_db(posts_data: List[dict], profile_url: str, db: AsyncIOMotorDatabase) -> List[dict]:
     username = extract_profile_identifier(profile_url)
     current_time = datetime.utcnow().isoformat()
@@ -215,6 +250,9 @@ async def get_user_profile_posts(
         saved_posts = await save_profile_posts_to_db(scraped_posts, profile_url, db)
         save_posts_to_json(scraped_posts, username)
         await cleanup_duplicate_posts(db, username)
+        # Only once duplicates are gone, so postgen never embeds rows deleted under it
+        if saved_posts:
+            schedule_indexing(username)
         response_posts = [convert_post_to_response_format(post) for post in saved_posts]
         execution_time = (datetime.utcnow() - start_time).total_seconds()
         return ProfilePostsResponse(